@@ -1,30 +1,428 @@
-from flask import Flask, jsonify, request, send_from_directory
+from flask import Flask, Response, g, jsonify, request, send_from_directory, stream_with_context
 from flask_cors import CORS
+import gzip
+import hmac
+import ipaddress
+import logging
 import os
 import sys
+import time
+
+# Brotli compresses JSON better than gzip, but is optional
+try:
+    import brotli
+except ImportError:
+    brotli = None
 
 # Import your enhanced API functions
 from sound_mind_agent import (
-    search_news, get_reddit_token, search_reddit, search_pubmed,
-    search_youtube, search_arxiv, search_podcasts, search_medium, 
-    search_github, search_google_scholar, search_all_sources
+    get_reddit_token, search_source, async_search_sources,
+    iter_source_results, SOURCE_HOSTS, SOURCE_ORDER, SEARCH_DEADLINE
 )
+from content_item import ContentItem
+from content_library import library
+from dates import parse_bound
+import http_client
+import metrics
+import resilience
+from dedup import DedupIndex, dedupe
+from json_encoding import FastJSONProvider, dumps, dumps_bytes
+from logging_config import configure_logging
+from prefetch import prefetcher
+from ranking import rank
+from result_cache import search_cache
+from result_sets import CursorExpired, make_cursor, result_sets
+import tracing
+from config import config
+from reddit_client import reddit
+
+logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 CORS(app)  # Allow cross-origin requests from your frontend
 
-# Store Reddit token globally to avoid repeated requests
-reddit_token = None
+# JSON bodies smaller than this aren't worth compressing
+COMPRESS_MIN_SIZE = 1024
+
+# Registered before compress_response so it runs after it (after_request handlers run in reverse)
+@app.after_request
+def finish_response_profile(response):
+    """Finish a profiled search once its response is compressed, adding Server-Timing"""
+    trace = g.pop('profile_trace', None)
+    if trace:
+        trace_file = finish_profile(trace)
+        response.headers['Server-Timing'] = tracing.server_timing(trace)
+        if trace_file:
+            response.headers['X-Trace-File'] = os.path.basename(trace_file)
+    return response
+
+@app.after_request
+def compress_response(response):
+    """Compress JSON responses with brotli or gzip, whichever the client accepts"""
+    if (response.direct_passthrough or response.is_streamed
+            or response.mimetype != 'application/json'
+            or 'Content-Encoding' in response.headers):
+        return response
+    
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_SIZE:
+        return response
+    
+    accepted = request.accept_encodings
+    if brotli is not None and 'br' in accepted:
+        with tracing.span('compress', encoding='br'):
+            response.set_data(brotli.compress(data, quality=4))
+        response.headers['Content-Encoding'] = 'br'
+    elif 'gzip' in accepted:
+        with tracing.span('compress', encoding='gzip'):
+            response.set_data(gzip.compress(data, compresslevel=5))
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        return response
+    response.vary.add('Accept-Encoding')
+    return response
+
+def metrics_route():
+    """The matched URL rule, so /api/search/news/<term> is one series however many terms"""
+    return request.url_rule.rule if request.url_rule else 'unmatched'
+
+@app.before_request
+def start_prefetcher():
+    """Start keeping hot searches warm once this process serves requests
+
+    Done here rather than at startup so it happens under any WSGI server and
+    never in the debug reloader's watcher process, which serves nothing.
+    """
+    prefetcher.start()
+
+@app.before_request
+def start_request_metrics():
+    g.metrics_start = time.perf_counter()
+    g.metrics_route = metrics_route()
+    metrics.http_requests_in_flight.inc(g.metrics_route)
+
+@app.after_request
+def record_request_metrics(response):
+    """Count the response and time it (for streams, until the response starts)"""
+    if 'metrics_start' in g:
+        metrics.http_requests.inc(g.metrics_route, request.method, response.status_code)
+        metrics.http_request_duration.observe(time.perf_counter() - g.metrics_start, g.metrics_route)
+    return response
+
+@app.teardown_request
+def finish_request_metrics(error=None):
+    if 'metrics_start' in g:
+        metrics.http_requests_in_flight.dec(g.metrics_route)
 
 def initialize_reddit():
-    """Initialize Reddit token once at startup"""
-    global reddit_token
-    print("🔄 Initializing Reddit connection...")
-    reddit_token = get_reddit_token()
-    if reddit_token:
-        print("✅ Reddit connected successfully!")
+    """Get the first Reddit token at startup (the client refreshes it from then on)"""
+    logger.info("🔄 Initializing Reddit connection...")
+    if get_reddit_token():
+        logger.info("✅ Reddit connected successfully!")
     else:
-        print("❌ Reddit connection failed - check your .env file")
+        logger.warning("❌ Reddit connection failed - check your .env file")
+
+def cache_status(source_results):
+    """Summarize how many source searches were served from cache, for X-Cache"""
+    hits = sum(1 for result in source_results if result.cached)
+    if source_results and hits == len(source_results):
+        return 'HIT', hits
+    return ('PARTIAL' if hits else 'MISS'), hits
+
+def with_cache_headers(response, source_results):
+    """Add X-Cache / X-Cache-Hits headers describing a search's cache usage"""
+    status, hits = cache_status(source_results)
+    response.headers['X-Cache'] = status
+    response.headers['X-Cache-Hits'] = f"{hits}/{len(source_results)}"
+    return response
+
+def trace_dumps_allowed():
+    """Whether this request may write a trace file: TRACE_DUMPS is on and the caller is an admin"""
+    enabled = (config.get('TRACE_DUMPS') or '').lower() in ('1', 'true', 'yes')
+    return enabled and admin_authorized()
+
+def profile_mode():
+    """'summary' or 'trace' when ?profile= or X-Profile asks for a timing breakdown, else None
+
+    1/true/summary add a trace summary to the response; trace (or full)
+    also writes the whole trace to TRACE_DIR for a trace viewer, but only
+    when trace_dumps_allowed() (otherwise it gets the summary).
+    """
+    mode = (request.args.get('profile') or request.headers.get('X-Profile') or '').lower()
+    if mode in ('trace', 'full'):
+        return 'trace' if trace_dumps_allowed() else 'summary'
+    if mode in ('1', 'true', 'yes', 'summary'):
+        return 'summary'
+    return None
+
+def start_profile():
+    """Start tracing this request if profiling was asked for (returns the Trace or None)"""
+    mode = profile_mode()
+    return tracing.start(request.path, dump=mode == 'trace') if mode else None
+
+def finish_profile(trace):
+    """Stop a request's trace, writing the full trace file if asked; returns the file path"""
+    tracing.finish(trace)
+    return trace.write() if trace.dump else None
+
+def search_response(body, source_results, trace):
+    """Serialize a search body, adding the trace summary when profiling
+
+    The summary is taken after serialization and spliced into the encoded
+    body, so it includes the serialize span without encoding the body twice.
+    Compression comes later; it shows in Server-Timing and the trace file,
+    which finish_response_profile() adds once the response is compressed.
+    """
+    with tracing.span('serialize'):
+        response = jsonify(body)
+    response = with_cache_headers(response, source_results)
+    if trace:
+        data = response.get_data()
+        response.set_data(data[:-1] + b',"profile":' + dumps_bytes(trace.summary()) + b'}')
+        g.profile_trace = trace
+    return response
+
+def source_response(source_name, term):
+    """Search one source (through the cache) and build its JSON response"""
+    prefetcher.record([term])
+    try:
+        results, cached = search_source(source_name, term)
+    except resilience.HostUnavailable as e:
+        return jsonify({'error': str(e)}), 503
+    response = jsonify({'success': True, 'results': results})
+    response.headers['X-Cache'] = 'HIT' if cached else 'MISS'
+    return response
+
+def degraded_sources(source_results):
+    """Sources skipped because their circuit breaker is open"""
+    return sorted({result.source for result in source_results if result.status == 'degraded'})
+
+def rate_limited_sources(source_results):
+    """Sources refused because their host's rate budget ran out (nothing was cached for them)"""
+    return sorted({result.source for result in source_results if result.status == 'rate_limited'})
+
+# Page size for cursor requests that don't give a limit, and the largest page served
+DEFAULT_PAGE_SIZE = 8
+MAX_PAGE_SIZE = 100
+
+# Result layouts a page can be served in: results, results_by_source, or both
+VIEWS = ('flat', 'grouped', 'both')
+
+def page_limit(data):
+    """The requested page size clamped to MAX_PAGE_SIZE, or None if no limit was given
+
+    Raises ValueError for a limit that isn't a positive integer.
+    """
+    limit = data.get('limit')
+    if limit is None:
+        return None
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        raise ValueError(f"limit must be a positive integer, not {limit!r}")
+    if limit < 1:
+        raise ValueError("limit must be a positive integer")
+    return min(limit, MAX_PAGE_SIZE)
+
+def requested_fields(data):
+    """The known fields asked for with fields= (a list or comma-separated string), or None for all
+
+    Raises ValueError if none of the requested fields exist.
+    """
+    fields = data.get('fields')
+    if not fields:
+        return None
+    if isinstance(fields, str):
+        fields = fields.split(',')
+    known = [str(field).strip() for field in fields if str(field).strip() in ContentItem.FIELDS]
+    if not known:
+        raise ValueError(f"Unknown fields {fields!r}; choose from: {', '.join(ContentItem.FIELDS)}")
+    return known
+
+def requested_view(data, default_view):
+    """The view asked for with view=, or default_view when none is given
+
+    Raises ValueError for a view that isn't one of VIEWS.
+    """
+    view = data.get('view') or default_view
+    if view not in VIEWS:
+        raise ValueError(f"Unknown view {view!r}; choose from: {', '.join(VIEWS)}")
+    return view
+
+def page_error(data):
+    """A 400 response if limit, fields or view can't be used, else None"""
+    try:
+        page_limit(data)
+        requested_fields(data)
+        if data.get('view'):
+            requested_view(data, None)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return None
+
+def project(items, fields):
+    """Keep only the given fields of each item (all of them when fields is None)"""
+    if not fields:
+        return items
+    return [item.to_dict(fields) for item in items]
+
+def group_by_source(items):
+    """Group items under every source that found them"""
+    grouped = {}
+    for item in items:
+        for source_name in item.sources or []:
+            grouped.setdefault(source_name, []).append(item)
+    return grouped
+
+def page_body(items, envelope, set_id, offset, limit, data, default_view):
+    """Build one page of a ranked result set: the envelope plus the page in the requested view
+
+    view is 'flat' (results), 'grouped' (results_by_source) or 'both'.
+    """
+    end = offset + limit
+    page = items[offset:end]
+    fields = requested_fields(data)
+    view = requested_view(data, default_view)
+
+    body = dict(envelope)
+    if view in ('flat', 'both'):
+        body['results'] = project(page, fields)
+    if view in ('grouped', 'both'):
+        body['results_by_source'] = {
+            source_name: project(source_items, fields)
+            for source_name, source_items in group_by_source(page).items()
+        }
+    body['next_cursor'] = make_cursor(set_id, end) if set_id and end < len(items) else None
+    return body
+
+def time_bounds(data):
+    """(since, until) epoch bounds from the request (None where not given)
+
+    Raises ValueError for dates that can't be read.
+    """
+    since, until = data.get('since'), data.get('until')
+    return (
+        parse_bound(since) if since is not None else None,
+        parse_bound(until, end=True) if until is not None else None
+    )
+
+def time_range_error(data):
+    """A 400 response if since/until can't be read, else None"""
+    try:
+        time_bounds(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return None
+
+# Milliseconds kept back from a budget_ms for ranking and serializing the response
+BUDGET_RESERVE_MS = 50
+
+def search_budget(data):
+    """Seconds a search may wait for its sources: budget_ms if given, else SEARCH_DEADLINE
+
+    Raises ValueError for a budget that isn't a non-negative number.
+    """
+    budget_ms = data.get('budget_ms')
+    if budget_ms is None:
+        return SEARCH_DEADLINE
+    try:
+        budget_ms = float(budget_ms)
+    except (TypeError, ValueError):
+        raise ValueError(f"budget_ms must be a number of milliseconds, not {budget_ms!r}")
+    if not budget_ms >= 0:
+        raise ValueError("budget_ms can't be negative")
+    return min(max(0.0, budget_ms - BUDGET_RESERVE_MS) / 1000, SEARCH_DEADLINE)
+
+def budget_error(data):
+    """A 400 response if budget_ms can't be read, else None"""
+    try:
+        search_budget(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return None
+
+def pending_sources(source_results):
+    """Sources cut off by the deadline; their fetches keep running and fill the cache"""
+    return sorted({result.source for result in source_results if result.status == 'timeout'})
+
+def in_time_range(items, since, until):
+    """Items dated within since..until (undated ones left out); all of them without bounds"""
+    if since is None and until is None:
+        return items
+    return [
+        item for item in items
+        if item.timestamp is not None
+        and (since is None or item.timestamp >= since)
+        and (until is None or item.timestamp <= until)
+    ]
+
+def filter_time_range(source_results, data):
+    """SourceResults with only the items inside the request's since/until range
+
+    Applied before deduplication, so every count and page reflects the range.
+    """
+    since, until = time_bounds(data)
+    if since is None and until is None:
+        return source_results
+    return [result._replace(results=in_time_range(result.results, since, until)) for result in source_results]
+
+def order_results(items, search_terms, data):
+    """Rank a result set, or order it newest first when sort=newest or a time range is given
+
+    Time ordering is one stable sort on the items' pre-parsed timestamps
+    (undated items last), so equally dated items keep their rank order.
+    """
+    ranked = rank(items, search_terms)
+    since, until = time_bounds(data)
+    if data.get('sort') == 'newest' or since is not None or until is not None:
+        return sorted(ranked, key=lambda item: (item.timestamp is None, -(item.timestamp or 0)))
+    return ranked
+
+def first_page(items, search_terms, data, envelope, default_view):
+    """Order a fresh result set and build its first page
+
+    Without a limit everything comes back at once. Otherwise the ordered
+    set is kept server-side and next_cursor pages through it without
+    searching again.
+    """
+    ranked = order_results(items, search_terms, data)
+    limit = page_limit(data)
+    if limit is None or limit >= len(ranked):
+        return page_body(ranked, envelope, None, 0, len(ranked), data, default_view)
+    set_id = result_sets.put(ranked, envelope)
+    return page_body(ranked, envelope, set_id, 0, limit, data, default_view)
+
+def cursor_response(data, default_view):
+    """Serve the page a cursor points at from its stored result set"""
+    error = page_error(data)
+    if error:
+        return error
+    try:
+        set_id, items, envelope, offset = result_sets.resolve(data['cursor'])
+    except CursorExpired as e:
+        return jsonify({'error': str(e)}), 410
+    limit = page_limit(data) or DEFAULT_PAGE_SIZE
+    response = jsonify(page_body(items, envelope, set_id, offset, limit, data, default_view))
+    response.headers['X-Cache'] = 'HIT'
+    return response
+
+def is_loopback(address):
+    try:
+        return ipaddress.ip_address(address or '').is_loopback
+    except ValueError:
+        return False
+
+def admin_authorized():
+    """Check X-Admin-Token against the ADMIN_TOKEN setting
+
+    With no ADMIN_TOKEN set, only callers on this machine are let in; the
+    server listens on every interface, so anyone else is refused.
+    """
+    admin_token = config.get('ADMIN_TOKEN')
+    if not admin_token:
+        return is_loopback(request.remote_addr)
+    return hmac.compare_digest(request.headers.get('X-Admin-Token', ''), admin_token)
 
 @app.route('/')
 def serve_index():
@@ -37,41 +435,56 @@ def serve_static(filename):
     return send_from_directory('.', filename)
 
 @app.route('/api/search', methods=['POST'])
-def api_search():
+async def api_search():
     """Main search endpoint that combines all sources"""
     try:
         data = request.get_json()
         search_terms = data.get('searchTerms', [])
         
+        # Later pages come from the stored result set, not a new search
+        if data.get('cursor'):
+            return cursor_response(data, 'flat')
+        
         if not search_terms:
             return jsonify({'error': 'No search terms provided'}), 400
+        error = time_range_error(data) or budget_error(data) or page_error(data)
+        if error:
+            return error
         
-        print(f"🔍 Enhanced API Search request for terms: {search_terms}")
-        
-        all_results = []
+        logger.info("🔍 Enhanced API Search request for terms: %s", search_terms)
+        prefetcher.record(search_terms)
+        trace = start_profile()
         
-        for term in search_terms:
-            print(f"   Searching all sources for: {term}")
-            
-            # Use the enhanced search function that searches all sources
-            term_results = search_all_sources(term, reddit_token)
-            all_results.extend(term_results)
+        # Every source for every term runs concurrently in the fan-out engine
+        # Whatever hasn't arrived within the budget is left pending (and still cached when it lands)
+        with tracing.span('search'):
+            source_results = await async_search_sources(search_terms, deadline=search_budget(data))
+        source_results = filter_time_range(source_results, data)
+        # The same item found by several terms or sources comes back once
+        with tracing.span('dedupe'):
+            all_results = dedupe(source_results)
         
-        print(f"🎯 Total results found across all sources: {len(all_results)}")
+        logger.info("🎯 Total results found across all sources: %s", len(all_results))
         
         # Add some metadata about source diversity
-        source_types = set(result['type'] for result in all_results)
+        source_types = set(result.type for result in all_results)
         
-        return jsonify({
+        envelope = {
             'success': True,
-            'results': all_results,
             'total_count': len(all_results),
             'source_types': list(source_types),
-            'sources_searched': len(source_types)
-        })
+            'sources_searched': len(source_types),
+            'degraded_sources': degraded_sources(source_results),
+            'rate_limited_sources': rate_limited_sources(source_results),
+            'partial': bool(pending_sources(source_results)),
+            'pending_sources': pending_sources(source_results)
+        }
+        with tracing.span('rank'):
+            body = first_page(all_results, search_terms, data, envelope, 'flat')
+        return search_response(body, source_results, trace)
         
     except Exception as e:
-        print(f"❌ Enhanced Search API error: {e}")
+        logger.exception("❌ Enhanced Search API error: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/test', methods=['GET'])
@@ -79,7 +492,8 @@ def api_test():
     """Test endpoint to verify API is working"""
     return jsonify({
         'message': 'Sound Mind Enhanced API is working!',
-        'reddit_connected': reddit_token is not None,
+        'reddit_connected': reddit.connected(),
+        'upstream': http_client.transport_summary(),
         'available_sources': [
             'NewsAPI', 'Reddit', 'PubMed', 'YouTube', 
             'arXiv', 'Podcasts', 'Medium', 'GitHub', 'Google Scholar'
@@ -91,8 +505,7 @@ def api_test():
 def api_search_news(term):
     """Search only news for a specific term"""
     try:
-        results = search_news(term)
-        return jsonify({'success': True, 'results': results})
+        return source_response('news', term)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -100,8 +513,7 @@ def api_search_news(term):
 def api_search_reddit(term):
     """Search only Reddit for a specific term"""
     try:
-        results = search_reddit(term, reddit_token)
-        return jsonify({'success': True, 'results': results})
+        return source_response('reddit', term)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -109,8 +521,7 @@ def api_search_reddit(term):
 def api_search_research(term):
     """Search only research papers for a specific term"""
     try:
-        results = search_pubmed(term)
-        return jsonify({'success': True, 'results': results})
+        return source_response('pubmed', term)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -118,8 +529,7 @@ def api_search_research(term):
 def api_search_youtube(term):
     """Search only YouTube for a specific term"""
     try:
-        results = search_youtube(term)
-        return jsonify({'success': True, 'results': results})
+        return source_response('youtube', term)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -127,8 +537,7 @@ def api_search_youtube(term):
 def api_search_arxiv(term):
     """Search only arXiv for a specific term"""
     try:
-        results = search_arxiv(term)
-        return jsonify({'success': True, 'results': results})
+        return source_response('arxiv', term)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -136,8 +545,7 @@ def api_search_arxiv(term):
 def api_search_podcasts(term):
     """Search only podcasts for a specific term"""
     try:
-        results = search_podcasts(term)
-        return jsonify({'success': True, 'results': results})
+        return source_response('podcasts', term)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -145,8 +553,7 @@ def api_search_podcasts(term):
 def api_search_medium(term):
     """Search only Medium for a specific term"""
     try:
-        results = search_medium(term)
-        return jsonify({'success': True, 'results': results})
+        return source_response('medium', term)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -154,8 +561,7 @@ def api_search_medium(term):
 def api_search_github(term):
     """Search only GitHub for a specific term"""
     try:
-        results = search_github(term)
-        return jsonify({'success': True, 'results': results})
+        return source_response('github', term)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -163,8 +569,7 @@ def api_search_github(term):
 def api_search_scholar(term):
     """Search only Google Scholar for a specific term"""
     try:
-        results = search_google_scholar(term)
-        return jsonify({'success': True, 'results': results})
+        return source_response('scholar', term)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -228,85 +633,319 @@ def api_get_sources():
         }
     }
     
+    # Breaker state and remaining rate budget of each source's hosts (those used so far)
+    states = resilience.host_states()
+    for source_key, source in sources.items():
+        hosts = {host: states[host] for host in SOURCE_HOSTS.get(source_key, []) if host in states}
+        source['hosts'] = hosts
+        source['degraded'] = any(state['breaker'] == 'open' for state in hosts.values())
+    
     return jsonify({
         'sources': sources,
         'total_sources': len(sources)
     })
 
 @app.route('/api/search/bulk', methods=['POST'])
-def api_bulk_search():
+async def api_bulk_search():
     """Search multiple sources simultaneously with detailed breakdown"""
     try:
         data = request.get_json()
         search_terms = data.get('searchTerms', [])
         selected_sources = data.get('sources', [])  # Allow filtering by source
         
+        if data.get('cursor'):
+            return cursor_response(data, 'both')
+        
         if not search_terms:
             return jsonify({'error': 'No search terms provided'}), 400
+        error = time_range_error(data) or budget_error(data) or page_error(data)
+        if error:
+            return error
         
-        print(f"🔍 Bulk search for terms: {search_terms}")
+        logger.info("🔍 Bulk search for terms: %s", search_terms)
+        prefetcher.record(search_terms)
+        trace = start_profile()
         if selected_sources:
-            print(f"   Limited to sources: {selected_sources}")
+            logger.info("Limited to sources: %s", selected_sources)
         
-        results_by_source = {}
-        all_results = []
+        source_stats = {}
+        timed_out = []
         
-        for term in search_terms:
-            print(f"   Processing term: {term}")
+        # Search each source individually for detailed breakdown, all at once
+        with tracing.span('search'):
+            source_results = await async_search_sources(search_terms, selected_sources, search_budget(data))
+        source_results = filter_time_range(source_results, data)
+        for source_result in source_results:
+            source_name = source_result.source
+            source_stats[source_name] = source_stats.get(source_name, 0) + len(source_result.results)
             
-            # Search each source individually for detailed breakdown
-            source_functions = {
-                'news': lambda: search_news(term),
-                'reddit': lambda: search_reddit(term, reddit_token),
-                'pubmed': lambda: search_pubmed(term),
-                'youtube': lambda: search_youtube(term),
-                'arxiv': lambda: search_arxiv(term),
-                'podcasts': lambda: search_podcasts(term),
-                'medium': lambda: search_medium(term),
-                'github': lambda: search_github(term),
-                'scholar': lambda: search_google_scholar(term)
-            }
-            
-            for source_name, search_func in source_functions.items():
-                # Skip if user specified sources and this isn't included
-                if selected_sources and source_name not in selected_sources:
-                    continue
-                    
-                try:
-                    source_results = search_func()
-                    if source_name not in results_by_source:
-                        results_by_source[source_name] = []
-                    results_by_source[source_name].extend(source_results)
-                    all_results.extend(source_results)
-                    print(f"     {source_name}: {len(source_results)} results")
-                except Exception as e:
-                    print(f"     {source_name}: Error - {e}")
-                    if source_name not in results_by_source:
-                        results_by_source[source_name] = []
+            if source_result.status == 'timeout':
+                timed_out.append(f"{source_name}:{source_result.term}")
+                logger.debug("%s (%s): timed out", source_name, source_result.term)
+            elif source_result.status == 'degraded':
+                logger.debug("%s (%s): skipped, source degraded", source_name, source_result.term)
+            elif source_result.status == 'rate_limited':
+                logger.debug("%s (%s): skipped, rate budget exhausted", source_name, source_result.term)
+            else:
+                logger.debug("%s (%s): %s results", source_name, source_result.term, len(source_result.results))
         
         # Calculate statistics
+        with tracing.span('dedupe'):
+            all_results = dedupe(source_results)
         total_results = len(all_results)
-        source_stats = {
-            source: len(results) for source, results in results_by_source.items()
-        }
+        duplicates = sum(source_stats.values()) - total_results
         
-        return jsonify({
+        envelope = {
             'success': True,
-            'results': all_results,
-            'results_by_source': results_by_source,
+            'partial': bool(pending_sources(source_results)),
+            'pending_sources': pending_sources(source_results),
             'statistics': {
                 'total_results': total_results,
-                'sources_searched': len(results_by_source),
+                'sources_searched': len(source_stats),
                 'results_per_source': source_stats,
-                'search_terms': search_terms
+                'duplicates_merged': duplicates,
+                'search_terms': search_terms,
+                'timed_out': timed_out,
+                'degraded': degraded_sources(source_results),
+                'rate_limited': rate_limited_sources(source_results)
             }
-        })
+        }
+        with tracing.span('rank'):
+            body = first_page(all_results, search_terms, data, envelope, 'both')
+        return search_response(body, source_results, trace)
         
     except Exception as e:
-        print(f"❌ Bulk search error: {e}")
+        logger.exception("❌ Bulk search error: %s", e)
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/search/stream', methods=['POST'])
+def api_stream_search():
+    """Stream each source/term batch as NDJSON the moment it completes"""
+    data = request.get_json()
+    search_terms = data.get('searchTerms', [])
+    selected_sources = data.get('sources', [])
+    
+    if not search_terms:
+        return jsonify({'error': 'No search terms provided'}), 400
+    error = time_range_error(data) or budget_error(data) or page_error(data)
+    if error:
+        return error
+    
+    logger.info("🔍 Streaming search for terms: %s", search_terms)
+    prefetcher.record(search_terms)
+    
+    source_count = len([name for name in SOURCE_ORDER if not selected_sources or name in selected_sources])
+    expected_batches = len(search_terms) * source_count
+    profile = profile_mode()
+    
+    def generate():
+        # Traced inside the generator, which is where the search actually runs
+        trace = tracing.start(request.path, dump=profile == 'trace') if profile else None
+        try:
+            results_per_source = {}
+            completed = 0
+            total_results = 0
+            timed_out = []
+            degraded = set()
+            rate_limited = set()
+            # Items already streamed are folded into their first copy, not sent again
+            seen = DedupIndex()
+        
+            pending = set()
+            for source_result in iter_source_results(search_terms, selected_sources, search_budget(data)):
+                completed += 1
+                source_result, = filter_time_range([source_result], data)
+                new_results = []
+                with tracing.span('dedupe'):
+                    for item in source_result.results:
+                        merged, is_new = seen.add(item, source_result.term, source_result.source)
+                        if is_new:
+                            new_results.append(merged)
+                total_results += len(new_results)
+                results_per_source[source_result.source] = (
+                    results_per_source.get(source_result.source, 0) + len(source_result.results)
+                )
+                if source_result.status == 'timeout':
+                    timed_out.append(f"{source_result.source}:{source_result.term}")
+                    pending.add(source_result.source)
+                elif source_result.status == 'degraded':
+                    degraded.add(source_result.source)
+                elif source_result.status == 'rate_limited':
+                    rate_limited.add(source_result.source)
+            
+                with tracing.span('serialize'):
+                    line = dumps({
+                        'type': 'batch',
+                        'term': source_result.term,
+                        'source': source_result.source,
+                        'status': source_result.status,
+                        'cached': source_result.cached,
+                        'results': new_results,
+                        'statistics': {
+                            'total_results': total_results,
+                            'duplicates_merged': seen.merged,
+                            'completed': completed,
+                            'expected': expected_batches,
+                            'results_per_source': results_per_source
+                        }
+                    }) + '\n'
+                yield line
+        
+            logger.info("🎯 Streamed %s results in %s batches", total_results, completed)
+            # Everything has been streamed unranked; the done line carries the best of it in order
+            # (later pages are fetched from /api/search with next_cursor)
+            envelope = {
+                'success': True,
+                'partial': bool(pending),
+                'pending_sources': sorted(pending),
+                'statistics': {
+                    'total_results': total_results,
+                    'sources_searched': len(results_per_source),
+                    'results_per_source': results_per_source,
+                    'duplicates_merged': seen.merged,
+                    'search_terms': search_terms,
+                    'timed_out': timed_out,
+                    'degraded': sorted(degraded),
+                    'rate_limited': sorted(rate_limited)
+                }
+            }
+            with tracing.span('rank'):
+                done = dict(first_page(seen.items(), search_terms, data, envelope, 'flat'), type='done')
+            if trace:
+                done['profile'] = trace.summary()
+                trace_file = finish_profile(trace)
+                if trace_file:
+                    done['profile']['trace_file'] = os.path.basename(trace_file)
+            yield dumps(done) + '\n'
+        finally:
+            # A client that disconnects mid-stream never reaches the done line
+            if trace and not trace.finished:
+                tracing.finish(trace)
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='application/x-ndjson',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+# Page size limits for library searches
+LIBRARY_PAGE_SIZE = 20
+MAX_LIBRARY_PAGE_SIZE = 100
+
+def list_arg(name):
+    """A query argument given repeatedly and/or comma-separated, as a list"""
+    return [value.strip() for raw in request.args.getlist(name) for value in raw.split(',') if value.strip()]
+
+@app.route('/api/library/search', methods=['GET'])
+def api_library_search():
+    """Full-text search everything harvested so far, with type/source/year facets"""
+    try:
+        since, until = time_bounds(request.args)
+        limit = min(int(request.args.get('limit', LIBRARY_PAGE_SIZE)), MAX_LIBRARY_PAGE_SIZE)
+        offset = int(request.args.get('offset', 0))
+        # SQLite reads a negative LIMIT as "no limit"
+        if limit < 1 or offset < 0:
+            raise ValueError("limit must be at least 1 and offset at least 0")
+        fields = requested_fields(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        results, total, facets = library.search(
+            request.args.get('q', ''),
+            types=list_arg('type'),
+            sources=list_arg('source'),
+            since=since,
+            until=until,
+            limit=limit,
+            offset=offset
+        )
+    except Exception as e:
+        logger.exception("❌ Library search error: %s", e)
+        return jsonify({'error': str(e)}), 500
+    
+    return jsonify({
+        'success': True,
+        'results': project(results, fields),
+        'total': total,
+        'offset': offset,
+        'limit': limit,
+        'facets': facets
+    })
+
+@app.route('/api/metrics', methods=['GET'])
+def api_metrics():
+    """Request, source, cache and upstream metrics in Prometheus text format"""
+    return Response(metrics.registry.render(), mimetype=metrics.CONTENT_TYPE)
+
+@app.route('/api/admin/cache', methods=['GET'])
+def api_cache_stats():
+    """Report result cache hit/miss counters and sizes"""
+    if not admin_authorized():
+        return jsonify({'error': 'Unauthorized'}), 401
+    return jsonify({'success': True, 'cache': search_cache.stats(), 'library': library.stats()})
+
+@app.route('/api/admin/cache', methods=['DELETE'])
+def api_invalidate_cache():
+    """Invalidate cached results, optionally limited by ?source= and/or ?term="""
+    if not admin_authorized():
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    source = request.args.get('source')
+    term = request.args.get('term')
+    removed = search_cache.invalidate(source, term)
+    logger.info("🧹 Cache invalidated (source=%s, term=%s): %s entries", source, term, removed)
+    return jsonify({'success': True, 'removed': removed})
+
+@app.route('/api/admin/config/reload', methods=['POST'])
+def api_reload_config():
+    """Re-read .env and environment variables without restarting"""
+    if not admin_authorized():
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    config.reload()
+    return jsonify({'success': True, 'config': config.summary()})
+
+@app.route('/api/admin/prefetch', methods=['GET'])
+def api_prefetch_status():
+    """Report the prefetch scheduler's state, hot terms and counters"""
+    if not admin_authorized():
+        return jsonify({'error': 'Unauthorized'}), 401
+    return jsonify({'success': True, 'prefetch': prefetcher.status()})
+
+@app.route('/api/admin/prefetch', methods=['POST'])
+def api_prefetch_control():
+    """Adjust the prefetch scheduler
+
+    Accepts enabled, concurrency, top_terms, pin/unpin (lists of terms) and
+    run_now (start a pass immediately).
+    """
+    if not admin_authorized():
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    data = request.get_json() or {}
+    try:
+        if 'enabled' in data:
+            prefetcher.enabled = bool(data['enabled'])
+        if 'concurrency' in data:
+            prefetcher.concurrency = None if data['concurrency'] is None else max(0, int(data['concurrency']))
+        if 'top_terms' in data:
+            prefetcher.top_terms = max(0, int(data['top_terms']))
+        unpin = data.get('unpin', [])
+        if not isinstance(unpin, list):
+            raise ValueError("unpin must be a list of search terms")
+        prefetcher.pinned = [term for term in prefetcher.pinned if term not in unpin]
+        if 'pin' in data:
+            prefetcher.pin(data['pin'])
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    if data.get('run_now'):
+        prefetcher.wake()
+    
+    return jsonify({'success': True, 'prefetch': prefetcher.status()})
+
 if __name__ == '__main__':
+    configure_logging()
     print("🎵 Starting Sound Mind Enhanced API Server...")
     print("=" * 60)
     
@@ -318,8 +957,14 @@ if __name__ == '__main__':
     print("🔗 Enhanced API endpoints:")
     print("   /api/search - Search all sources")
     print("   /api/search/bulk - Detailed multi-source search")
+    print("   /api/search/stream - Streaming (NDJSON) multi-source search")
     print("   /api/sources - Get source information")
     print("   /api/search/[source]/[term] - Search individual sources")
+    print("   /api/library/search - Full-text search of everything harvested")
+    print("   /api/metrics - Prometheus metrics")
+    print("   /api/admin/cache - Cache stats (GET) / invalidate (DELETE)")
+    print("   /api/admin/config/reload - Reload .env configuration")
+    print("   /api/admin/prefetch - Prefetch scheduler status (GET) / control (POST)")
     print("=" * 60)
     
     # Run the server
@@ -0,0 +1,354 @@
+"""End-to-end benchmarks for the search API against simulated upstreams
+
+Starts the stand-in upstream server (standin_server.py) and the Flask app
+in this process, points the app at the stand-in, and drives /api/search and
+/api/search/bulk with concurrent HTTP clients. Each scenario reports p50,
+p95 and p99 latency, requests per second, upstream calls per request and
+peak RSS. Results are written as JSON so runs can be compared across commits:
+
+    python benchmark.py [--quick] [--output FILE] [--compare BASELINE] [--only NAME ...]
+
+With --compare, scenarios whose p95 latency or throughput got worse than
+REGRESSION_THRESHOLD versus the baseline are listed and the exit status is 1.
+"""
+import argparse
+import contextlib
+import http.client
+import itertools
+import json
+import logging
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+# Vocabulary search terms are built from
+TERM_WORDS = [
+    'sound', 'healing', 'binaural', 'beats', 'meditation', 'music', 'sleep', 'focus',
+    'tibetan', 'bowls', 'frequency', 'therapy', 'ambient', 'drone', 'breathing', 'relaxation'
+]
+
+# Sources used by the "selected sources" scenarios (the batched ones plus a feed)
+SELECTED_SOURCES = ['pubmed', 'arxiv', 'github', 'medium']
+
+# A scenario counts as regressed when p95 or throughput is this much worse than the baseline
+REGRESSION_THRESHOLD = 0.10
+
+# Seconds between RSS samples while a scenario runs
+RSS_SAMPLE_INTERVAL = 0.05
+
+def _scenario(name, endpoint='search', terms=5, sources=None, cache='warm', clients=1, requests=20):
+    return {'name': name, 'endpoint': endpoint, 'terms': terms, 'sources': sources,
+            'cache': cache, 'clients': clients, 'requests': requests}
+
+def build_scenarios(quick=False):
+    """The scenario matrix: each group varies one dimension around 5 terms, all sources, warm cache"""
+    term_counts = [1, 5, 20] if quick else [1, 5, 20, 50]
+    client_counts = [1, 10, 50] if quick else [1, 10, 50, 200]
+
+    scenarios = []
+    for cache in ('cold', 'warm'):
+        for terms in term_counts:
+            requests = 3 if cache == 'cold' else 20
+            scenarios.append(_scenario(f"terms-{terms}-{cache}", terms=terms, cache=cache, requests=requests))
+    for cache in ('cold', 'warm'):
+        scenarios.append(_scenario(f"bulk-all-{cache}", endpoint='bulk', cache=cache,
+                                   requests=3 if cache == 'cold' else 20))
+        scenarios.append(_scenario(f"bulk-selected-{cache}", endpoint='bulk', sources=SELECTED_SOURCES,
+                                   cache=cache, requests=3 if cache == 'cold' else 20))
+    for cache in ('cold', 'warm'):
+        for clients in client_counts:
+            requests = max(clients, 10) if cache == 'cold' else max(2 * clients, 40)
+            scenarios.append(_scenario(f"clients-{clients}-{cache}", clients=clients, cache=cache,
+                                       requests=requests))
+    return scenarios
+
+def make_terms(count, salt=None):
+    """count distinct two-word terms; a salt makes them unique to one request (always a cache miss)"""
+    pairs = itertools.islice(itertools.permutations(TERM_WORDS, 2), count)
+    terms = [f"{first} {second}" for first, second in pairs]
+    if salt is not None:
+        terms = [f"{term} x{salt}" for term in terms]
+    return terms
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
+
+def current_rss():
+    """Resident set size in bytes (Linux /proc; elsewhere the peak so far)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+class RSSSampler:
+    """Tracks the highest RSS seen while it runs"""
+
+    def __init__(self, interval=RSS_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.peak = current_rss()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, current_rss())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss())
+
+class Bench:
+    """The app and stand-in upstreams running in this process"""
+
+    def __init__(self, workdir, cassette_dir=None, latency_scale=1.0, upstream_limits=False):
+        import standin_server
+
+        profiles = {}
+        for host, profile in standin_server.HOST_PROFILES.items():
+            scaled = dict(profile)
+            scaled['latency_ms'] = profile.get('latency_ms', 0) * latency_scale
+            scaled['jitter_ms'] = profile.get('jitter_ms', 0) * latency_scale
+            if not upstream_limits:
+                scaled['rate_limit'] = None
+            profiles[host] = scaled
+        self.standin = standin_server.make_server(
+            0, cassette_dir or os.path.join(workdir, 'cassettes'), profiles, seed=0
+        )
+        self.standin_state = self.standin.RequestHandlerClass.standin
+        threading.Thread(target=self.standin.serve_forever, daemon=True).start()
+
+        # Configuration must be in place before the app modules read it
+        os.environ['UPSTREAM_OVERRIDE'] = f"http://127.0.0.1:{self.standin.server_port}"
+        os.environ['HTTP_CASSETTE_MODE'] = 'off'
+        for key in ('NEWS_API_KEY', 'REDDIT_CLIENT_ID', 'REDDIT_CLIENT_SECRET'):
+            os.environ.setdefault(key, 'benchmark')
+
+        import resilience
+        from config import config
+        config.reload()
+        if not upstream_limits:
+            # The stand-in is the only upstream; local quotas would only measure themselves
+            resilience.HOST_RATE_LIMITS.clear()
+
+        import app as app_module
+        import sound_mind_agent
+        from content_library import library
+        from prefetch import prefetcher
+        from result_cache import search_cache
+
+        # Background refreshes would add upstream calls no request asked for
+        prefetcher.enabled = False
+
+        # Keep benchmark data out of the real cache and library
+        search_cache.path = os.path.join(workdir, 'search_cache.db')
+        sound_mind_agent.pubmed_summaries.path = search_cache.path
+        library.path = os.path.join(workdir, 'content_library.db')
+
+        self.agent = sound_mind_agent
+        self.search_cache = search_cache
+
+        from werkzeug.serving import make_server
+        self.server = make_server('127.0.0.1', 0, app_module.app, threaded=True)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.port = self.server.server_port
+
+    def reset_caches(self):
+        self.search_cache.invalidate()
+        self.agent.pubmed_summaries.invalidate()
+        self.agent.youtube_feeds.clear()
+
+    def upstream_calls(self):
+        return sum(counts['requests'] for counts in self.standin_state.stats.values())
+
+    def close(self):
+        self.server.shutdown()
+        self.standin.shutdown()
+
+def _request_body(scenario, terms):
+    body = {'searchTerms': terms, 'limit': 20}
+    if scenario['sources']:
+        body['sources'] = scenario['sources']
+    return json.dumps(body)
+
+def _post(conn, path, body):
+    conn.request('POST', path, body=body, headers={
+        'Content-Type': 'application/json', 'Accept-Encoding': 'gzip'
+    })
+    response = conn.getresponse()
+    data = response.read()
+    return response.status, len(data)
+
+def run_scenario(bench, scenario, run_id):
+    """Run one scenario and return its metrics"""
+    path = '/api/search' if scenario['endpoint'] == 'search' else '/api/search/bulk'
+    bench.reset_caches()
+
+    warm_terms = make_terms(scenario['terms'])
+    if scenario['cache'] == 'warm':
+        conn = http.client.HTTPConnection('127.0.0.1', bench.port, timeout=120)
+        _post(conn, path, _request_body(scenario, warm_terms))
+        conn.close()
+
+    latencies, sizes, errors = [], [], []
+    lock = threading.Lock()
+    counter = itertools.count()
+
+    def client():
+        conn = http.client.HTTPConnection('127.0.0.1', bench.port, timeout=120)
+        while True:
+            index = next(counter)
+            if index >= scenario['requests']:
+                break
+            terms = warm_terms if scenario['cache'] == 'warm' else make_terms(scenario['terms'], f"{run_id}-{index}")
+            body = _request_body(scenario, terms)
+            start = time.perf_counter()
+            try:
+                status, size = _post(conn, path, body)
+            except (OSError, http.client.HTTPException) as e:
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', bench.port, timeout=120)
+                status, size = repr(e), 0
+            elapsed = time.perf_counter() - start
+            with lock:
+                if status == 200:
+                    latencies.append(elapsed)
+                    sizes.append(size)
+                else:
+                    errors.append(status)
+        conn.close()
+
+    calls_before = bench.upstream_calls()
+    threads = [threading.Thread(target=client) for _ in range(scenario['clients'])]
+    with RSSSampler() as rss:
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - start
+
+    completed = len(latencies) + len(errors)
+    to_ms = lambda seconds: round(seconds * 1000, 2) if seconds is not None else None
+    return dict(scenario, **{
+        'completed': len(latencies),
+        'errors': len(errors),
+        'error_samples': [str(error) for error in errors[:5]],
+        'wall_seconds': round(wall, 3),
+        'requests_per_second': round(len(latencies) / wall, 2) if wall else None,
+        'latency_ms': {
+            'p50': to_ms(percentile(latencies, 0.50)),
+            'p95': to_ms(percentile(latencies, 0.95)),
+            'p99': to_ms(percentile(latencies, 0.99)),
+            'max': to_ms(max(latencies) if latencies else None)
+        },
+        'upstream_calls_per_request': round((bench.upstream_calls() - calls_before) / completed, 2) if completed else None,
+        'response_bytes_avg': round(sum(sizes) / len(sizes)) if sizes else None,
+        'peak_rss_mb': round(rss.peak / 2 ** 20, 1)
+    })
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+def compare(results, baseline, threshold=REGRESSION_THRESHOLD):
+    """Print per-scenario changes against a baseline run; return the names that regressed"""
+    previous = {scenario['name']: scenario for scenario in baseline['scenarios']}
+    regressed = []
+    print(f"\n📊 Compared with {baseline.get('commit') or 'baseline'}:")
+    for scenario in results['scenarios']:
+        old = previous.get(scenario['name'])
+        if not old or not old['latency_ms']['p95'] or not scenario['latency_ms']['p95']:
+            continue
+        p95_change = scenario['latency_ms']['p95'] / old['latency_ms']['p95'] - 1
+        rps_change = (scenario['requests_per_second'] or 0) / (old['requests_per_second'] or 1) - 1
+        worse = p95_change > threshold or rps_change < -threshold
+        if worse:
+            regressed.append(scenario['name'])
+        print(f"   {'❌' if worse else '✅'} {scenario['name']}: p95 {p95_change:+.0%}, req/s {rps_change:+.0%}")
+    return regressed
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the search API against simulated upstreams')
+    parser.add_argument('--output', default='benchmark_results.json', help='Where to write the JSON results')
+    parser.add_argument('--compare', help='Earlier results file to compare against')
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                        help='Relative change in p95 or req/s that counts as a regression')
+    parser.add_argument('--quick', action='store_true', help='Smaller matrix (up to 20 terms, 50 clients)')
+    parser.add_argument('--only', nargs='+', help='Run only scenarios whose name starts with one of these')
+    parser.add_argument('--cassettes', help='Recorded responses for the stand-in to serve')
+    parser.add_argument('--latency-scale', type=float, default=1.0, help='Multiply stand-in latencies')
+    parser.add_argument('--upstream-limits', action='store_true',
+                        help='Keep the real per-host rate limits (locally and in the stand-in)')
+    parser.add_argument('--verbose', action='store_true', help='Show the app\'s own logging')
+    args = parser.parse_args(argv)
+
+    scenarios = build_scenarios(args.quick)
+    if args.only:
+        scenarios = [s for s in scenarios if s['name'].startswith(tuple(args.only))]
+
+    workdir = tempfile.mkdtemp(prefix='sm-benchmark-')
+    quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(open(os.devnull, 'w'))
+    if args.verbose:
+        from logging_config import configure_logging
+        configure_logging()
+    else:
+        # Timeouts and upstream errors would otherwise interleave with the results
+        logging.disable(logging.WARNING)
+    with quiet:
+        bench = Bench(workdir, args.cassettes, args.latency_scale, args.upstream_limits)
+
+    results = {
+        'commit': git_commit(),
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'settings': {'latency_scale': args.latency_scale, 'upstream_limits': args.upstream_limits,
+                     'cassettes': args.cassettes, 'quick': args.quick},
+        'scenarios': []
+    }
+
+    print(f"🏁 Running {len(scenarios)} scenarios (app on :{bench.port})")
+    run_id = int(time.time())
+    for scenario in scenarios:
+        with quiet:
+            result = run_scenario(bench, scenario, run_id)
+        results['scenarios'].append(result)
+        latency = result['latency_ms']
+        print(f"   {scenario['name']}: p50 {latency['p50']}ms p95 {latency['p95']}ms p99 {latency['p99']}ms, "
+              f"{result['requests_per_second']} req/s, {result['upstream_calls_per_request']} upstream/req, "
+              f"{result['peak_rss_mb']} MB" + (f", {result['errors']} errors" if result['errors'] else ''))
+    bench.close()
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"💾 Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressed = compare(results, json.load(f), args.threshold)
+        if regressed:
+            print(f"⚠️ Regressed: {', '.join(regressed)}")
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
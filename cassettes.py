@@ -0,0 +1,201 @@
+import base64
+import hashlib
+import http.client
+import json
+import os
+import re
+import threading
+import urllib.parse
+
+CASSETTE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cassettes')
+
+# Query parameters that carry credentials: never written to a cassette or used in its keys
+SECRET_PARAMS = ('apiKey', 'api_key', 'access_token', 'key', 'token')
+
+# Response headers worth replaying (the rest are connection details)
+KEPT_HEADERS = ('Content-Type', 'ETag', 'Last-Modified', 'Location', 'Retry-After')
+
+# Fields of recorded bodies that hold credentials (token endpoints and the like)
+SECRET_FIELDS = {
+    'apikey', 'api_key', 'access_token', 'refresh_token', 'id_token', 'token',
+    'client_secret', 'password', 'authorization'
+}
+REDACTED = 'REDACTED'
+
+_SECRET_PAIR = re.compile(
+    r'(?i)\b(' + '|'.join(sorted(map(re.escape, SECRET_FIELDS))) + r')=[^&\s"]+'
+)
+
+class CassetteMiss(Exception):
+    """Raised in replay mode when no recorded response matches a request"""
+
+def request_key(method, host, target, body=None):
+    """Stable key for a request: method, host, path and sorted query (secrets removed)
+
+    Requests with a body (form POSTs) also key on a hash of the body, so
+    e.g. two esummary calls for different ids don't collide.
+    """
+    path, _, query = target.partition('?')
+    params = sorted(
+        (name, value) for name, value in urllib.parse.parse_qsl(query, keep_blank_values=True)
+        if name not in SECRET_PARAMS
+    )
+    key = f"{method} {host}{path or '/'}"
+    if params:
+        key += '?' + urllib.parse.urlencode(params)
+    if body:
+        key += ' #' + hashlib.sha1(body).hexdigest()[:12]
+    return key
+
+def url_key(method, url, body=None):
+    """request_key() for a full URL"""
+    parts = urllib.parse.urlsplit(url)
+    target = parts.path + ('?' + parts.query if parts.query else '')
+    return parts.hostname, request_key(method, parts.hostname, target, body)
+
+def _redact_value(value):
+    if isinstance(value, dict):
+        return {
+            name: REDACTED if name.lower() in SECRET_FIELDS else _redact_value(item)
+            for name, item in value.items()
+        }
+    if isinstance(value, list):
+        return [_redact_value(item) for item in value]
+    return value
+
+def redact_text(text):
+    """Mask name=value credentials (query strings, form bodies) in text"""
+    return _SECRET_PAIR.sub(lambda match: f"{match.group(1)}={REDACTED}", text)
+
+def redact_body(data):
+    """A response body with credentials masked before it is written to disk
+
+    JSON bodies have every SECRET_FIELDS member replaced (e.g. the
+    access_token an OAuth token endpoint returns); other text bodies have
+    name=value credentials masked. Binary bodies are left alone.
+    """
+    try:
+        text = data.decode()
+    except UnicodeDecodeError:
+        return data
+    try:
+        parsed = json.loads(text)
+    except ValueError:
+        return redact_text(text).encode()
+    if not isinstance(parsed, (dict, list)):
+        return data
+    return json.dumps(_redact_value(parsed)).encode()
+
+def make_headers(pairs):
+    """An HTTPMessage (what http.client responses carry) from (name, value) pairs"""
+    headers = http.client.HTTPMessage()
+    for name, value in pairs:
+        headers[name] = value
+    return headers
+
+class Cassette:
+    """Recorded upstream responses, one JSON file per host
+
+    Each file maps request keys to the status, a few headers and the body
+    (text, or base64 for binary bodies) of the response. Files are loaded
+    lazily and rewritten whole whenever a new response is recorded.
+    Credentials are masked before anything is written (see redact_body()),
+    but recordings are still real upstream data: cassettes/ is gitignored,
+    so check a recording over before committing it as a fixture.
+    """
+
+    def __init__(self, directory=CASSETTE_DIR):
+        self.directory = directory
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def _path(self, host):
+        return os.path.join(self.directory, f"{host}.json")
+
+    def _entries(self, host):
+        entries = self._hosts.get(host)
+        if entries is None:
+            try:
+                with open(self._path(host)) as f:
+                    entries = json.load(f)
+            except FileNotFoundError:
+                entries = {}
+            self._hosts[host] = entries
+        return entries
+
+    def lookup(self, host, key):
+        """Return (status, headers, body) recorded for a request key, or None"""
+        with self._lock:
+            entry = self._entries(host).get(key)
+        if entry is None:
+            return None
+        if entry.get('encoding') == 'base64':
+            body = base64.b64decode(entry['body'])
+        else:
+            body = entry['body'].encode()
+        return entry['status'], make_headers(entry['headers']), body
+
+    def get(self, method, url, body=None):
+        """Return (status, headers, body) recorded for a request, or None"""
+        host, key = url_key(method, url, body)
+        return self.lookup(host, key)
+
+    def record(self, method, url, body, status, headers, data):
+        """Store a response for a request, replacing any earlier recording"""
+        host, key = url_key(method, url, body)
+        entry = {
+            'status': status,
+            'headers': [
+                (name, redact_text(headers[name])) for name in KEPT_HEADERS if headers.get(name)
+            ]
+        }
+        data = redact_body(data)
+        try:
+            entry['body'] = data.decode()
+        except UnicodeDecodeError:
+            entry['body'] = base64.b64encode(data).decode()
+            entry['encoding'] = 'base64'
+
+        with self._lock:
+            entries = self._entries(host)
+            entries[key] = entry
+            os.makedirs(self.directory, exist_ok=True)
+            temp_path = self._path(host) + '.tmp'
+            with open(temp_path, 'w') as f:
+                json.dump(entries, f, indent=1, sort_keys=True)
+            os.replace(temp_path, self._path(host))
+
+    def hosts(self):
+        """Hosts with a cassette file on disk"""
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(name[:-5] for name in os.listdir(self.directory) if name.endswith('.json'))
+
+class RecordedResponse:
+    """A fully read response with the StreamResponse interface
+
+    Used for replayed responses and for live responses captured while
+    recording, so callers can't tell them from a streamed one.
+    """
+
+    def __init__(self, status, headers, body, url):
+        self.status = status
+        self.headers = headers
+        self.url = url
+        self.body = body
+
+    def iter_chunks(self, chunk_size=16 * 1024):
+        for start in range(0, len(self.body), chunk_size):
+            yield self.body[start:start + chunk_size]
+
+    def read(self):
+        return self.body
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,105 @@
+import logging
+import os
+import threading
+import time
+
+# .env lives next to the code, whatever directory the server is started from
+ENV_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env')
+
+# Keys the sources need; missing ones are reported at load time
+REQUIRED_KEYS = ['NEWS_API_KEY', 'REDDIT_CLIENT_ID', 'REDDIT_CLIENT_SECRET']
+OPTIONAL_KEYS = [
+    'GITHUB_TOKEN', 'ADMIN_TOKEN', 'PREFETCH_CONCURRENCY',
+    'UPSTREAM_OVERRIDE', 'UPSTREAM_OVERRIDE_HOSTS', 'HTTP_CASSETTE_MODE', 'HTTP_CASSETTE_DIR',
+    'LOG_LEVEL', 'LOG_FORMAT', 'TRACE_DIR', 'TRACE_DUMPS'
+]
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks of the .env file's mtime
+CHECK_INTERVAL = 5
+
+def parse_env_file(path):
+    """Parse KEY=value lines from a .env file"""
+    env_vars = {}
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if '=' in line and not line.startswith('#'):
+                key, value = line.split('=', 1)
+                env_vars[key.strip()] = value.strip()
+    return env_vars
+
+class Config:
+    """Settings from .env overlaid with environment variables, held in memory
+
+    The file is parsed once and re-read only when its mtime changes (checked
+    at most every CHECK_INTERVAL seconds) or reload() is called.
+    """
+
+    def __init__(self, path=ENV_PATH, check_interval=CHECK_INTERVAL):
+        self.path = path
+        self.check_interval = check_interval
+        self.missing = []
+        self.loaded_at = None
+        self._values = {}
+        self._mtime = None
+        self._last_check = 0
+        self._lock = threading.Lock()
+        self.reload()
+
+    def _file_mtime(self):
+        try:
+            return os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            return None
+
+    def reload(self):
+        """Re-read the .env file and environment now"""
+        with self._lock:
+            mtime = self._file_mtime()
+            values = {}
+            if mtime is not None:
+                values = parse_env_file(self.path)
+            else:
+                logger.warning("❌ .env file not found at %s", self.path)
+
+            # Real environment variables win over the file
+            for key in set(values) | set(REQUIRED_KEYS) | set(OPTIONAL_KEYS):
+                if os.environ.get(key):
+                    values[key] = os.environ[key]
+
+            self._values = values
+            self._mtime = mtime
+            self._last_check = time.monotonic()
+            self.loaded_at = time.time()
+            self.missing = [key for key in REQUIRED_KEYS if not values.get(key)]
+
+        if self.missing:
+            logger.warning("⚠️ Missing configuration keys: %s", ', '.join(self.missing))
+
+    def _reload_if_changed(self):
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+        if self._file_mtime() != self._mtime:
+            logger.info("🔄 .env changed, reloading configuration")
+            self.reload()
+
+    def get(self, key, default=None):
+        """Get a configuration value"""
+        self._reload_if_changed()
+        return self._values.get(key, default)
+
+    def summary(self):
+        """Which keys are set (never their values), for the admin endpoint"""
+        return {
+            'path': self.path,
+            'loaded_at': self.loaded_at,
+            'keys': sorted(self._values),
+            'missing': self.missing
+        }
+
+# Shared configuration, loaded once at import
+config = Config()
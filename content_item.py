@@ -0,0 +1,58 @@
+from dates import normalize_date
+
+class ContentItem:
+    """One search result, whichever source it came from
+
+    Slots keep each item small. Optional fields (score, stars, ...) are None
+    when a source doesn't supply them and are left out of the JSON. The date
+    is normalized once, on ingestion, into timestamp (UTC epoch seconds) and
+    date_precision ('second', 'day', 'month' or 'year'); both are None if
+    the source's date is unreadable.
+    """
+
+    __slots__ = (
+        'title', 'source', 'url', 'date', 'type', 'snippet',
+        'score', 'stars', 'timestamp', 'date_precision', 'terms', 'sources', 'rank_score'
+    )
+    FIELDS = __slots__
+
+    def __init__(self, title, source, url, date, type, snippet, score=None, stars=None,
+                 timestamp=None, date_precision=None, terms=None, sources=None, rank_score=None):
+        self.title = title
+        self.source = source
+        self.url = url
+        self.date = date
+        self.type = type
+        self.snippet = snippet
+        self.score = score
+        self.stars = stars
+        if timestamp is None:
+            timestamp, date_precision = normalize_date(date)
+        self.timestamp = timestamp
+        self.date_precision = date_precision
+        self.terms = terms
+        self.sources = sources
+        self.rank_score = rank_score
+
+    def to_dict(self, fields=None):
+        """Plain dict of the set fields (or just the requested ones)"""
+        result = {}
+        for name in fields or self.FIELDS:
+            value = getattr(self, name, None)
+            if value is not None:
+                result[name] = value
+        return result
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{name: data.get(name) for name in cls.FIELDS})
+
+    def copy(self):
+        item = ContentItem.__new__(ContentItem)
+        for name in self.FIELDS:
+            value = getattr(self, name)
+            setattr(item, name, list(value) if isinstance(value, list) else value)
+        return item
+
+    def __repr__(self):
+        return f"ContentItem({self.type!r}, {self.title!r})"
@@ -0,0 +1,227 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from content_item import ContentItem
+from dedup import canonical_url
+from query_batch import term_words
+from result_cache import normalize_term
+
+LIBRARY_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'content_library.db')
+
+# Generated "search this site" links aren't content worth keeping
+SEARCH_PAGE_PREFIXES = ('youtube.com/results?', 'scholar.google.com/scholar?')
+
+# Columns stored for every item, in ContentItem field order
+ITEM_COLUMNS = (
+    'title', 'source', 'url', 'date', 'type', 'snippet',
+    'score', 'stars', 'timestamp', 'date_precision'
+)
+
+def fts_query(text):
+    """Turn free text into an FTS5 query matching every word (quoted, so no syntax leaks)"""
+    return ' '.join(f'"{word}"' for word in term_words(text))
+
+class ContentLibrary:
+    """Every item ever harvested, deduplicated by canonical URL and full-text searchable
+
+    Items live in a SQLite table with an FTS5 index over title and snippet,
+    kept in step by triggers. Re-harvesting an item refreshes its fields and
+    adds the new term and source to the ones it was already found by.
+    """
+
+    def __init__(self, path=LIBRARY_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = None
+
+    def _connect(self):
+        if self._db is None:
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.executescript("""
+                CREATE TABLE IF NOT EXISTS items (
+                    id INTEGER PRIMARY KEY,
+                    url_key TEXT NOT NULL UNIQUE,
+                    title TEXT, source TEXT, url TEXT, date TEXT, type TEXT, snippet TEXT,
+                    score INTEGER, stars INTEGER, timestamp REAL, date_precision TEXT,
+                    source_name TEXT NOT NULL,
+                    terms TEXT NOT NULL,
+                    sources TEXT NOT NULL,
+                    first_seen REAL NOT NULL,
+                    last_seen REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS items_timestamp ON items (timestamp);
+                CREATE TABLE IF NOT EXISTS watermarks (
+                    source_name TEXT NOT NULL,
+                    term TEXT NOT NULL,
+                    newest_item_at REAL NOT NULL,
+                    PRIMARY KEY (source_name, term)
+                );
+                CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(
+                    title, snippet, content='items', content_rowid='id'
+                );
+                CREATE TRIGGER IF NOT EXISTS items_ai AFTER INSERT ON items BEGIN
+                    INSERT INTO items_fts (rowid, title, snippet) VALUES (new.id, new.title, new.snippet);
+                END;
+                CREATE TRIGGER IF NOT EXISTS items_ad AFTER DELETE ON items BEGIN
+                    INSERT INTO items_fts (items_fts, rowid, title, snippet)
+                    VALUES ('delete', old.id, old.title, old.snippet);
+                END;
+                CREATE TRIGGER IF NOT EXISTS items_au AFTER UPDATE ON items BEGIN
+                    INSERT INTO items_fts (items_fts, rowid, title, snippet)
+                    VALUES ('delete', old.id, old.title, old.snippet);
+                    INSERT INTO items_fts (rowid, title, snippet) VALUES (new.id, new.title, new.snippet);
+                END;
+            """)
+            # Libraries created before the rename still call the watermark harvested_at
+            columns = {row[1] for row in self._db.execute('PRAGMA table_info(watermarks)')}
+            if 'harvested_at' in columns:
+                self._db.execute('ALTER TABLE watermarks RENAME COLUMN harvested_at TO newest_item_at')
+            self._db.commit()
+        return self._db
+
+    def add(self, items, term, source_name):
+        """Store harvested items for (term, source), merging ones already in the library"""
+        now = time.time()
+        with self._lock:
+            db = self._connect()
+            for item in items:
+                url_key = canonical_url(item.url)
+                if not url_key or url_key.startswith(SEARCH_PAGE_PREFIXES):
+                    continue
+                values = [getattr(item, column) for column in ITEM_COLUMNS]
+                row = db.execute('SELECT terms, sources FROM items WHERE url_key = ?', (url_key,)).fetchone()
+                if row is None:
+                    db.execute(
+                        f"INSERT INTO items (url_key, {', '.join(ITEM_COLUMNS)}, source_name, terms, sources,"
+                        f" first_seen, last_seen) VALUES (?, {', '.join('?' * len(ITEM_COLUMNS))}, ?, ?, ?, ?, ?)",
+                        [url_key] + values + [source_name, json.dumps([term]), json.dumps([source_name]), now, now]
+                    )
+                    continue
+                terms, sources = json.loads(row[0]), json.loads(row[1])
+                if term not in terms:
+                    terms.append(term)
+                if source_name not in sources:
+                    sources.append(source_name)
+                db.execute(
+                    f"UPDATE items SET {', '.join(column + ' = ?' for column in ITEM_COLUMNS)},"
+                    " terms = ?, sources = ?, last_seen = ? WHERE url_key = ?",
+                    values + [json.dumps(terms), json.dumps(sources), now, url_key]
+                )
+            db.commit()
+
+    def unknown(self, items):
+        """The items whose canonical URL isn't in the library yet (search links excluded)"""
+        keys = {}
+        for item in items:
+            url_key = canonical_url(item.url)
+            if url_key and not url_key.startswith(SEARCH_PAGE_PREFIXES):
+                keys.setdefault(url_key, item)
+        if not keys:
+            return []
+        with self._lock:
+            known = {row[0] for row in self._connect().execute(
+                f"SELECT url_key FROM items WHERE url_key IN ({', '.join('?' * len(keys))})", list(keys)
+            )}
+        return [item for url_key, item in keys.items() if url_key not in known]
+
+    def get_watermark(self, source_name, term):
+        """Newest item date (epoch seconds) harvested for (source, term), or None"""
+        with self._lock:
+            row = self._connect().execute(
+                'SELECT newest_item_at FROM watermarks WHERE source_name = ? AND term = ?',
+                (source_name, normalize_term(term))
+            ).fetchone()
+        return row[0] if row else None
+
+    def set_watermark(self, source_name, term, newest_item_at):
+        with self._lock:
+            db = self._connect()
+            db.execute(
+                'INSERT OR REPLACE INTO watermarks (source_name, term, newest_item_at) VALUES (?, ?, ?)',
+                (source_name, normalize_term(term), newest_item_at)
+            )
+            db.commit()
+
+    def search(self, query='', types=None, sources=None, since=None, until=None, limit=20, offset=0):
+        """Full-text search the library, returning (items, total, facets)
+
+        Without a query, items come back newest first; with one, best BM25
+        match first. types/sources narrow by item type and harvesting source,
+        and since/until by epoch timestamp. An item matches a source if any
+        source harvested it. Facets count the matches by type, source and
+        year before type/source narrowing, so they can drive filter controls;
+        an item found by several sources counts under each.
+        """
+        limit, offset = max(1, limit), max(0, offset)
+        tables, base, params = 'items', ['1'], []
+        if query:
+            match = fts_query(query)
+            if not match:
+                return [], 0, {'type': {}, 'source': {}, 'year': {}}
+            tables = 'items JOIN items_fts ON items_fts.rowid = items.id'
+            base.append('items_fts MATCH ?')
+            params.append(match)
+        if since is not None:
+            base.append('items.timestamp >= ?')
+            params.append(since)
+        if until is not None:
+            base.append('items.timestamp <= ?')
+            params.append(until)
+
+        narrow, narrow_params = list(base), list(params)
+        if types:
+            narrow.append(f"items.type IN ({', '.join('?' * len(types))})")
+            narrow_params += list(types)
+        if sources:
+            narrow.append("EXISTS (SELECT 1 FROM json_each(items.sources)"
+                          f" WHERE json_each.value IN ({', '.join('?' * len(sources))}))")
+            narrow_params += list(sources)
+
+        where = ' AND '.join(narrow)
+        base_where = ' AND '.join(base)
+        order = 'bm25(items_fts)' if query else 'items.timestamp IS NULL, items.timestamp DESC'
+        columns = ', '.join('items.' + column for column in ITEM_COLUMNS)
+
+        with self._lock:
+            db = self._connect()
+            rows = db.execute(
+                f"SELECT {columns}, items.terms, items.sources FROM {tables} WHERE {where}"
+                f" ORDER BY {order} LIMIT ? OFFSET ?",
+                narrow_params + [limit, offset]
+            ).fetchall()
+            total = db.execute(f'SELECT COUNT(*) FROM {tables} WHERE {where}', narrow_params).fetchone()[0]
+
+            def facet(expression, condition=base_where, joins=''):
+                return dict(db.execute(
+                    f'SELECT {expression}, COUNT(*) FROM {tables}{joins} WHERE {condition} GROUP BY 1', params
+                ).fetchall())
+
+            facets = {
+                'type': facet('items.type'),
+                'source': facet('item_source.value', joins=' JOIN json_each(items.sources) AS item_source'),
+                'year': facet("strftime('%Y', items.timestamp, 'unixepoch')",
+                              base_where + ' AND items.timestamp IS NOT NULL')
+            }
+
+        items = []
+        for row in rows:
+            item = ContentItem(**dict(zip(ITEM_COLUMNS, row[:len(ITEM_COLUMNS)])))
+            item.terms = json.loads(row[-2])
+            item.sources = json.loads(row[-1])
+            items.append(item)
+        return items, total, facets
+
+    def stats(self):
+        """Item count and the span of first-seen times"""
+        with self._lock:
+            count, oldest, newest = self._connect().execute(
+                'SELECT COUNT(*), MIN(first_seen), MAX(last_seen) FROM items'
+            ).fetchone()
+        return {'items': count, 'first_harvest': oldest, 'last_harvest': newest}
+
+# Shared library filled by every upstream fetch
+library = ContentLibrary()
@@ -0,0 +1,102 @@
+import math
+import re
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+
+_MONTHS = {name: i for i, name in enumerate(
+    ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'], 1
+)}
+_PUBMED_DATE = re.compile(r'^(\d{4})(?:\s+([A-Za-z]{3})[a-z]*(?:\s+(\d{1,2}))?)?')
+_ISO_MONTH = re.compile(r'^(\d{4})-(\d{2})$')
+_YEAR = re.compile(r'^\d{4}$')
+
+# Numeric since/until values below this are too early to be meant as epoch seconds (1973)
+MIN_EPOCH_BOUND = 100_000_000
+
+# How exactly a normalized timestamp is known, from most to least precise
+PRECISIONS = ('second', 'day', 'month', 'year')
+
+def parse_date(value):
+    """Best-effort parse of the date formats our sources return
+
+    Handles ISO 8601 (NewsAPI, Reddit, GitHub, iTunes, Atom feeds), RFC 822
+    (RSS) and PubMed's "2023 Mar 15" style, which may stop at month or year.
+    Returns (aware datetime, precision), or (None, None) if unreadable.
+    """
+    if not value or not isinstance(value, str):
+        return None, None
+    value = value.strip()
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        precision = 'day' if len(value) <= 10 else 'second'
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        try:
+            parsed = parsedate_to_datetime(value)
+            precision = 'second'
+        except (TypeError, ValueError, IndexError):
+            parsed = None
+    if parsed is None:
+        iso_month = _ISO_MONTH.match(value)
+        match = _PUBMED_DATE.match(value)
+        try:
+            if iso_month:
+                parsed, precision = datetime(int(iso_month.group(1)), int(iso_month.group(2)), 1), 'month'
+            elif not match:
+                return None, None
+            else:
+                month = _MONTHS.get((match.group(2) or '').lower())
+                if month is None:
+                    parsed, precision = datetime(int(match.group(1)), 1, 1), 'year'
+                elif match.group(3):
+                    parsed, precision = datetime(int(match.group(1)), month, int(match.group(3))), 'day'
+                else:
+                    parsed, precision = datetime(int(match.group(1)), month, 1), 'month'
+        except ValueError:
+            # Matched the shape but isn't a real date, e.g. "2023 Feb 30"
+            return None, None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed, precision
+
+def normalize_date(value):
+    """(UTC epoch seconds, precision) for a source date string, or (None, None)"""
+    parsed, precision = parse_date(value)
+    if parsed is None:
+        return None, None
+    return parsed.timestamp(), precision
+
+def _period_end(parsed, precision):
+    """The last moment of the day, month or year a date stands for"""
+    if precision == 'year':
+        following = parsed.replace(year=parsed.year + 1)
+    elif precision == 'month':
+        following = parsed.replace(year=parsed.year + parsed.month // 12, month=parsed.month % 12 + 1)
+    elif precision == 'day':
+        following = parsed + timedelta(days=1)
+    else:
+        return parsed
+    return following - timedelta(milliseconds=1)
+
+def parse_bound(value, end=False):
+    """Epoch seconds for a since/until query value (epoch seconds, a year or a date string)
+
+    Four-digit values are years, not epoch seconds. A date given to day,
+    month or year precision stands for its start, or with end=True (for
+    until) its last moment. Raises ValueError if it can't be read.
+    """
+    text = str(value).strip()
+    if not _YEAR.match(text):
+        try:
+            timestamp = float(text)
+        except ValueError:
+            pass
+        else:
+            if not math.isfinite(timestamp) or timestamp < MIN_EPOCH_BOUND:
+                raise ValueError(f"Unreadable date: {value} (use a year, an ISO date or epoch seconds)")
+            return timestamp
+    parsed, precision = parse_date(text)
+    if parsed is None:
+        raise ValueError(f"Unreadable date: {value}")
+    return (_period_end(parsed, precision) if end else parsed).timestamp()
@@ -0,0 +1,152 @@
+import hashlib
+import re
+import urllib.parse
+
+from query_batch import term_words
+
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'mc_cid', 'mc_eid', 'igshid',
+    'ref', 'ref_src', 'share', 'si', 'feature'
+}
+TRACKING_PREFIXES = ('utm_',)
+
+# Titles with fewer words than this are too generic for near-duplicate matching
+MIN_TITLE_WORDS = 4
+
+# SimHash titles within this many differing bits are treated as the same item.
+# With 64 bits split into MAX_DISTANCE + 1 bands, two such hashes always share
+# at least one band exactly, so only same-band candidates need comparing.
+SIMHASH_BITS = 64
+MAX_DISTANCE = 3
+BANDS = MAX_DISTANCE + 1
+BAND_BITS = SIMHASH_BITS // BANDS
+
+# Fields a later duplicate may fill in when the first copy left them empty
+MERGED_FIELDS = ('title', 'source', 'url', 'type', 'snippet', 'score', 'stars')
+
+_ARXIV_PATH = re.compile(r'^/(?:abs|pdf)/(.+?)(?:v\d+)?(?:\.pdf)?$')
+
+def canonical_url(url):
+    """Reduce a URL to a key that equivalent links share
+
+    Drops the scheme, fragment, tracking parameters, "www."/"m." host
+    prefixes and trailing slashes; folds youtu.be links and arXiv
+    versions/PDF links onto their canonical pages.
+    """
+    if not url:
+        return ''
+    parts = urllib.parse.urlsplit(url.strip())
+    host = parts.netloc.lower()
+    for prefix in ('www.', 'm.'):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+    path = parts.path.rstrip('/') or '/'
+    query = urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+
+    if host == 'youtu.be':
+        host, query = 'youtube.com', [('v', path.lstrip('/'))]
+        path = '/watch'
+    elif host == 'youtube.com' and path == '/watch':
+        query = [(key, value) for key, value in query if key == 'v']
+    elif host == 'arxiv.org':
+        match = _ARXIV_PATH.match(path)
+        if match:
+            path = '/abs/' + match.group(1)
+
+    query = sorted(
+        (key, value) for key, value in query
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    )
+    return host + path + ('?' + urllib.parse.urlencode(query) if query else '')
+
+def simhash(words):
+    """64-bit SimHash of a word list (words and adjacent word pairs as features)"""
+    features = words + [a + ' ' + b for a, b in zip(words, words[1:])]
+    weights = [0] * SIMHASH_BITS
+    for feature in features:
+        value = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), 'big')
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+
+def _bands(fingerprint):
+    mask = (1 << BAND_BITS) - 1
+    return [(band, fingerprint >> (band * BAND_BITS) & mask) for band in range(BANDS)]
+
+class DedupIndex:
+    """Merges results that are the same item found by several terms or sources
+
+    Items are matched by canonical URL, then by near-identical title through
+    a banded SimHash index, so each add() is a few dictionary lookups rather
+    than a comparison against every item seen so far.
+    """
+
+    def __init__(self):
+        self.merged = 0
+        self._items = []
+        self._by_url = {}
+        self._by_band = {}
+        self._fingerprints = []
+
+    def _find_similar(self, fingerprint):
+        for band in _bands(fingerprint):
+            for index in self._by_band.get(band, ()):
+                if bin(self._fingerprints[index] ^ fingerprint).count('1') <= MAX_DISTANCE:
+                    return index
+        return None
+
+    def add(self, item, term, source):
+        """Add one ContentItem, returning (merged item, whether it is new)"""
+        url_key = canonical_url(item.url)
+        words = term_words(item.title or '')
+        fingerprint = simhash(words) if len(words) >= MIN_TITLE_WORDS else None
+
+        index = self._by_url.get(url_key) if url_key else None
+        if index is None and fingerprint is not None:
+            index = self._find_similar(fingerprint)
+
+        if index is not None:
+            existing = self._items[index]
+            if term not in existing.terms:
+                existing.terms.append(term)
+            if source not in existing.sources:
+                existing.sources.append(source)
+            for field in MERGED_FIELDS:
+                value = getattr(item, field)
+                if value and not getattr(existing, field):
+                    setattr(existing, field, value)
+            if existing.timestamp is None and item.timestamp is not None:
+                existing.date = item.date
+                existing.timestamp = item.timestamp
+                existing.date_precision = item.date_precision
+            if url_key:
+                self._by_url.setdefault(url_key, index)
+            self.merged += 1
+            return existing, False
+
+        # Copy, since result lists are shared with the cache
+        merged = item.copy()
+        merged.terms = [term]
+        merged.sources = [source]
+        index = len(self._items)
+        self._items.append(merged)
+        self._fingerprints.append(fingerprint)
+        if url_key:
+            self._by_url[url_key] = index
+        if fingerprint is not None:
+            for band in _bands(fingerprint):
+                self._by_band.setdefault(band, []).append(index)
+        return merged, True
+
+    def items(self):
+        """Every distinct item, in the order it was first seen"""
+        return list(self._items)
+
+def dedupe(source_results):
+    """Merge the results of several SourceResults into distinct items"""
+    index = DedupIndex()
+    for source_result in source_results:
+        for item in source_result.results:
+            index.add(item, source_result.term, source_result.source)
+    return index.items()
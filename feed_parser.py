@@ -0,0 +1,71 @@
+import xml.etree.ElementTree as ET
+
+# Tags that wrap one item in Atom (arXiv, YouTube) and RSS (Medium) feeds
+ENTRY_TAGS = ('entry', 'item')
+
+def _local(tag):
+    """Strip the {namespace} prefix from an element tag"""
+    return tag.rsplit('}', 1)[-1]
+
+def _text(elem):
+    return (elem.text or '').strip()
+
+def _entry_from_element(elem):
+    """Turn one Atom <entry> or RSS <item> into a flat dict"""
+    entry = {'title': '', 'link': '', 'id': '', 'published': '', 'summary': ''}
+    for child in elem:
+        tag = _local(child.tag)
+        if tag == 'title':
+            entry['title'] = _text(child)
+        elif tag == 'link':
+            # Atom keeps the URL in href (rel="alternate" or no rel); RSS in the text
+            if child.get('href'):
+                if child.get('rel', 'alternate') == 'alternate' and not entry['link']:
+                    entry['link'] = child.get('href')
+            elif child.text:
+                entry['link'] = _text(child)
+        elif tag in ('id', 'guid'):
+            entry['id'] = _text(child)
+        elif tag in ('published', 'pubDate'):
+            entry['published'] = _text(child)
+        elif tag == 'updated' and not entry['published']:
+            entry['published'] = _text(child)
+        elif tag in ('summary', 'description'):
+            entry['summary'] = _text(child)
+    return entry
+
+def parse_feed(chunks, max_entries=None, match=None):
+    """Incrementally parse an Atom or RSS feed from an iterable of byte chunks
+
+    Entries are returned as dicts with title, link, id, published and summary,
+    each field taken from the same element so they can't drift apart. Parsing
+    (and reading from chunks) stops once max_entries entries accepted by the
+    optional match(entry) predicate have been collected. Finished elements are
+    dropped from the tree as soon as they are read, so memory stays flat.
+    """
+    parser = ET.XMLPullParser(events=('start', 'end'))
+    stack = []
+    entries = []
+
+    for chunk in chunks:
+        parser.feed(chunk)
+        for event, elem in parser.read_events():
+            if event == 'start':
+                stack.append(elem)
+                continue
+
+            stack.pop()
+            if _local(elem.tag) not in ENTRY_TAGS:
+                continue
+
+            entry = _entry_from_element(elem)
+            if stack:
+                stack[-1].remove(elem)
+
+            if match is None or match(entry):
+                entries.append(entry)
+                if max_entries is not None and len(entries) >= max_entries:
+                    return entries
+
+    parser.close()
+    return entries
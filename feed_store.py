@@ -0,0 +1,77 @@
+import threading
+import time
+
+import http_client
+import tracing
+
+# Seconds a fetched feed is served from memory before it is revalidated
+REFRESH_INTERVAL = 15 * 60
+
+class FeedStore:
+    """In-memory store of parsed, topic-independent feeds
+
+    Each feed URL is fetched at most once per refresh interval, however many
+    search terms read it. Revalidation sends If-None-Match/If-Modified-Since,
+    so an unchanged feed costs a 304 and no re-parse.
+    """
+
+    def __init__(self, parse, refresh_interval=REFRESH_INTERVAL):
+        # parse(chunks) turns an iterable of body byte chunks into entries
+        self.parse = parse
+        self.refresh_interval = refresh_interval
+        self.fetches = 0
+        self.not_modified = 0
+        self._feeds = {}
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+
+    def _lock_for(self, url):
+        with self._locks_lock:
+            lock = self._locks.get(url)
+            if lock is None:
+                lock = self._locks[url] = threading.Lock()
+            return lock
+
+    def get_entries(self, url, timeout=10):
+        """Return the parsed entries for a feed, refreshing them if they are stale"""
+        # One refresh per feed at a time; other terms wait and reuse its result
+        with self._lock_for(url):
+            feed = self._feeds.get(url)
+            if feed and time.monotonic() - feed['fetched_at'] < self.refresh_interval:
+                return feed['entries']
+
+            headers = {}
+            if feed and feed['etag']:
+                headers['If-None-Match'] = feed['etag']
+            if feed and feed['last_modified']:
+                headers['If-Modified-Since'] = feed['last_modified']
+
+            try:
+                with http_client.open_stream('GET', url, headers=headers, timeout=timeout) as response:
+                    self.fetches += 1
+                    if response.status == 304 and feed:
+                        response.read()
+                        self.not_modified += 1
+                        feed['fetched_at'] = time.monotonic()
+                        return feed['entries']
+
+                    # Entries are parsed straight off the socket as bytes arrive
+                    with tracing.span('parse feed', 'parse', url=url):
+                        entries = self.parse(response.iter_chunks())
+            except Exception:
+                if feed:
+                    # Serve the last good copy rather than nothing
+                    return feed['entries']
+                raise
+
+            self._feeds[url] = {
+                'entries': entries,
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'fetched_at': time.monotonic()
+            }
+            return entries
+
+    def clear(self):
+        """Forget every stored feed"""
+        self._feeds.clear()
@@ -0,0 +1,408 @@
+import atexit
+import http.client
+import json
+import ssl
+import threading
+import time
+import urllib.parse
+import zlib
+from collections import namedtuple
+
+import metrics
+import resilience
+import tracing
+from cassettes import Cassette, CassetteMiss, RecordedResponse
+from config import config
+
+# Create SSL context that doesn't verify certificates (for development)
+ssl_context = ssl.create_default_context()
+ssl_context.check_hostname = False
+ssl_context.verify_mode = ssl.CERT_NONE
+
+USER_AGENT = 'SoundMindAgent/1.0'
+
+# Idle keep-alive connections kept per host, and how long they stay usable
+MAX_IDLE_PER_HOST = 8
+IDLE_TIMEOUT = 60
+
+# Bytes read from the socket at a time when streaming a body
+CHUNK_SIZE = 16 * 1024
+
+# Unread bytes worth draining to keep a connection when a stream is abandoned
+DRAIN_LIMIT = 64 * 1024
+
+MAX_REDIRECTS = 5
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+
+# HTTP_CASSETTE_MODE values: off (live only), record (live, saving responses), replay (no network)
+CASSETTE_MODES = ('off', 'record', 'replay')
+
+Response = namedtuple('Response', ['status', 'headers', 'body', 'url'])
+
+class HTTPError(Exception):
+    """Raised for 4xx/5xx responses from an upstream"""
+
+    def __init__(self, status, url, body=b''):
+        super().__init__(f"HTTP {status} for {url}")
+        self.status = status
+        self.url = url
+        self.body = body
+
+class _PooledHTTPSConnection(http.client.HTTPSConnection):
+    """HTTPS connection that resumes its host's last TLS session on connect"""
+
+    def __init__(self, host, port, pool, **kwargs):
+        super().__init__(host, port, context=ssl_context, **kwargs)
+        self.pool = pool
+
+    def connect(self):
+        http.client.HTTPConnection.connect(self)
+        server_hostname = self._tunnel_host or self.host
+        self.sock = self._context.wrap_socket(
+            self.sock, server_hostname=server_hostname, session=self.pool.tls_session
+        )
+
+class HostPool:
+    """Idle keep-alive connections to one scheme://host:port"""
+
+    def __init__(self, scheme, host, port):
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self.tls_session = None
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout):
+        """Return (connection, reused) - an idle connection if one is still fresh"""
+        now = time.monotonic()
+        with self._lock:
+            while self._idle:
+                conn, idle_since = self._idle.pop()
+                if now - idle_since < IDLE_TIMEOUT:
+                    conn.timeout = timeout
+                    if conn.sock is not None:
+                        conn.sock.settimeout(timeout)
+                    return conn, True
+                conn.close()
+
+        if self.scheme == 'https':
+            conn = _PooledHTTPSConnection(self.host, self.port, self, timeout=timeout)
+        else:
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=timeout)
+        return conn, False
+
+    def release(self, conn):
+        """Keep a connection whose response was fully read for the next request"""
+        session = getattr(conn.sock, 'session', None)
+        with self._lock:
+            if session is not None:
+                self.tls_session = session
+            if len(self._idle) < MAX_IDLE_PER_HOST:
+                self._idle.append((conn, time.monotonic()))
+                return
+        conn.close()
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            conn.close()
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def get_pool(scheme, host, port):
+    """Get (or create) the shared connection pool for a host"""
+    key = (scheme, host, port)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = HostPool(scheme, host, port)
+        return pool
+
+def close_all():
+    """Close every idle pooled connection"""
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close()
+
+# Close idle keep-alive connections cleanly when the process exits
+atexit.register(close_all)
+
+def _start(pool, method, target, body, headers, timeout):
+    """Send a request and read the response headers, retrying once if a reused connection went stale"""
+    conn, reused = pool.acquire(timeout)
+    try:
+        if not reused:
+            # DNS, TCP and TLS handshake (http.client would otherwise do this inside request())
+            with tracing.span(f"connect {pool.host}", 'http'):
+                conn.connect()
+        conn.request(method, target, body=body, headers=headers)
+        return conn, conn.getresponse()
+    except (http.client.RemoteDisconnected, http.client.BadStatusLine,
+            ConnectionResetError, BrokenPipeError):
+        conn.close()
+        if not reused:
+            raise
+        return _start(pool, method, target, body, headers, timeout)
+    except Exception:
+        conn.close()
+        raise
+
+class StreamResponse:
+    """A response whose body is read incrementally as it arrives
+
+    Use as a context manager. The connection goes back to the pool only if
+    the body was read to the end (or the unread rest is small enough to
+    drain); otherwise abandoning it part way closes the socket.
+
+    When given the host's breaker, the request counts as a success only once
+    the body is read (or the caller closes the stream), and as a failure if
+    reading the body fails.
+    """
+
+    def __init__(self, pool, conn, response, url, breaker=None):
+        self.status = response.status
+        self.headers = response.headers
+        self.url = url
+        self._pool = pool
+        self._conn = conn
+        self._response = response
+        self._finished = False
+        self._breaker = breaker
+        self._decoder = None
+        if response.getheader('Content-Encoding') == 'gzip':
+            self._decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+    def _settle(self, ok):
+        """Report the request's outcome to the host's breaker, once"""
+        if self._breaker is None:
+            return
+        if ok:
+            self._breaker.record_success()
+        else:
+            self._breaker.record_failure()
+        self._breaker = None
+
+    def iter_chunks(self, chunk_size=CHUNK_SIZE):
+        """Yield decoded body chunks as they come off the socket"""
+        try:
+            while True:
+                chunk = self._response.read1(chunk_size)
+                if not chunk:
+                    break
+                if self._decoder:
+                    chunk = self._decoder.decompress(chunk)
+                if chunk:
+                    yield chunk
+            # read1() ends quietly when the connection drops mid-body; don't take that as the end
+            if self._response.length:
+                raise http.client.IncompleteRead(b'', self._response.length)
+            # read1() never marks a Content-Length body done; read() closes it out
+            self._response.read()
+            tail = self._decoder.flush() if self._decoder else b''
+        except Exception:
+            self._settle(False)
+            raise
+        if tail:
+            yield tail
+        self._finished = True
+        self._settle(True)
+
+    def read(self):
+        """Read the whole (decoded) body"""
+        return b''.join(self.iter_chunks())
+
+    def close(self):
+        if self._conn is None:
+            return
+        # A small known remainder is cheaper to drain than a new connection
+        remaining = self._response.length
+        if not self._finished and remaining is not None and remaining <= DRAIN_LIMIT:
+            try:
+                self._response.read()
+                self._finished = True
+            except Exception:
+                pass
+        # Left unread by the caller, not failed by the host
+        self._settle(True)
+        if self._finished and not self._response.will_close:
+            self._pool.release(self._conn)
+        else:
+            self._conn.close()
+        self._conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def upstream_url(url):
+    """Where a request for url is actually sent
+
+    With UPSTREAM_OVERRIDE set (e.g. http://127.0.0.1:8765, a stand-in
+    server), requests for every host - or only the comma-separated hosts in
+    UPSTREAM_OVERRIDE_HOSTS - go to override/<host>/<path> instead.
+    """
+    override = config.get('UPSTREAM_OVERRIDE')
+    if not override:
+        return url
+    parts = urllib.parse.urlsplit(url)
+    hosts = config.get('UPSTREAM_OVERRIDE_HOSTS')
+    if hosts and parts.hostname not in [host.strip() for host in hosts.split(',')]:
+        return url
+    rewritten = f"{override.rstrip('/')}/{parts.hostname}{parts.path or '/'}"
+    return rewritten + ('?' + parts.query if parts.query else '')
+
+_cassettes = {}
+
+def get_cassette():
+    """The cassette for the configured HTTP_CASSETTE_DIR (default: ./cassettes)"""
+    directory = config.get('HTTP_CASSETTE_DIR') or None
+    with _pools_lock:
+        cassette = _cassettes.get(directory)
+        if cassette is None:
+            cassette = _cassettes[directory] = Cassette(directory) if directory else Cassette()
+        return cassette
+
+def cassette_mode():
+    mode = (config.get('HTTP_CASSETTE_MODE') or 'off').lower()
+    return mode if mode in CASSETTE_MODES else 'off'
+
+def transport_summary():
+    """How upstream requests are currently routed, for the admin endpoint"""
+    return {
+        'cassette_mode': cassette_mode(),
+        'cassette_dir': get_cassette().directory,
+        'upstream_override': config.get('UPSTREAM_OVERRIDE'),
+        'override_hosts': config.get('UPSTREAM_OVERRIDE_HOSTS')
+    }
+
+def _open_live(method, url, headers, body, timeout):
+    """open_stream() against the network (or the configured stand-in upstream)"""
+    for _ in range(MAX_REDIRECTS + 1):
+        parts = urllib.parse.urlsplit(url)
+        # Rate budgets and breakers stay keyed by the real host, even when overridden
+        send = urllib.parse.urlsplit(upstream_url(url))
+        port = send.port or (443 if send.scheme == 'https' else 80)
+        pool = get_pool(send.scheme, send.hostname, port)
+
+        target = send.path or '/'
+        if send.query:
+            target += '?' + send.query
+
+        send_headers = {'User-Agent': USER_AGENT, 'Accept-Encoding': 'gzip'}
+        send_headers.update(headers or {})
+
+        # Breaker first, so a skipped request never spends the host's rate budget
+        breaker = resilience.get_breaker(parts.hostname)
+        if not breaker.allow():
+            raise resilience.CircuitOpen(f"{parts.hostname} is degraded, skipping request")
+        bucket = resilience.get_bucket(parts.hostname)
+        if bucket and not bucket.acquire(min(timeout, resilience.MAX_RATE_WAIT)):
+            breaker.release()
+            raise resilience.RateLimited(f"{parts.hostname} rate budget exhausted")
+
+        start = time.perf_counter()
+        try:
+            with metrics.upstream_requests_in_flight.track(parts.hostname), \
+                    tracing.span(f"request {parts.hostname}", 'http', method=method, path=parts.path):
+                conn, response = _start(pool, method, target, body, send_headers, timeout)
+        except Exception:
+            breaker.record_failure()
+            metrics.upstream_requests.inc(parts.hostname, 'error')
+            raise
+        metrics.upstream_request_duration.observe(time.perf_counter() - start, parts.hostname)
+        metrics.upstream_requests.inc(parts.hostname, response.status)
+        if response.status >= 500 or response.status == 429:
+            breaker.record_failure()
+            stream = StreamResponse(pool, conn, response, url)
+        else:
+            # Success is recorded once the body has been read without error
+            stream = StreamResponse(pool, conn, response, url, breaker)
+
+        if response.status in REDIRECT_STATUSES and response.getheader('Location'):
+            with stream:
+                stream.read()
+            url = urllib.parse.urljoin(url, response.getheader('Location'))
+            if response.status == 303:
+                method, body = 'GET', None
+            continue
+
+        if response.status >= 400:
+            with stream:
+                data = stream.read()
+            raise HTTPError(response.status, url, data)
+        return stream
+
+    raise HTTPError(response.status, url)
+
+def open_stream(method, url, headers=None, body=None, timeout=10):
+    """Make an HTTP request over a shared keep-alive connection, leaving the body unread
+
+    Redirects are followed and gzip bodies decoded. Raises HTTPError for
+    4xx/5xx statuses, like urllib.request.urlopen did. Each host's rate budget
+    and circuit breaker are checked first: RateLimited is raised if no budget
+    frees up within MAX_RATE_WAIT, CircuitOpen if the host is failing.
+
+    HTTP_CASSETTE_MODE=record saves every response to the cassette (the body
+    is read in full first); replay answers from the cassette without touching
+    the network and raises CassetteMiss for requests never recorded.
+    """
+    mode = cassette_mode()
+    if mode == 'replay':
+        recorded = get_cassette().get(method, url, body)
+        if recorded is None:
+            raise CassetteMiss(f"No recorded response for {method} {url}")
+        status, response_headers, data = recorded
+        if status >= 400:
+            raise HTTPError(status, url, data)
+        return RecordedResponse(status, response_headers, data, url)
+
+    if mode == 'off':
+        return _open_live(method, url, headers, body, timeout)
+
+    try:
+        with _open_live(method, url, headers, body, timeout) as stream:
+            data = stream.read()
+    except HTTPError as e:
+        get_cassette().record(method, url, body, e.status, {}, e.body)
+        raise
+    # A 304 only answers a conditional request, which cassette keys don't capture
+    if stream.status != 304:
+        get_cassette().record(method, url, body, stream.status, stream.headers, data)
+    return RecordedResponse(stream.status, stream.headers, data, stream.url)
+
+def request(method, url, headers=None, body=None, timeout=10):
+    """Make an HTTP request over a shared keep-alive connection and read the whole body"""
+    with open_stream(method, url, headers=headers, body=body, timeout=timeout) as stream:
+        with tracing.span(f"download {urllib.parse.urlsplit(url).hostname}", 'http'):
+            data = stream.read()
+    return Response(stream.status, stream.headers, data, stream.url)
+
+def get(url, headers=None, timeout=10):
+    """GET a URL"""
+    return request('GET', url, headers=headers, timeout=timeout)
+
+def get_text(url, headers=None, timeout=10):
+    """GET a URL and decode the body as text"""
+    return get(url, headers=headers, timeout=timeout).body.decode()
+
+def _parse_json(response):
+    with tracing.span(f"parse json {urllib.parse.urlsplit(response.url).hostname}", 'parse'):
+        return json.loads(response.body.decode())
+
+def get_json(url, headers=None, timeout=10):
+    """GET a URL and parse the body as JSON"""
+    return _parse_json(get(url, headers=headers, timeout=timeout))
+
+def post_form(url, fields, headers=None, timeout=10):
+    """POST url-encoded form fields and parse the JSON response"""
+    send_headers = {'Content-Type': 'application/x-www-form-urlencoded'}
+    send_headers.update(headers or {})
+    body = urllib.parse.urlencode(fields).encode()
+    response = request('POST', url, headers=send_headers, body=body, timeout=timeout)
+    return _parse_json(response)
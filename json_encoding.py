@@ -0,0 +1,38 @@
+import json
+
+from flask.json.provider import JSONProvider
+
+from content_item import ContentItem
+
+# orjson is several times faster than the stdlib encoder; fall back if it's missing
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _default(obj):
+    if isinstance(obj, ContentItem):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def dumps_bytes(obj):
+    """Encode obj (ContentItems included) as compact UTF-8 JSON"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default)
+    return json.dumps(obj, default=_default, separators=(',', ':'), ensure_ascii=False).encode()
+
+def dumps(obj):
+    return dumps_bytes(obj).decode()
+
+class FastJSONProvider(JSONProvider):
+    """Flask JSON provider that encodes ContentItems directly, via orjson when available"""
+
+    def dumps(self, obj, **kwargs):
+        return dumps(obj)
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s) if orjson is not None else json.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_bytes(obj), mimetype='application/json')
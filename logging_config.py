@@ -0,0 +1,42 @@
+import json
+import logging
+import sys
+
+from config import config
+
+# Attributes every LogRecord has; anything else on a record came from extra={...}
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+TEXT_FORMAT = '%(asctime)s %(levelname)-7s %(name)s: %(message)s'
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message and any extra={...} fields"""
+
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+def configure_logging(level=None, format=None):
+    """Send the app's logs to stderr at LOG_LEVEL (default INFO) as LOG_FORMAT text or json
+
+    Per-source search chatter is logged at DEBUG, so the default level keeps
+    the hot path quiet; set LOG_LEVEL=DEBUG to see every upstream call.
+    """
+    level = (level or config.get('LOG_LEVEL') or 'INFO').upper()
+    format = (format or config.get('LOG_FORMAT') or 'text').lower()
+
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(JSONFormatter() if format == 'json' else logging.Formatter(TEXT_FORMAT))
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(level)
@@ -0,0 +1,199 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Latency histogram bucket bounds in seconds (cover cache hits through slow upstreams)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 15, 30)
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Metric:
+    """A named metric with a fixed set of label names, one series per label value tuple"""
+
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {labels}")
+        return tuple(str(label) for label in labels)
+
+    def _labels(self, key, extra=()):
+        pairs = list(zip(self.labelnames, key)) + list(extra)
+        if not pairs:
+            return ''
+        return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+    def samples(self):
+        """(suffix, label string, value) for every series"""
+        with self._lock:
+            series = dict(self._series)
+        return [('', self._labels(key), value) for key, value in sorted(series.items())]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for suffix, labels, value in self.samples():
+            lines.append(f"{self.name}{suffix}{labels} {_format_value(value)}")
+        return '\n'.join(lines)
+
+class Counter(Metric):
+    """A value that only goes up (requests, errors, results...)"""
+
+    type = 'counter'
+
+    def inc(self, *labels, amount=1):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def value(self, *labels):
+        return self._series.get(self._key(labels), 0)
+
+class Gauge(Metric):
+    """A value that goes up and down (requests in flight...)"""
+
+    type = 'gauge'
+
+    def inc(self, *labels, amount=1):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value, *labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = value
+
+    def value(self, *labels):
+        return self._series.get(self._key(labels), 0)
+
+    @contextmanager
+    def track(self, *labels):
+        """Count the enclosed block as in progress"""
+        self.inc(*labels)
+        try:
+            yield
+        finally:
+            self.dec(*labels)
+
+class Histogram(Metric):
+    """Observations counted into cumulative buckets, with their sum and count"""
+
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, *labels):
+        """Observe how long the enclosed block takes"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def samples(self):
+        with self._lock:
+            series = {key: (list(counts), total, count) for key, (counts, total, count) in self._series.items()}
+        samples = []
+        for key, (counts, total, count) in sorted(series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                samples.append(('_bucket', self._labels(key, [('le', _format_value(float(bound)))]), cumulative))
+            samples.append(('_sum', self._labels(key), total))
+            samples.append(('_count', self._labels(key), count))
+        return samples
+
+class Registry:
+    """Every metric the process exposes, rendered together in Prometheus text format"""
+
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics)
+        return '\n'.join(metric.render() for metric in metrics) + '\n'
+
+# Content type of the Prometheus text exposition format
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Shared registry served at /api/metrics
+registry = Registry()
+
+# Flask routes (labelled by URL rule, so path parameters don't explode the series)
+http_requests = registry.counter(
+    'smagent_http_requests_total', 'API requests handled', ('route', 'method', 'status'))
+http_request_duration = registry.histogram(
+    'smagent_http_request_duration_seconds', 'Time to build an API response', ('route',))
+http_requests_in_flight = registry.gauge(
+    'smagent_http_requests_in_flight', 'API requests being handled', ('route',))
+
+# Source searches answered to callers, by outcome (ok, cached, error, timeout, degraded, rate_limited)
+source_searches = registry.counter(
+    'smagent_source_searches_total', 'Per-term source searches answered', ('source', 'status'))
+source_results = registry.counter(
+    'smagent_source_results_total', 'Items returned by source searches', ('source',))
+
+# Upstream fetch jobs (one per term, or one per batch of terms)
+source_fetch_duration = registry.histogram(
+    'smagent_source_fetch_duration_seconds', 'Time for a source fetch job to finish', ('source',))
+source_fetches_in_flight = registry.gauge(
+    'smagent_source_fetches_in_flight', 'Source fetch jobs running', ('source',))
+
+# Result cache lookups
+cache_lookups = registry.counter(
+    'smagent_cache_lookups_total', 'Result cache lookups', ('cache', 'result'))
+
+# Raw HTTP calls to upstream hosts
+upstream_requests = registry.counter(
+    'smagent_upstream_requests_total', 'HTTP requests made to upstream hosts', ('host', 'status'))
+upstream_request_duration = registry.histogram(
+    'smagent_upstream_request_duration_seconds', 'Time until an upstream sends response headers', ('host',))
+upstream_requests_in_flight = registry.gauge(
+    'smagent_upstream_requests_in_flight', 'Upstream requests awaiting response headers', ('host',))
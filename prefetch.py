@@ -0,0 +1,264 @@
+import logging
+import threading
+import time
+
+import resilience
+from config import config
+from result_cache import SOURCE_TTLS, DEFAULT_TTL, normalize_term, search_cache
+from sound_mind_agent import (
+    DEFAULT_TOPICS, SOURCE_BATCH_SEARCHES, SOURCE_HOSTS, SOURCE_ORDER, source_degraded, submit_fetches
+)
+
+logger = logging.getLogger(__name__)
+
+# Always kept warm: the agent's own topics plus the frontend's default terms
+SEED_TERMS = DEFAULT_TOPICS + ['meditation music']
+
+# Seconds between scheduler passes
+PREFETCH_INTERVAL = 15
+
+# Most popular searched terms kept warm, on top of the seed terms
+PREFETCH_TOP_TERMS = 10
+
+# Prefetches allowed in flight at once (PREFETCH_CONCURRENCY in .env overrides)
+PREFETCH_CONCURRENCY = 2
+
+# Refresh an entry once less than this fraction of its TTL is left (at least a minute)
+REFRESH_AHEAD_FRACTION = 0.1
+MIN_REFRESH_AHEAD = 60
+
+# Prefetches only spend a host's rate budget while at least this fraction of its
+# burst is left, so live searches always keep the rest
+RATE_RESERVE_FRACTION = 0.5
+
+# Hosts whose quota is counted per day or longer (NewsAPI: 100/day) are never
+# prefetched: refreshing ahead of a short TTL would spend the day's quota idle
+DAILY_QUOTA_PERIOD = 24 * 60 * 60
+
+# Share of a host's daily request allowance prefetching may spend in one day
+PREFETCH_DAILY_SHARE = 0.1
+
+# Most terms the admin API may pin
+MAX_PINNED_TERMS = 20
+
+# Popularity halves every this many seconds, so old spikes fade
+POPULARITY_HALF_LIFE = 6 * 60 * 60
+
+# Decayed search count a term needs to be kept warm: a term searched once never
+# qualifies, two recent searches do, and it drops out a few hours after they stop
+MIN_POPULARITY = 1.5
+
+class TermPopularity:
+    """Decaying search counts per normalized term"""
+
+    def __init__(self, half_life=POPULARITY_HALF_LIFE):
+        self.half_life = half_life
+        self._scores = {}
+        self._lock = threading.Lock()
+
+    def _decayed(self, entry, now):
+        score, updated, _ = entry
+        return score * 0.5 ** ((now - updated) / self.half_life)
+
+    def record(self, terms):
+        now = time.time()
+        with self._lock:
+            for term in terms:
+                key = normalize_term(term)
+                if not key:
+                    continue
+                entry = self._scores.get(key)
+                score = self._decayed(entry, now) if entry else 0.0
+                self._scores[key] = (score + 1, now, term)
+
+    def top(self, n, min_score=0.0):
+        """The n most popular terms (as first searched) scoring at least min_score, with their scores"""
+        now = time.time()
+        with self._lock:
+            scored = [(self._decayed(entry, now), entry[2]) for entry in self._scores.values()]
+        scored = sorted((entry for entry in scored if entry[0] >= min_score), reverse=True)
+        return [(term, round(score, 2)) for score, term in scored[:n]]
+
+class PrefetchScheduler:
+    """Refreshes the cached results of hot terms before they expire
+
+    Each pass looks at the seed terms and the most popular searched terms,
+    finds (term, source) entries that are missing or close to expiry, and
+    re-fetches them through the shared single-flight fetch path. A pass
+    starts at most one job per source (a batch where the source supports
+    it, else a single term), stays within a concurrency budget of jobs and
+    leaves sources alone whose rate budget is running low or whose circuit
+    breaker is open, so prefetching never competes with live searches.
+    Hosts with a daily quota are never prefetched, and the rest are held to
+    PREFETCH_DAILY_SHARE of their daily allowance.
+    """
+
+    def __init__(self, seed_terms=SEED_TERMS, top_terms=PREFETCH_TOP_TERMS,
+                 concurrency=None, interval=PREFETCH_INTERVAL):
+        self.popularity = TermPopularity()
+        self.pinned = list(seed_terms)
+        self.top_terms = top_terms
+        self.concurrency = concurrency
+        self.interval = interval
+        self.enabled = True
+        self.refreshed = 0
+        self.deferred = 0
+        self.last_run = None
+        self._in_flight = {}
+        self._spent = {}
+        self._spent_day = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def pin(self, terms):
+        """Keep terms warm regardless of popularity (at most MAX_PINNED_TERMS in all)
+
+        Raises ValueError unless terms is a list of non-empty strings that fits.
+        """
+        if not isinstance(terms, list) or not all(isinstance(term, str) and term.strip() for term in terms):
+            raise ValueError("pin must be a list of search terms")
+        pinned = list(self.pinned)
+        for term in terms:
+            if term.strip() not in pinned:
+                pinned.append(term.strip())
+        if len(pinned) > MAX_PINNED_TERMS:
+            raise ValueError(f"At most {MAX_PINNED_TERMS} terms can be pinned")
+        self.pinned = pinned
+
+    def record(self, terms):
+        """Count a search for terms towards their popularity"""
+        self.popularity.record(terms)
+
+    def budget(self):
+        """Concurrent prefetches allowed: set at runtime, else from config, else the default"""
+        if self.concurrency is not None:
+            return self.concurrency
+        try:
+            return int(config.get('PREFETCH_CONCURRENCY', PREFETCH_CONCURRENCY))
+        except ValueError:
+            return PREFETCH_CONCURRENCY
+
+    def hot_terms(self):
+        terms = {}
+        popular = self.popularity.top(self.top_terms, MIN_POPULARITY)
+        for term in self.pinned + [term for term, _ in popular]:
+            terms.setdefault(normalize_term(term), term)
+        return list(terms.values())
+
+    def _due(self, source_name, term):
+        remaining = search_cache.expires_in(source_name, term)
+        if remaining is None:
+            return True
+        ttl = SOURCE_TTLS.get(source_name, DEFAULT_TTL)
+        return remaining < max(MIN_REFRESH_AHEAD, ttl * REFRESH_AHEAD_FRACTION)
+
+    def _has_headroom(self, source_name):
+        for host in SOURCE_HOSTS.get(source_name, []):
+            bucket = resilience.get_bucket(host)
+            if bucket and bucket.available() < max(1, bucket.capacity * RATE_RESERVE_FRACTION):
+                return False
+        return True
+
+    def _daily_allowance(self, host):
+        """Upstream calls prefetching may make to a host today (None if it has no quota)"""
+        limit = resilience.HOST_RATE_LIMITS.get(host)
+        if limit is None:
+            return None
+        requests, per_seconds, _ = limit
+        if per_seconds >= DAILY_QUOTA_PERIOD:
+            return 0
+        return int(requests * DAILY_QUOTA_PERIOD / per_seconds * PREFETCH_DAILY_SHARE)
+
+    def _spend_daily(self, source_name, calls):
+        """Charge calls to each of a source's hosts for today; False (charging nothing) if any is out"""
+        today = time.strftime('%Y-%m-%d')
+        if self._spent_day != today:
+            self._spent_day, self._spent = today, {}
+        hosts = SOURCE_HOSTS.get(source_name, [])
+        for host in hosts:
+            allowance = self._daily_allowance(host)
+            if allowance is not None and self._spent.get(host, 0) + calls > allowance:
+                return False
+        for host in hosts:
+            self._spent[host] = self._spent.get(host, 0) + calls
+        return True
+
+    def run_once(self):
+        """One scheduling pass; returns the (source, term) refreshes it started"""
+        started = []
+        with self._lock:
+            self.last_run = time.time()
+            self._in_flight = {key: f for key, f in self._in_flight.items() if not f.done()}
+            busy_sources = {source_name for source_name, _ in self._in_flight}
+            budget = self.budget() - len(busy_sources)
+            hot_terms = self.hot_terms()
+
+            for source_name in SOURCE_ORDER:
+                if budget <= 0:
+                    break
+                if source_name in busy_sources or source_degraded(source_name):
+                    continue
+                due = [term for term in hot_terms if self._due(source_name, term)]
+                if not due:
+                    continue
+                if source_name not in SOURCE_BATCH_SEARCHES:
+                    due = due[:1]
+                # One upstream call per term is the most a job makes
+                if not self._has_headroom(source_name) or not self._spend_daily(source_name, len(due)):
+                    self.deferred += 1
+                    continue
+                for term, future in submit_fetches(source_name, due).items():
+                    self._in_flight[(source_name, term)] = future
+                    started.append((source_name, term))
+                self.refreshed += len(due)
+                budget -= 1
+        return started
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if not self.enabled:
+                continue
+            try:
+                jobs = self.run_once()
+                if jobs:
+                    logger.info("🔥 Prefetching %s hot searches: %s", len(jobs), jobs)
+            except Exception as e:
+                logger.warning("❌ Prefetch pass failed: %s", e)
+
+    def start(self):
+        """Start the background scheduler thread (once)"""
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='prefetch', daemon=True)
+                self._thread.start()
+
+    def wake(self):
+        """Run a pass now instead of waiting for the interval"""
+        self._wake.set()
+
+    def status(self):
+        with self._lock:
+            in_flight = [f"{source_name}:{term}" for (source_name, term), f in self._in_flight.items()
+                         if not f.done()]
+        return {
+            'enabled': self.enabled,
+            'running': self._thread is not None,
+            'interval': self.interval,
+            'concurrency': self.budget(),
+            'top_terms': self.top_terms,
+            'pinned': self.pinned,
+            'popular': self.popularity.top(self.top_terms),
+            'in_flight': in_flight,
+            'refreshed': self.refreshed,
+            'deferred': self.deferred,
+            'spent_today': dict(self._spent),
+            'last_run': self.last_run
+        }
+
+# Shared scheduler started by the Flask app
+prefetcher = PrefetchScheduler()
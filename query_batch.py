@@ -0,0 +1,45 @@
+import re
+
+_WORD = re.compile(r'\w+')
+
+def term_words(text):
+    """Casefolded words in any script, so 'sleep-tracker' matches 'sleep tracker' and 'Méditation' 'méditation'"""
+    return _WORD.findall(text.casefold())
+
+def split_batches(terms, build_query, max_length, max_terms):
+    """Group terms into batches whose combined query stays within the upstream's limits
+
+    build_query(terms) renders the OR-query for a batch; a batch closes once
+    adding the next term would exceed max_length characters or max_terms
+    terms. A single term that is too long on its own still gets a batch,
+    and so does a term with no words, which has nothing to OR together.
+    """
+    batches = []
+    batch = []
+    for term in terms:
+        if not term_words(term):
+            batches.append([term])
+            continue
+        candidate = batch + [term]
+        if batch and (len(candidate) > max_terms or len(build_query(candidate)) > max_length):
+            batches.append(batch)
+            candidate = [term]
+        batch = candidate
+    if batch:
+        batches.append(batch)
+    return batches
+
+def attribute(items, terms, text_of, limit):
+    """Attribute OR-query results back to the terms whose words they contain
+
+    Returns {term: [item, ...]} with at most limit items per term, in
+    upstream order. An item matching several terms is credited to each.
+    """
+    wanted = {term: set(term_words(term)) for term in terms}
+    matched = {term: [] for term in terms}
+    for item in items:
+        words = set(term_words(text_of(item)))
+        for term, needed in wanted.items():
+            if needed and needed <= words and len(matched[term]) < limit:
+                matched[term].append(item)
+    return matched
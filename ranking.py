@@ -0,0 +1,91 @@
+import math
+import time
+
+from query_batch import term_words
+
+# BM25 parameters (the usual defaults)
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Title words count this many times over snippet words
+TITLE_WEIGHT = 2
+
+# How much each signal contributes to the final score (each is scaled to 0-1)
+RELEVANCE_WEIGHT = 0.6
+RECENCY_WEIGHT = 0.25
+POPULARITY_WEIGHT = 0.15
+
+# Age at which the recency signal has halved
+RECENCY_HALF_LIFE_DAYS = 180
+
+def _document_words(item):
+    title = term_words(item.title or '')
+    return title * TITLE_WEIGHT + term_words(item.snippet or '')
+
+def relevance_scores(items, terms):
+    """BM25 score of every item against the search terms, using the result set as the corpus"""
+    query = set(word for term in terms for word in term_words(term))
+    documents = [_document_words(item) for item in items]
+    if not documents or not query:
+        return [0.0] * len(items)
+
+    average_length = sum(len(words) for words in documents) / len(documents) or 1
+    frequencies = []
+    document_counts = dict.fromkeys(query, 0)
+    for words in documents:
+        counts = {}
+        for word in words:
+            if word in query:
+                counts[word] = counts.get(word, 0) + 1
+        frequencies.append(counts)
+        for word in counts:
+            document_counts[word] += 1
+
+    total = len(documents)
+    idf = {
+        word: math.log(1 + (total - count + 0.5) / (count + 0.5))
+        for word, count in document_counts.items()
+    }
+
+    scores = []
+    for words, counts in zip(documents, frequencies):
+        length_norm = BM25_K1 * (1 - BM25_B + BM25_B * len(words) / average_length)
+        scores.append(sum(
+            idf[word] * count * (BM25_K1 + 1) / (count + length_norm)
+            for word, count in counts.items()
+        ))
+    return scores
+
+def recency_score(item, now):
+    """1.0 for something published now, halving every RECENCY_HALF_LIFE_DAYS (0 if undated)"""
+    if item.timestamp is None:
+        return 0.0
+    age_days = max(0.0, (now - item.timestamp) / 86400)
+    return 0.5 ** (age_days / RECENCY_HALF_LIFE_DAYS)
+
+def _popularity(item):
+    return math.log1p(max(0, item.score or 0) + max(0, item.stars or 0))
+
+def rank(items, terms):
+    """Score items and return the best first, each with a rank_score
+
+    Relevance and popularity are scaled against the best item in the set, so
+    the weights mean the same thing however large the result set is.
+    """
+    if not items:
+        return []
+    now = time.time()
+    relevance = relevance_scores(items, terms)
+    popularity = [_popularity(item) for item in items]
+    best_relevance = max(relevance) or 1
+    best_popularity = max(popularity) or 1
+
+    for item, item_relevance, item_popularity in zip(items, relevance, popularity):
+        item.rank_score = round(
+            RELEVANCE_WEIGHT * item_relevance / best_relevance
+            + RECENCY_WEIGHT * recency_score(item, now)
+            + POPULARITY_WEIGHT * item_popularity / best_popularity,
+            4
+        )
+
+    return sorted(items, key=lambda item: item.rank_score, reverse=True)
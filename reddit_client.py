@@ -0,0 +1,130 @@
+import base64
+import logging
+import threading
+import time
+import urllib.parse
+
+import http_client
+from config import config
+
+logger = logging.getLogger(__name__)
+
+TOKEN_URL = "https://www.reddit.com/api/v1/access_token"
+SEARCH_URL = "https://oauth.reddit.com/r/{subreddits}/search"
+
+SUBREDDITS = ['Meditation', 'soundhealing', 'BinauralBeats', 'ambientmusic', 'WeAreTheMusicMakers']
+
+# Refresh this many seconds before the token expires, in the background
+REFRESH_MARGIN = 5 * 60
+
+# Longest a caller without a token waits for another caller's refresh to finish
+# (a little over the token request's own timeout)
+REFRESH_WAIT = 15
+
+# Posts requested from the combined multi-subreddit search
+SEARCH_LIMIT = 15
+
+class RedditClient:
+    """Reddit app-only OAuth client that keeps its token fresh
+
+    The token is refreshed in a background thread once it is within
+    REFRESH_MARGIN of expiring, so callers keep using the still-valid token
+    instead of waiting. Callers only block when there is no valid token at all,
+    and then only one of them fetches it - the rest wait for that refresh.
+    """
+
+    def __init__(self, subreddits=SUBREDDITS):
+        self.subreddits = subreddits
+        self._token = None
+        self._expires_at = 0
+        self._refreshing = False
+        self._lock = threading.Lock()
+        self._refreshed = threading.Condition(self._lock)
+
+    def _request_token(self):
+        client_id = config.get('REDDIT_CLIENT_ID')
+        client_secret = config.get('REDDIT_CLIENT_SECRET')
+
+        if not client_id or not client_secret:
+            logger.warning("❌ Reddit credentials missing!")
+            return None, 0
+
+        credentials = f"{client_id}:{client_secret}"
+        encoded_credentials = base64.b64encode(credentials.encode()).decode()
+        headers = {'Authorization': f'Basic {encoded_credentials}'}
+
+        token_data = http_client.post_form(TOKEN_URL, {'grant_type': 'client_credentials'}, headers=headers)
+        return token_data.get('access_token'), token_data.get('expires_in', 3600)
+
+    def refresh(self):
+        """Fetch a new token now and return it (None on failure)"""
+        logger.info("🔄 Getting Reddit token...")
+        try:
+            token, expires_in = self._request_token()
+        except Exception as e:
+            logger.warning("❌ Reddit token error: %s", e)
+            token, expires_in = None, 0
+
+        with self._lock:
+            self._refreshing = False
+            self._refreshed.notify_all()
+            if token:
+                self._token = token
+                self._expires_at = time.time() + expires_in
+                logger.info("✅ Reddit token obtained")
+            return self._token if time.time() < self._expires_at else None
+
+    def get_token(self):
+        """Return a valid token, refreshing ahead of expiry without blocking callers"""
+        now = time.time()
+        with self._lock:
+            token_valid = self._token is not None and now < self._expires_at
+            if token_valid and now < self._expires_at - REFRESH_MARGIN:
+                return self._token
+            if token_valid:
+                if not self._refreshing:
+                    self._refreshing = True
+                    threading.Thread(target=self.refresh, daemon=True).start()
+                return self._token
+            if self._refreshing:
+                # Someone is already fetching a token - wait for theirs
+                self._refreshed.wait_for(lambda: not self._refreshing, timeout=REFRESH_WAIT)
+                return self._token if time.time() < self._expires_at else None
+            self._refreshing = True
+        return self.refresh()
+
+    def invalidate(self):
+        """Forget the current token (e.g. after a 401)"""
+        with self._lock:
+            self._token = None
+            self._expires_at = 0
+
+    def connected(self):
+        """Whether a valid token is currently held"""
+        return self._token is not None and time.time() < self._expires_at
+
+    def search(self, topic, token=None):
+        """Search every configured subreddit at once with a combined r/A+B+C query"""
+        params = {
+            'q': topic,
+            'sort': 'relevance',
+            'limit': SEARCH_LIMIT,
+            'restrict_sr': 'true'
+        }
+        url = SEARCH_URL.format(subreddits='+'.join(self.subreddits)) + '?' + urllib.parse.urlencode(params)
+
+        for attempt in range(2):
+            token = token or self.get_token()
+            if not token:
+                return None
+            try:
+                return http_client.get_json(url, headers={'Authorization': f'Bearer {token}'})
+            except http_client.HTTPError as e:
+                if e.status != 401 or attempt:
+                    raise
+                # Token revoked or expired early - get a new one and retry once
+                self.invalidate()
+                token = None
+
+# Shared client used by the search functions and the Flask app
+reddit = RedditClient()
@@ -0,0 +1,150 @@
+import threading
+import time
+
+# Published (or conservative) request quotas per upstream host: (requests, per seconds, burst)
+HOST_RATE_LIMITS = {
+    'newsapi.org': (100, 24 * 60 * 60, 10),         # Developer plan: 100 requests/day
+    'oauth.reddit.com': (100, 60, 10),              # 100 queries/minute per OAuth client
+    'eutils.ncbi.nlm.nih.gov': (3, 1, 3),           # 3 requests/second without an API key
+    'export.arxiv.org': (1, 3, 1),                  # One request every three seconds
+    'itunes.apple.com': (20, 60, 5),                # ~20 calls/minute
+    'api.github.com': (10, 60, 5),                  # Search API, unauthenticated floor
+    'scholar.google.com': (6, 60, 2)                # No published quota - stay gentle
+}
+
+# Consecutive failures that open a host's breaker, and how long it stays open
+FAILURE_THRESHOLD = 3
+COOLDOWN = 60
+
+# Longest a request waits for its host's rate budget; past this it's refused at once,
+# so a host out of quota never parks the shared search workers in sleep()
+MAX_RATE_WAIT = 0.25
+
+class HostUnavailable(Exception):
+    """A request refused before it was sent, because of the host's state rather than the request"""
+
+class RateLimited(HostUnavailable):
+    """Raised when a host's rate budget has no room within MAX_RATE_WAIT"""
+
+class CircuitOpen(HostUnavailable):
+    """Raised when a host's circuit breaker is open and the request is skipped"""
+
+class TokenBucket:
+    """Token bucket refilled at `rate` tokens/second up to `capacity`"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, timeout=None):
+        """Take a token, waiting up to timeout seconds; False if none arrives in time"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if deadline is not None and now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    def available(self):
+        """Tokens currently available (fractional)"""
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._tokens
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a single half-open trial call"""
+
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD, cooldown=COOLDOWN):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at < self.cooldown:
+            return 'open'
+        return 'half_open'
+
+    def allow(self):
+        """Whether a request may go through now"""
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half_open' and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def release(self):
+        """Hand back a half-open trial that allow() granted but was never sent"""
+        with self._lock:
+            self._trial_running = False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+_buckets = {}
+_breakers = {}
+_registry_lock = threading.Lock()
+
+def get_bucket(host):
+    """The shared token bucket for a host, or None if it has no configured quota"""
+    limit = HOST_RATE_LIMITS.get(host)
+    if limit is None:
+        return None
+    with _registry_lock:
+        bucket = _buckets.get(host)
+        if bucket is None:
+            requests, per_seconds, burst = limit
+            bucket = _buckets[host] = TokenBucket(requests / per_seconds, burst)
+        return bucket
+
+def get_breaker(host):
+    """The shared circuit breaker for a host"""
+    with _registry_lock:
+        breaker = _breakers.get(host)
+        if breaker is None:
+            breaker = _breakers[host] = CircuitBreaker()
+        return breaker
+
+def host_states():
+    """Breaker state and remaining rate budget for every host seen so far"""
+    with _registry_lock:
+        hosts = set(_breakers) | set(_buckets)
+    states = {}
+    for host in sorted(hosts):
+        bucket = get_bucket(host)
+        states[host] = {
+            'breaker': get_breaker(host).state,
+            'tokens': round(bucket.available(), 2) if bucket else None
+        }
+    return states
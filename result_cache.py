@@ -0,0 +1,181 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import metrics
+from content_item import ContentItem
+
+CACHE_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'search_cache.db')
+
+# Entries kept in memory before the least recently used ones are dropped
+MAX_MEMORY_ENTRIES = 512
+
+# How long (seconds) a non-empty result list stays fresh, per source
+SOURCE_TTLS = {
+    'news': 15 * 60,
+    'reddit': 30 * 60,
+    'pubmed': 24 * 60 * 60,
+    'youtube': 60 * 60,
+    'arxiv': 24 * 60 * 60,
+    'podcasts': 6 * 60 * 60,
+    'medium': 60 * 60,
+    'github': 60 * 60,
+    'scholar': 24 * 60 * 60,
+    'pubmed_summary': 7 * 24 * 60 * 60
+}
+DEFAULT_TTL = 30 * 60
+
+# Empty or failed results are only remembered briefly, so outages heal quickly
+NEGATIVE_TTL = 2 * 60
+
+def normalize_term(term):
+    """Normalize a search term so trivially different spellings share a cache entry"""
+    return ' '.join(term.lower().split())
+
+class ResultCache:
+    """Two-tier cache of source results: an in-memory LRU in front of a SQLite file
+
+    With an item_type, results are lists of that type: the memory tier keeps
+    the objects and SQLite stores their to_dict() form.
+    """
+
+    def __init__(self, path=CACHE_DB_PATH, max_entries=MAX_MEMORY_ENTRIES, table='results',
+                 item_type=None):
+        self.path = path
+        self.table = table
+        self.item_type = item_type
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+
+    def _connect(self):
+        if self._db is None:
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute(f"""
+                CREATE TABLE IF NOT EXISTS {self.table} (
+                    source TEXT NOT NULL,
+                    term TEXT NOT NULL,
+                    results TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    PRIMARY KEY (source, term)
+                )
+            """)
+            self._db.commit()
+        return self._db
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, source, term):
+        """Return cached results for (source, term), or None if missing or expired"""
+        key = (source, normalize_term(term))
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry[0] > now:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                metrics.cache_lookups.inc(self.table, 'hit')
+                return entry[1]
+
+            row = self._connect().execute(
+                f'SELECT results, expires_at FROM {self.table} WHERE source = ? AND term = ?', key
+            ).fetchone()
+            if row is not None and row[1] > now:
+                results = json.loads(row[0])
+                if self.item_type:
+                    results = [self.item_type.from_dict(item) for item in results]
+                self._remember(key, (row[1], results))
+                self.hits += 1
+                metrics.cache_lookups.inc(self.table, 'hit')
+                return results
+
+            self._memory.pop(key, None)
+            self.misses += 1
+            metrics.cache_lookups.inc(self.table, 'miss')
+            return None
+
+    def expires_in(self, source, term):
+        """Seconds until (source, term) expires, or None if it isn't cached"""
+        key = (source, normalize_term(term))
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at = entry[0]
+            else:
+                row = self._connect().execute(
+                    f'SELECT expires_at FROM {self.table} WHERE source = ? AND term = ?', key
+                ).fetchone()
+                if row is None:
+                    return None
+                expires_at = row[0]
+        remaining = expires_at - time.time()
+        return remaining if remaining > 0 else None
+
+    def set(self, source, term, results):
+        """Store results for (source, term) with the source's TTL (short if empty)"""
+        key = (source, normalize_term(term))
+        ttl = SOURCE_TTLS.get(source, DEFAULT_TTL) if results else NEGATIVE_TTL
+        expires_at = time.time() + ttl
+        stored = [item.to_dict() for item in results] if self.item_type else results
+        with self._lock:
+            self._remember(key, (expires_at, results))
+            db = self._connect()
+            db.execute(
+                f'INSERT OR REPLACE INTO {self.table} (source, term, results, expires_at) VALUES (?, ?, ?, ?)',
+                (key[0], key[1], json.dumps(stored), expires_at)
+            )
+            db.commit()
+
+    def invalidate(self, source=None, term=None):
+        """Drop entries matching source and/or term (everything if neither given)"""
+        norm = normalize_term(term) if term else None
+        clauses, params = [], []
+        if source:
+            clauses.append('source = ?')
+            params.append(source)
+        if norm:
+            clauses.append('term = ?')
+            params.append(norm)
+        where = ' WHERE ' + ' AND '.join(clauses) if clauses else ''
+
+        with self._lock:
+            for key in list(self._memory):
+                if (not source or key[0] == source) and (not norm or key[1] == norm):
+                    del self._memory[key]
+            db = self._connect()
+            removed = db.execute(f'DELETE FROM {self.table}' + where, params).rowcount
+            db.commit()
+        return removed
+
+    def purge_expired(self):
+        """Delete expired rows from the SQLite tier"""
+        with self._lock:
+            db = self._connect()
+            removed = db.execute(f'DELETE FROM {self.table} WHERE expires_at <= ?', (time.time(),)).rowcount
+            db.commit()
+        return removed
+
+    def stats(self):
+        """Hit/miss counters and tier sizes"""
+        with self._lock:
+            stored = self._connect().execute(f'SELECT COUNT(*) FROM {self.table}').fetchone()[0]
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'memory_entries': len(self._memory),
+                'stored_entries': stored
+            }
+
+# Shared cache used by the search engine and the Flask routes
+search_cache = ResultCache(item_type=ContentItem)
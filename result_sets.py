@@ -0,0 +1,58 @@
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+# How long a ranked result set stays pageable after the search that built it
+RESULT_SET_TTL = 10 * 60
+
+# Result sets kept at once before the least recently used ones are dropped
+MAX_RESULT_SETS = 256
+
+class CursorExpired(Exception):
+    """Raised when a cursor is malformed or its result set is gone"""
+
+class ResultSetStore:
+    """Ranked search results kept server-side, so later pages don't re-run the search
+
+    A cursor names a stored set and an offset into it. The set also carries
+    the envelope (statistics etc.) of the search that built it, so every
+    page can be answered exactly like the first.
+    """
+
+    def __init__(self, ttl=RESULT_SET_TTL, max_sets=MAX_RESULT_SETS):
+        self.ttl = ttl
+        self.max_sets = max_sets
+        self._sets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, items, envelope):
+        """Store ranked items with their response envelope, returning the set id"""
+        set_id = secrets.token_urlsafe(9)
+        with self._lock:
+            self._sets[set_id] = (time.monotonic() + self.ttl, items, envelope)
+            while len(self._sets) > self.max_sets:
+                self._sets.popitem(last=False)
+        return set_id
+
+    def resolve(self, cursor):
+        """Return (set_id, items, envelope, offset) for a cursor, or raise CursorExpired"""
+        set_id, _, offset = str(cursor).partition('.')
+        if not offset.isdigit():
+            raise CursorExpired(f"Malformed cursor: {cursor}")
+        with self._lock:
+            entry = self._sets.get(set_id)
+            if entry is None or entry[0] <= time.monotonic():
+                self._sets.pop(set_id, None)
+                raise CursorExpired("Cursor expired - run the search again")
+            self._sets.move_to_end(set_id)
+        return set_id, entry[1], entry[2], int(offset)
+
+    def __len__(self):
+        return len(self._sets)
+
+def make_cursor(set_id, offset):
+    return f"{set_id}.{offset}"
+
+# Shared store used by the Flask routes
+result_sets = ResultSetStore()
@@ -9,10 +9,18 @@ let isSearching = false;
 let availableSources = [];
 let selectedSources = [];
 let searchMode = 'comprehensive'; // 'comprehensive' or 'selective'
+let pendingSources = []; // Sources still loading when the last search's budget ran out
 
 // API Configuration
 const API_BASE_URL = 'http://localhost:5000/api';
 
+// Searches answer within this many milliseconds; slower sources are filled in on the next search
+const SEARCH_BUDGET_MS = 4000;
+
+// Ranked results fetched per search (the server's max page), so type filters and
+// re-sorting work on more than the 8 on screen
+const RANKED_RESULTS_LIMIT = 100;
+
 // Source configuration with emojis and colors
 const sourceConfig = {
     'news': { emoji: '📰', name: 'News', color: '#ff6b6b' },
@@ -274,54 +282,34 @@ async function performEnhancedSearch() {
     try {
         showStatus('🔍 Searching enhanced content sources...');
         
-        // Determine which endpoint to use
-        const endpoint = searchMode === 'selective' ? 'bulk' : 'search';
+        // The server ranks results; ask for the best of them
         const requestBody = {
-            searchTerms: searchTerms
+            searchTerms: searchTerms,
+            limit: RANKED_RESULTS_LIMIT,
+            view: 'flat',
+            budget_ms: SEARCH_BUDGET_MS
         };
         
         if (searchMode === 'selective') {
             requestBody.sources = selectedSources;
         }
         
-        // Call the enhanced API
-        const response = await fetch(`${API_BASE_URL}/${endpoint}`, {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-            },
-            body: JSON.stringify(requestBody)
-        });
+        // Stream results as each source finishes when the browser supports it
+        const canStream = typeof ReadableStream !== 'undefined' && typeof TextDecoder !== 'undefined';
+        const statistics = canStream ?
+            await performStreamingSearch(requestBody) :
+            await performJsonSearch(requestBody);
         
-        if (!response.ok) {
-            throw new Error(`API request failed: ${response.status}`);
+        hideStatus();
+        displayEnhancedResults(statistics);
+        if (pendingSources.length > 0) {
+            showStatus(`⏳ Still loading from ${pendingSources.join(', ')} - search again shortly for more`);
         }
         
-        const data = await response.json();
+        const exportBtn = document.getElementById('exportBtn');
+        if (exportBtn) exportBtn.style.display = 'block';
         
-        if (data.success) {
-            allResults = data.results;
-            
-            // Add snippet property if missing (for consistent display)
-            allResults = allResults.map(result => ({
-                ...result,
-                snippet: result.snippet || `Content from ${result.source} about the search topic.`
-            }));
-            
-            // Shuffle and select for display
-            allResults = shuffleArray(allResults);
-            displayedResults = allResults.slice(0, 8); // Show more results
-            
-            hideStatus();
-            displayEnhancedResults(data.statistics);
-            
-            const exportBtn = document.getElementById('exportBtn');
-            if (exportBtn) exportBtn.style.display = 'block';
-            
-            console.log(`✅ Found ${allResults.length} results across multiple sources!`);
-        } else {
-            throw new Error(data.error || 'Unknown API error');
-        }
+        console.log(`✅ Found ${allResults.length} results across multiple sources!`);
         
     } catch (error) {
         showStatus(`❌ Search failed: ${error.message}`);
@@ -337,6 +325,101 @@ async function performEnhancedSearch() {
     }
 }
 
+// Add snippet property if missing (for consistent display)
+function withSnippet(result) {
+    return {
+        ...result,
+        snippet: result.snippet || `Content from ${result.source} about the search topic.`
+    };
+}
+
+// Fetch the complete result set as one JSON response
+async function performJsonSearch(requestBody) {
+    const endpoint = searchMode === 'selective' ? 'bulk' : 'search';
+    
+    const response = await fetch(`${API_BASE_URL}/${endpoint}`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify(requestBody)
+    });
+    
+    if (!response.ok) {
+        throw new Error(`API request failed: ${response.status}`);
+    }
+    
+    const data = await response.json();
+    
+    if (!data.success) {
+        throw new Error(data.error || 'Unknown API error');
+    }
+    
+    // Already ranked best-first by the server
+    pendingSources = data.pending_sources || [];
+    allResults = data.results.map(withSnippet);
+    displayedResults = allResults.slice(0, 8);
+    return data.statistics;
+}
+
+// Read NDJSON batches from the streaming endpoint, rendering each as it arrives
+async function performStreamingSearch(requestBody) {
+    const response = await fetch(`${API_BASE_URL}/search/stream`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify(requestBody)
+    });
+    
+    if (!response.ok) {
+        throw new Error(`API request failed: ${response.status}`);
+    }
+    
+    allResults = [];
+    let statistics = null;
+    let buffer = '';
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    
+    const handleLine = (line) => {
+        if (!line.trim()) return;
+        
+        const message = JSON.parse(line);
+        statistics = message.statistics;
+        
+        if (message.type === 'done') {
+            // The final line carries the server's ranked top results (with rank_score),
+            // replacing the unranked batches collected while streaming
+            allResults = message.results.map(withSnippet);
+            displayedResults = allResults.slice(0, 8);
+            pendingSources = message.pending_sources || [];
+            return;
+        }
+        if (message.type !== 'batch') return;
+        
+        if (message.results.length > 0) {
+            allResults.push(...message.results.map(withSnippet));
+            displayedResults = allResults.slice(0, 8);
+            displayEnhancedResults(statistics);
+        }
+        showStatus(`🔍 ${statistics.completed} of ${statistics.expected} source searches complete...`);
+    };
+    
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split('\n');
+        buffer = lines.pop();
+        lines.forEach(handleLine);
+    }
+    handleLine(buffer + decoder.decode());
+    
+    return statistics;
+}
+
 // Enhanced results display with statistics
 function displayEnhancedResults(statistics) {
     const resultsContainer = document.getElementById('resultsContainer');
@@ -378,7 +461,7 @@ function displayEnhancedResults(statistics) {
                 <p class="item-snippet">${item.snippet}</p>
                 <a href="${item.url}" target="_blank" rel="noopener noreferrer" class="item-link">🔗 Read More</a>
                 <div class="item-metadata">
-                    <span class="item-date">${formatDate(item.date)}</span>
+                    <span class="item-date">${formatDate(item)}</span>
                     ${metadataHtml}
                 </div>
             </div>
@@ -417,25 +500,30 @@ function createStatsDisplay(statistics) {
     `;
 }
 
+// Epoch seconds for an item: the server normalizes dates, mock items are parsed here
+function itemTimestamp(item) {
+    if (item.timestamp !== undefined) return item.timestamp;
+    const parsed = Date.parse(item.date);
+    return isNaN(parsed) ? null : parsed / 1000;
+}
+
 // Format date for display
-function formatDate(dateString) {
-    if (!dateString || dateString === 'Unknown') return 'Unknown date';
+function formatDate(item) {
+    const timestamp = itemTimestamp(item);
+    if (timestamp === null) return 'Unknown date';
     
-    try {
-        const date = new Date(dateString);
-        const now = new Date();
-        const diffTime = Math.abs(now - date);
-        const diffDays = Math.ceil(diffTime / (1000 * 60 * 60 * 24));
-        
-        if (diffDays === 1) return 'Yesterday';
-        if (diffDays < 7) return `${diffDays} days ago`;
-        if (diffDays < 30) return `${Math.ceil(diffDays / 7)} weeks ago`;
-        if (diffDays < 365) return `${Math.ceil(diffDays / 30)} months ago`;
-        
-        return date.getFullYear().toString();
-    } catch {
-        return dateString;
-    }
+    const date = new Date(timestamp * 1000);
+    if (item.date_precision === 'year') return date.getUTCFullYear().toString();
+    
+    const diffTime = Math.abs(Date.now() - date);
+    const diffDays = Math.ceil(diffTime / (1000 * 60 * 60 * 24));
+    
+    if (diffDays === 1) return 'Yesterday';
+    if (diffDays < 7) return `${diffDays} days ago`;
+    if (diffDays < 30) return `${Math.ceil(diffDays / 7)} weeks ago`;
+    if (diffDays < 365) return `${Math.ceil(diffDays / 30)} months ago`;
+    
+    return date.getFullYear().toString();
 }
 
 // Fallback mock search (enhanced with more content types)
@@ -567,6 +655,7 @@ function addFilterControls() {
             
             <label for="sortBy">Sort by:</label>
             <select id="sortBy" class="filter-select" onchange="applyFilters()">
+                <option value="relevance">Relevance</option>
                 <option value="date">Date (Newest)</option>
                 <option value="title">Title (A-Z)</option>
                 <option value="type">Type</option>
@@ -593,8 +682,11 @@ function applyFilters() {
     
     // Apply sorting
     switch (sortBy) {
+        case 'relevance':
+            filteredResults.sort((a, b) => (b.rank_score || 0) - (a.rank_score || 0));
+            break;
         case 'date':
-            filteredResults.sort((a, b) => new Date(b.date) - new Date(a.date));
+            filteredResults.sort((a, b) => (itemTimestamp(b) ?? 0) - (itemTimestamp(a) ?? 0));
             break;
         case 'title':
             filteredResults.sort((a, b) => a.title.localeCompare(b.title));
@@ -636,15 +728,6 @@ function delay(ms) {
     return new Promise(resolve => setTimeout(resolve, ms));
 }
 
-function shuffleArray(array) {
-    const shuffled = [...array];
-    for (let i = shuffled.length - 1; i > 0; i--) {
-        const j = Math.floor(Math.random() * (i + 1));
-        [shuffled[i], shuffled[j]] = [shuffled[j], shuffled[i]];
-    }
-    return shuffled;
-}
-
 // Initialize when DOM loads
 document.addEventListener('DOMContentLoaded', function() {
     console.log('DOM loaded, initializing Enhanced Sound Mind interface...');
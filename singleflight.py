@@ -0,0 +1,60 @@
+import threading
+from concurrent.futures import Future
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key onto one in-flight Future
+
+    Callers asking for a key that is already being fetched get the leader's
+    Future instead of starting a second call, so a burst of identical
+    searches costs one upstream request.
+    """
+
+    def __init__(self):
+        self.coalesced = 0
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key, executor, fn, *args):
+        """Return the in-flight Future for key, submitting fn(*args) if there is none"""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future
+            future = executor.submit(fn, *args)
+            self._calls[key] = future
+
+        future.add_done_callback(lambda done: self._forget(key, done))
+        return future
+
+    def claim(self, keys):
+        """Split keys into ones already in flight and ones the caller now owns
+
+        Returns (joined, owned), both {key: Future}. The caller must resolve
+        every owned Future (set_result/set_exception), typically from a single
+        batched call covering all of them.
+        """
+        joined, owned = {}, {}
+        with self._lock:
+            for key in keys:
+                future = self._calls.get(key)
+                if future is not None:
+                    self.coalesced += 1
+                    joined[key] = future
+                else:
+                    future = self._calls[key] = Future()
+                    owned[key] = future
+
+        for key, future in owned.items():
+            future.add_done_callback(lambda done, key=key: self._forget(key, done))
+        return joined, owned
+
+    def _forget(self, key, future):
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+
+    def in_flight(self):
+        """Number of distinct calls currently running"""
+        with self._lock:
+            return len(self._calls)
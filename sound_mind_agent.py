@@ -1,281 +1,334 @@
-import json
-import urllib.request
+import asyncio
+import logging
+import sqlite3
+import sys
 import urllib.parse
-import base64
-import ssl
-from datetime import datetime, timedelta
-import re
-
-# Create SSL context that doesn't verify certificates (for development)
-ssl_context = ssl.create_default_context()
-ssl_context.check_hostname = False
-ssl_context.verify_mode = ssl.CERT_NONE
-
-def load_env_file():
-    """Load variables from .env file"""
-    env_vars = {}
-    try:
-        with open('.env', 'r') as f:
-            for line in f:
-                if '=' in line and not line.startswith('#'):
-                    key, value = line.strip().split('=', 1)
-                    env_vars[key] = value
-    except FileNotFoundError:
-        print("❌ .env file not found!")
-    return env_vars
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime, timedelta, timezone
+
+import http_client
+import metrics
+import resilience
+import tracing
+from config import config
+from content_item import ContentItem
+from content_library import library
+from dedup import dedupe
+from feed_parser import parse_feed
+from feed_store import FeedStore
+from logging_config import configure_logging
+from query_batch import attribute, split_batches, term_words
+from reddit_client import reddit
+from result_cache import ResultCache, search_cache, normalize_term
+from singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
 
 # ============================================================================
 # EXISTING SOURCES (NewsAPI, Reddit, PubMed)
 # ============================================================================
 
-def search_news(topic):
-    """Search NewsAPI for articles"""
-    print(f"📰 Searching NewsAPI for: {topic}")
-    env_vars = load_env_file()
-    api_key = env_vars.get('NEWS_API_KEY')
-    
-    if not api_key:
-        print("❌ No NewsAPI key found!")
-        return []
-    
-    base_url = "https://newsapi.org/v2/everything"
+# Incremental harvests fetch pages of this size, and at most this many of them
+HARVEST_PAGE_SIZE = 20
+MAX_HARVEST_PAGES = 5
+
+def _utc(timestamp, format='%Y-%m-%dT%H:%M:%SZ'):
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime(format)
+
+NEWS_API_URL = "https://newsapi.org/v2/everything"
+
+def _news_articles(topic, api_key, page_size, since=None, page=1):
+    """Fetch one page of NewsAPI articles, newest first (optionally only those after since)"""
     params = {
         'q': topic,
         'sortBy': 'publishedAt',
-        'pageSize': 5,
+        'pageSize': page_size,
         'apiKey': api_key
     }
+    if since is not None:
+        params['from'] = _utc(since)
+    if page > 1:
+        params['page'] = page
+    
+    url = NEWS_API_URL + '?' + urllib.parse.urlencode(params)
+    data = http_client.get_json(url, timeout=10)
+    
+    articles = []
+    for article in data.get('articles', []):
+        articles.append(ContentItem(
+            title=article['title'],
+            source=f"News: {article['source']['name']}",
+            url=article['url'],
+            date=article['publishedAt'],
+            type='news',
+            snippet=(article.get('description') or 'No description available.')[:200] + "..."
+        ))
+    return articles
+
+def search_news(topic):
+    """Search NewsAPI for articles"""
+    logger.debug("📰 Searching NewsAPI for: %s", topic)
+    api_key = config.get('NEWS_API_KEY')
     
-    url = base_url + '?' + urllib.parse.urlencode(params)
+    if not api_key:
+        logger.warning("❌ No NewsAPI key found!")
+        return []
     
     try:
-        req = urllib.request.Request(url)
-        with urllib.request.urlopen(req, context=ssl_context) as response:
-            data = json.loads(response.read().decode())
-        
-        articles = []
-        for article in data.get('articles', []):
-            articles.append({
-                'title': article['title'],
-                'source': f"News: {article['source']['name']}",
-                'url': article['url'],
-                'date': article['publishedAt'],
-                'type': 'news',
-                'snippet': article.get('description', 'No description available.')[:200] + "..."
-            })
-        print(f"   ✅ Found {len(articles)} news articles")
+        articles = _news_articles(topic, api_key, 5)
+        logger.debug("✅ Found %s news articles", len(articles))
         return articles
+    except resilience.HostUnavailable:
+        raise
     except Exception as e:
-        print(f"   ❌ NewsAPI error: {e}")
+        logger.warning("❌ NewsAPI error: %s", e)
         return []
 
+def harvest_news(topic, since, page):
+    """One page of NewsAPI articles, newest first, published after since"""
+    api_key = config.get('NEWS_API_KEY')
+    if not api_key:
+        raise ValueError("No NewsAPI key found")
+    return _news_articles(topic, api_key, HARVEST_PAGE_SIZE, since, page + 1)
+
 def get_reddit_token():
-    """Get Reddit access token"""
-    print("🔄 Getting Reddit token...")
-    env_vars = load_env_file()
-    client_id = env_vars.get('REDDIT_CLIENT_ID')
-    client_secret = env_vars.get('REDDIT_CLIENT_SECRET')
-    
-    if not client_id or not client_secret:
-        print("❌ Reddit credentials missing!")
-        return None
-    
-    credentials = f"{client_id}:{client_secret}"
-    encoded_credentials = base64.b64encode(credentials.encode()).decode()
-    
-    url = "https://www.reddit.com/api/v1/access_token"
-    data = urllib.parse.urlencode({'grant_type': 'client_credentials'}).encode()
-    
-    req = urllib.request.Request(url, data=data, method='POST')
-    req.add_header('Authorization', f'Basic {encoded_credentials}')
-    req.add_header('User-Agent', 'SoundMindAgent/1.0')
+    """Get a valid Reddit access token, refreshing it ahead of expiry"""
+    return reddit.get_token()
+
+def search_reddit(topic, token=None):
+    """Search Reddit for discussions across all configured subreddits"""
+    logger.debug("💬 Searching Reddit for: %s", topic)
     
     try:
-        with urllib.request.urlopen(req, context=ssl_context) as response:
-            token_data = json.loads(response.read().decode())
-            print("   ✅ Reddit token obtained")
-            return token_data.get('access_token')
+        data = reddit.search(topic, token)
+    except resilience.HostUnavailable:
+        raise
     except Exception as e:
-        print(f"   ❌ Reddit token error: {e}")
-        return None
-
-def search_reddit(topic, token):
-    """Search Reddit for discussions"""
-    print(f"💬 Searching Reddit for: {topic}")
-    if not token:
-        print("   ❌ No Reddit token available")
+        logger.warning("❌ Reddit search error: %s", e)
         return []
     
-    subreddits = ['Meditation', 'soundhealing', 'BinauralBeats', 'ambientmusic', 'WeAreTheMusicMakers']
-    all_posts = []
+    if data is None:
+        logger.warning("❌ No Reddit token available")
+        return []
     
-    for subreddit in subreddits[:3]:  # Limit to avoid rate limits
-        url = f"https://oauth.reddit.com/r/{subreddit}/search"
-        params = {
-            'q': topic,
-            'sort': 'relevance',
-            'limit': 3,
-            'restrict_sr': 'true'
-        }
-        
-        full_url = url + '?' + urllib.parse.urlencode(params)
-        
-        req = urllib.request.Request(full_url)
-        req.add_header('Authorization', f'Bearer {token}')
-        req.add_header('User-Agent', 'SoundMindAgent/1.0')
-        
-        try:
-            with urllib.request.urlopen(req, context=ssl_context) as response:
-                data = json.loads(response.read().decode())
-            
-            for post in data.get('data', {}).get('children', []):
-                post_data = post['data']
-                all_posts.append({
-                    'title': post_data['title'],
-                    'source': f"Reddit: r/{subreddit}",
-                    'url': f"https://reddit.com{post_data['permalink']}",
-                    'date': datetime.fromtimestamp(post_data['created_utc']).isoformat(),
-                    'type': 'reddit',
-                    'score': post_data['score'],
-                    'snippet': post_data.get('selftext', 'Reddit discussion thread')[:200] + "..."
-                })
-        except Exception as e:
-            print(f"   ❌ Reddit search error for r/{subreddit}: {e}")
-            continue
+    all_posts = []
+    for post in data.get('data', {}).get('children', []):
+        post_data = post['data']
+        all_posts.append(ContentItem(
+            title=post_data['title'],
+            source=f"Reddit: r/{post_data['subreddit']}",
+            url=f"https://reddit.com{post_data['permalink']}",
+            date=datetime.fromtimestamp(post_data['created_utc'], timezone.utc).isoformat(),
+            timestamp=post_data['created_utc'],
+            date_precision='second',
+            type='reddit',
+            score=post_data['score'],
+            snippet=post_data.get('selftext', 'Reddit discussion thread')[:200] + "..."
+        ))
     
-    print(f"   ✅ Found {len(all_posts)} Reddit posts")
+    logger.debug("✅ Found %s Reddit posts", len(all_posts))
     return all_posts
 
-def search_pubmed(topic):
-    """Search PubMed for research"""
-    print(f"🔬 Searching PubMed for: {topic}")
-    search_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
+PUBMED_ESEARCH_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
+PUBMED_ESUMMARY_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esummary.fcgi"
+PUBMED_RESULTS_PER_TERM = 5
+
+# NCBI allows 3 requests/second without an API key
+PUBMED_MAX_CONCURRENT = 3
+
+# Summaries by PMID, so overlapping terms never fetch the same paper twice
+pubmed_summaries = ResultCache(max_entries=4096, table='pubmed_summaries')
+
+def _pubmed_esearch(topic):
+    """Get the top PMIDs for one topic (empty on error)"""
     search_params = {
         'db': 'pubmed',
         'term': topic,
-        'retmax': 5,
+        'retmax': PUBMED_RESULTS_PER_TERM,
         'retmode': 'json'
     }
-    
-    search_full_url = search_url + '?' + urllib.parse.urlencode(search_params)
+    search_full_url = PUBMED_ESEARCH_URL + '?' + urllib.parse.urlencode(search_params)
     
     try:
-        req = urllib.request.Request(search_full_url)
-        with urllib.request.urlopen(req, context=ssl_context) as response:
-            search_data = json.loads(response.read().decode())
-        
-        id_list = search_data.get('esearchresult', {}).get('idlist', [])
-        
-        if not id_list:
-            print(f"   ❌ No PubMed articles found for '{topic}'")
-            return []
-        
-        fetch_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esummary.fcgi"
-        fetch_params = {
+        search_data = http_client.get_json(search_full_url, timeout=10)
+    except resilience.HostUnavailable:
+        raise
+    except Exception as e:
+        logger.warning("❌ PubMed search error for '%s': %s", topic, e)
+        return []
+    return search_data.get('esearchresult', {}).get('idlist', [])
+
+def _pubmed_summaries(pmids):
+    """Get {pmid: summary} for PMIDs, fetching only uncached ones in a single esummary call"""
+    summaries = {}
+    missing = []
+    for pmid in dict.fromkeys(pmids):
+        summary = pubmed_summaries.get('pubmed_summary', pmid)
+        if summary is not None:
+            summaries[pmid] = summary
+        else:
+            missing.append(pmid)
+    
+    if missing:
+        # POST so a long id list from a big batch never hits URL length limits
+        fetch_data = http_client.post_form(PUBMED_ESUMMARY_URL, {
             'db': 'pubmed',
-            'id': ','.join(id_list),
+            'id': ','.join(missing),
             'retmode': 'json'
-        }
-        
-        fetch_full_url = fetch_url + '?' + urllib.parse.urlencode(fetch_params)
-        
-        req = urllib.request.Request(fetch_full_url)
-        with urllib.request.urlopen(req, context=ssl_context) as response:
-            fetch_data = json.loads(response.read().decode())
-        
-        articles = []
+        }, timeout=15)
         result_data = fetch_data.get('result', {})
         
-        for pmid in id_list:
+        for pmid in missing:
             if pmid in result_data:
                 article = result_data[pmid]
-                articles.append({
+                summary = {
                     'title': article.get('title', 'No title'),
-                    'source': f"Research: {article.get('source', 'PubMed')}",
-                    'url': f"https://pubmed.ncbi.nlm.nih.gov/{pmid}/",
-                    'date': article.get('pubdate', 'Unknown'),
-                    'type': 'research',
-                    'snippet': f"Research paper published in {article.get('source', 'academic journal')}. Click to read full abstract and details."
-                })
-        
-        print(f"   ✅ Found {len(articles)} research papers")
-        return articles
+                    'source': article.get('source', ''),
+                    'pubdate': article.get('pubdate', 'Unknown')
+                }
+                pubmed_summaries.set('pubmed_summary', pmid, summary)
+                summaries[pmid] = summary
+    
+    return summaries
+
+def _pubmed_articles(id_list, summaries):
+    """Build research items for PMIDs, in idlist order"""
+    articles = []
+    for pmid in id_list:
+        if pmid in summaries:
+            article = summaries[pmid]
+            articles.append(ContentItem(
+                title=article['title'],
+                source=f"Research: {article['source'] or 'PubMed'}",
+                url=f"https://pubmed.ncbi.nlm.nih.gov/{pmid}/",
+                date=article['pubdate'],
+                type='research',
+                snippet=f"Research paper published in {article['source'] or 'academic journal'}. Click to read full abstract and details."
+            ))
+    return articles
+
+def search_pubmed_batch(topics):
+    """Search PubMed for several topics at once, returning {topic: articles}
+
+    Each topic needs its own esearch (for its own top PMIDs), but the
+    summaries for every topic come from one esummary call, and PMIDs already
+    summarized are served from cache.
+    """
+    logger.debug("🔬 Searching PubMed for %s topic(s): %s", len(topics), topics)
+    
+    with ThreadPoolExecutor(max_workers=PUBMED_MAX_CONCURRENT) as pool:
+        id_lists = dict(zip(topics, pool.map(_pubmed_esearch, topics)))
+    
+    all_ids = [pmid for id_list in id_lists.values() for pmid in id_list]
+    if not all_ids:
+        logger.debug("❌ No PubMed articles found")
+        return {topic: [] for topic in topics}
+    
+    try:
+        summaries = _pubmed_summaries(all_ids)
+    except resilience.HostUnavailable:
+        raise
     except Exception as e:
-        print(f"   ❌ PubMed error: {e}")
-        return []
+        logger.warning("❌ PubMed error: %s", e)
+        return {topic: [] for topic in topics}
+    
+    results = {topic: _pubmed_articles(id_list, summaries) for topic, id_list in id_lists.items()}
+    
+    logger.debug("✅ Found %s research papers", sum(len(a) for a in results.values()))
+    return results
+
+def search_pubmed(topic):
+    """Search PubMed for research"""
+    return search_pubmed_batch([topic])[topic]
+
+def harvest_pubmed(topic, since, page):
+    """One page of PubMed articles, newest first, added to PubMed after since"""
+    params = {
+        'db': 'pubmed',
+        'term': topic,
+        'retmax': HARVEST_PAGE_SIZE,
+        'retstart': page * HARVEST_PAGE_SIZE,
+        'sort': 'pub_date',
+        'retmode': 'json'
+    }
+    if since is not None:
+        # Entrez date = when the record was added, which is what "new to us" means
+        params.update(datetype='edat', mindate=_utc(since, '%Y/%m/%d'), maxdate='3000')
+    
+    url = PUBMED_ESEARCH_URL + '?' + urllib.parse.urlencode(params)
+    id_list = http_client.get_json(url, timeout=10).get('esearchresult', {}).get('idlist', [])
+    return _pubmed_articles(id_list, _pubmed_summaries(id_list)) if id_list else []
 
 # ============================================================================
 # NEW DATA SOURCES
 # ============================================================================
 
+# Channel feeds searched for videos (their content doesn't depend on the topic)
+YOUTUBE_CHANNELS = {
+    'Meditative Mind': 'UCN4vyryy6O4GlIXcXTIuZQQ',
+    'Jason Stephenson': 'UCNfVZjGzUfUOWjKIwxC_2kw',
+    'Michael Sealey': 'UCggB0khNZsT8Oj7M2YQ5d4Q',
+    'Soothing Relaxation': 'UCSXm6c-n6lsjtyjvdD0bFVw'
+}
+VIDEOS_PER_CHANNEL = 3
+
+def parse_youtube_feed(chunks):
+    """Parse the newest entries of a YouTube channel feed into title/link/date dicts"""
+    entries = parse_feed(chunks, max_entries=VIDEOS_PER_CHANNEL)
+    return [
+        {
+            'title': entry['title'],
+            'link': entry['link'],
+            'date': entry['published'] or "Unknown"
+        }
+        for entry in entries if entry['title'] and entry['link']
+    ]
+
+# Parsed channel feeds shared by every search term
+youtube_feeds = FeedStore(parse_youtube_feed)
+
 def search_youtube(topic):
     """Search YouTube for videos (using RSS feeds and search)"""
-    print(f"📺 Searching YouTube for: {topic}")
+    logger.debug("📺 Searching YouTube for: %s", topic)
     
     try:
         videos = []
         
-        # Method 1: Try known working channels with updated IDs
-        channels = {
-            'Meditative Mind': 'UCN4vyryy6O4GlIXcXTIuZQQ',
-            'Jason Stephenson': 'UCNfVZjGzUfUOWjKIwxC_2kw',
-            'Michael Sealey': 'UCggB0khNZsT8Oj7M2YQ5d4Q',
-            'Soothing Relaxation': 'UCSXm6c-n6lsjtyjvdD0bFVw'
-        }
+        # Method 1: Filter the shared channel feeds by topic
+        topic_words = topic.lower().split()
         
-        for channel_name, channel_id in channels.items():
+        for channel_name, channel_id in YOUTUBE_CHANNELS.items():
             try:
                 rss_url = f"https://www.youtube.com/feeds/videos.xml?channel_id={channel_id}"
+                entries = youtube_feeds.get_entries(rss_url, timeout=10)
                 
-                req = urllib.request.Request(rss_url)
-                req.add_header('User-Agent', 'SoundMindAgent/1.0')
-                
-                with urllib.request.urlopen(req, context=ssl_context, timeout=10) as response:
-                    content = response.read().decode()
-                
-                # Parse XML content for video information
-                import re
-                
-                # Extract video entries
-                entry_pattern = r'<entry>(.*?)</entry>'
-                entries = re.findall(entry_pattern, content, re.DOTALL)
-                
-                for entry in entries[:3]:  # Limit to 3 videos per channel
-                    # Extract title
-                    title_match = re.search(r'<title>(.*?)</title>', entry)
-                    # Extract link
-                    link_match = re.search(r'<link rel="alternate" href="(.*?)"', entry)
-                    # Extract date
-                    date_match = re.search(r'<published>(.*?)</published>', entry)
+                for entry in entries:
+                    # Filter videos that mention our topic (case insensitive)
+                    title_lower = entry['title'].lower()
                     
-                    if title_match and link_match:
-                        title = title_match.group(1).strip()
-                        link = link_match.group(1)
-                        date = date_match.group(1) if date_match else "Unknown"
-                        
-                        # Filter videos that mention our topic (case insensitive)
-                        topic_words = topic.lower().split()
-                        title_lower = title.lower()
-                        
-                        if any(word in title_lower for word in topic_words):
-                            videos.append({
-                                'title': title,
-                                'source': f"YouTube: {channel_name}",
-                                'url': link,
-                                'date': date,
-                                'type': 'video',
-                                'snippet': f"Video content about {topic} from {channel_name}"
-                            })
+                    if any(word in title_lower for word in topic_words):
+                        videos.append(ContentItem(
+                            title=entry['title'],
+                            source=f"YouTube: {channel_name}",
+                            url=entry['link'],
+                            date=entry['date'],
+                            type='video',
+                            snippet=f"Video content about {topic} from {channel_name}"
+                        ))
                 
-                print(f"   ✅ {channel_name}: Found relevant videos")
+                logger.debug("✅ %s: Found relevant videos", channel_name)
                 
+            except resilience.HostUnavailable:
+                raise
             except Exception as e:
-                print(f"   ⚠️  {channel_name}: {str(e)[:50]}...")
+                logger.warning("⚠️ %s: %s...", channel_name, str(e)[:50])
                 continue
         
         # Method 2: If no results from channels, create some generic search results
         if not videos:
-            print(f"   🔄 No RSS results, generating search suggestions...")
+            logger.debug("🔄 No RSS results, generating search suggestions...")
             
             # Create direct YouTube search links as fallback
             search_terms = [topic, f"{topic} music", f"{topic} guided"]
@@ -284,103 +337,143 @@ def search_youtube(topic):
                 encoded_term = urllib.parse.quote_plus(search_term)
                 search_url = f"https://www.youtube.com/results?search_query={encoded_term}"
                 
-                videos.append({
-                    'title': f"YouTube search: {search_term}",
-                    'source': "YouTube: Search Results",
-                    'url': search_url,
-                    'date': datetime.now().isoformat(),
-                    'type': 'video',
-                    'snippet': f"Click to search YouTube directly for '{search_term}' content"
-                })
-        
-        print(f"   ✅ Found {len(videos)} YouTube videos/searches")
+                videos.append(ContentItem(
+                    title=f"YouTube search: {search_term}",
+                    source="YouTube: Search Results",
+                    url=search_url,
+                    date=datetime.now().isoformat(),
+                    type='video',
+                    snippet=f"Click to search YouTube directly for '{search_term}' content"
+                ))
+        
+        logger.debug("✅ Found %s YouTube videos/searches", len(videos))
         return videos
         
+    except resilience.HostUnavailable:
+        raise
     except Exception as e:
-        print(f"   ❌ YouTube search error: {e}")
+        logger.warning("❌ YouTube search error: %s", e)
         
         # Emergency fallback - return search links
         try:
             encoded_topic = urllib.parse.quote_plus(topic)
             search_url = f"https://www.youtube.com/results?search_query={encoded_topic}"
             
-            return [{
-                'title': f"Search YouTube for '{topic}'",
-                'source': "YouTube: Direct Search",
-                'url': search_url,
-                'date': datetime.now().isoformat(),
-                'type': 'video',
-                'snippet': f"Click to search YouTube directly for {topic} videos"
-            }]
+            return [ContentItem(
+                title=f"Search YouTube for '{topic}'",
+                source="YouTube: Direct Search",
+                url=search_url,
+                date=datetime.now().isoformat(),
+                type='video',
+                snippet=f"Click to search YouTube directly for {topic} videos"
+            )]
         except:
             return []
 
+ARXIV_API_URL = "http://export.arxiv.org/api/query"
+ARXIV_RESULTS_PER_TERM = 5
+
+# Entries asked for per topic in an OR-query; the union is sorted by date, so a
+# wide window keeps busy topics from crowding quiet ones out (and fallbacks rare)
+ARXIV_BATCH_WINDOW_PER_TERM = 20
+
+# Terms OR-ed into one arXiv query, kept well under URL length limits
+ARXIV_MAX_QUERY_LENGTH = 1000
+ARXIV_MAX_BATCH_TERMS = 8
+
+def _arxiv_entries(search_query, max_results, start=0):
+    """Fetch the newest arXiv entries for a search_query"""
+    params = {
+        'search_query': search_query,
+        'start': start,
+        'max_results': max_results,
+        'sortBy': 'submittedDate',
+        'sortOrder': 'descending'
+    }
+    url = ARXIV_API_URL + '?' + urllib.parse.urlencode(params)
+    
+    with http_client.open_stream('GET', url, timeout=15) as response, \
+            tracing.span('parse arxiv feed', 'parse'):
+        entries = parse_feed(response.iter_chunks(), max_entries=max_results)
+    return [entry for entry in entries if entry['title'] and entry['id']]
+
+def _arxiv_paper(entry):
+    summary = ' '.join(entry['summary'].split())
+    return ContentItem(
+        title=' '.join(entry['title'].split()),
+        source="Academic: arXiv",
+        url=entry['id'],
+        date=entry['published'] or "Unknown",
+        type='academic',
+        snippet=summary[:200] + "..." if summary else "No summary available"
+    )
+
+def _arxiv_batch_query(topics):
+    """OR together one all-words clause per topic"""
+    clauses = []
+    for topic in topics:
+        words = [f'all:{word}' for word in term_words(topic)]
+        if not words:
+            # split_batches() never batches these; an empty () would break the query
+            continue
+        clauses.append(words[0] if len(words) == 1 else '(' + ' AND '.join(words) + ')')
+    return ' OR '.join(clauses)
+
 def search_arxiv(topic):
     """Search arXiv for academic papers"""
-    print(f"📚 Searching arXiv for: {topic}")
+    logger.debug("📚 Searching arXiv for: %s", topic)
     
     try:
-        base_url = "http://export.arxiv.org/api/query"
-        params = {
-            'search_query': f'all:{topic}',
-            'start': 0,
-            'max_results': 5,
-            'sortBy': 'submittedDate',
-            'sortOrder': 'descending'
-        }
-        
-        url = base_url + '?' + urllib.parse.urlencode(params)
-        
-        req = urllib.request.Request(url)
-        req.add_header('User-Agent', 'SoundMindAgent/1.0')
-        
-        with urllib.request.urlopen(req, context=ssl_context, timeout=15) as response:
-            content = response.read().decode()
-        
-        # Simple XML parsing for arXiv results
-        import re
-        
-        # Extract paper information using regex
-        entry_pattern = r'<entry>(.*?)</entry>'
-        title_pattern = r'<title>(.*?)</title>'
-        summary_pattern = r'<summary>(.*?)</summary>'
-        link_pattern = r'<id>(http://arxiv\.org/abs/.*?)</id>'
-        date_pattern = r'<published>(.*?)</published>'
-        
-        entries = re.findall(entry_pattern, content, re.DOTALL)
-        papers = []
-        
-        for entry in entries:
-            title_match = re.search(title_pattern, entry)
-            summary_match = re.search(summary_pattern, entry, re.DOTALL)
-            link_match = re.search(link_pattern, entry)
-            date_match = re.search(date_pattern, entry)
-            
-            if title_match and link_match:
-                title = title_match.group(1).strip()
-                summary = summary_match.group(1).strip()[:200] + "..." if summary_match else "No summary available"
-                link = link_match.group(1)
-                date = date_match.group(1) if date_match else "Unknown"
-                
-                papers.append({
-                    'title': title,
-                    'source': "Academic: arXiv",
-                    'url': link,
-                    'date': date,
-                    'type': 'academic',
-                    'snippet': summary
-                })
-        
-        print(f"   ✅ Found {len(papers)} arXiv papers")
+        papers = [_arxiv_paper(entry) for entry in _arxiv_entries(f'all:{topic}', ARXIV_RESULTS_PER_TERM)]
+        logger.debug("✅ Found %s arXiv papers", len(papers))
         return papers
         
+    except resilience.HostUnavailable:
+        raise
     except Exception as e:
-        print(f"   ❌ arXiv search error: {e}")
+        logger.warning("❌ arXiv search error: %s", e)
         return []
 
+def harvest_arxiv(topic, since, page):
+    """One page of arXiv papers, newest first, submitted after since"""
+    search_query = f'all:{topic}'
+    if since is not None:
+        search_query += f" AND submittedDate:[{_utc(since, '%Y%m%d%H%M')} TO 999912312359]"
+    entries = _arxiv_entries(search_query, HARVEST_PAGE_SIZE, start=page * HARVEST_PAGE_SIZE)
+    return [_arxiv_paper(entry) for entry in entries]
+
+def search_arxiv_batch(topics):
+    """Search arXiv for several topics with OR-queries, yielding (topic, papers) per batch
+
+    Papers are credited to the topics whose words they contain. A topic the
+    combined query turned up nothing for is yielded with None, for the
+    caller to search on its own rather than holding up the rest of the batch.
+    """
+    for batch in split_batches(topics, _arxiv_batch_query, ARXIV_MAX_QUERY_LENGTH, ARXIV_MAX_BATCH_TERMS):
+        if len(batch) == 1:
+            yield batch[0], search_arxiv(batch[0])
+            continue
+        
+        logger.debug("📚 Searching arXiv for %s topics: %s", len(batch), batch)
+        try:
+            entries = _arxiv_entries(_arxiv_batch_query(batch), ARXIV_BATCH_WINDOW_PER_TERM * len(batch))
+        except resilience.HostUnavailable:
+            raise
+        except Exception as e:
+            logger.warning("❌ arXiv search error: %s", e)
+            for topic in batch:
+                yield topic, []
+            continue
+        
+        matched = attribute(entries, batch, lambda entry: entry['title'] + ' ' + entry['summary'],
+                            ARXIV_RESULTS_PER_TERM)
+        logger.debug("✅ Found %s arXiv papers", len(entries))
+        for topic in batch:
+            yield topic, [_arxiv_paper(entry) for entry in matched[topic]] or None
+
 def search_podcasts(topic):
     """Search for podcasts using iTunes/Apple Podcasts API"""
-    print(f"🎙️ Searching Podcasts for: {topic}")
+    logger.debug("🎙️ Searching Podcasts for: %s", topic)
     
     try:
         base_url = "https://itunes.apple.com/search"
@@ -391,141 +484,181 @@ def search_podcasts(topic):
         }
         
         url = base_url + '?' + urllib.parse.urlencode(params)
-        
-        req = urllib.request.Request(url)
-        req.add_header('User-Agent', 'SoundMindAgent/1.0')
-        
-        with urllib.request.urlopen(req, context=ssl_context, timeout=10) as response:
-            data = json.loads(response.read().decode())
+        data = http_client.get_json(url, timeout=10)
         
         podcasts = []
         for result in data.get('results', []):
-            podcasts.append({
-                'title': result.get('trackName', 'Unknown Podcast'),
-                'source': f"Podcast: {result.get('artistName', 'Unknown Artist')}",
-                'url': result.get('trackViewUrl', ''),
-                'date': result.get('releaseDate', 'Unknown'),
-                'type': 'podcast',
-                'snippet': result.get('description', f"Podcast about {topic}")[:200] + "..."
-            })
-        
-        print(f"   ✅ Found {len(podcasts)} podcasts")
+            podcasts.append(ContentItem(
+                title=result.get('trackName', 'Unknown Podcast'),
+                source=f"Podcast: {result.get('artistName', 'Unknown Artist')}",
+                url=result.get('trackViewUrl', ''),
+                date=result.get('releaseDate', 'Unknown'),
+                type='podcast',
+                snippet=result.get('description', f"Podcast about {topic}")[:200] + "..."
+            ))
+        
+        logger.debug("✅ Found %s podcasts", len(podcasts))
         return podcasts
         
+    except resilience.HostUnavailable:
+        raise
     except Exception as e:
-        print(f"   ❌ Podcast search error: {e}")
+        logger.warning("❌ Podcast search error: %s", e)
         return []
 
+MEDIUM_ARTICLE_LIMIT = 3
+
 def search_medium(topic):
     """Search Medium articles (using RSS feeds)"""
-    print(f"✍️ Searching Medium for: {topic}")
+    logger.debug("✍️ Searching Medium for: %s", topic)
     
     try:
         # Medium RSS search by tag
         search_terms = topic.replace(' ', '-').lower()
         rss_url = f"https://medium.com/feed/tag/{search_terms}"
         
-        req = urllib.request.Request(rss_url)
-        req.add_header('User-Agent', 'SoundMindAgent/1.0')
-        
-        try:
-            with urllib.request.urlopen(req, context=ssl_context, timeout=10) as response:
-                content = response.read().decode()
-        except:
-            # If tag-specific search fails, try general Medium feed
-            rss_url = "https://medium.com/feed/topic/wellness"
-            req = urllib.request.Request(rss_url)
-            req.add_header('User-Agent', 'SoundMindAgent/1.0')
-            with urllib.request.urlopen(req, context=ssl_context, timeout=10) as response:
-                content = response.read().decode()
+        topic_words = [word.lower() for word in topic.split()]
         
-        # Simple XML parsing for Medium articles
-        import re
+        # Keep articles that mention our topic, stopping once we have enough
+        def mentions_topic(entry):
+            text = (entry['title'] + ' ' + entry['summary']).lower()
+            return bool(entry['link']) and any(word in text for word in topic_words)
         
-        title_pattern = r'<title><!\[CDATA\[(.*?)\]\]></title>'
-        link_pattern = r'<link>(https://medium\.com/.*?)</link>'
-        date_pattern = r'<pubDate>(.*?)</pubDate>'
-        description_pattern = r'<description><!\[CDATA\[(.*?)\]\]></description>'
+        def read_articles(url):
+            with http_client.open_stream('GET', url, timeout=10) as response, \
+                    tracing.span('parse medium feed', 'parse'):
+                return parse_feed(response.iter_chunks(), max_entries=MEDIUM_ARTICLE_LIMIT,
+                                  match=mentions_topic)
         
-        titles = re.findall(title_pattern, content)
-        links = re.findall(link_pattern, content)
-        dates = re.findall(date_pattern, content)
-        descriptions = re.findall(description_pattern, content)
+        try:
+            entries = read_articles(rss_url)
+        except resilience.HostUnavailable:
+            raise
+        except Exception:
+            # If tag-specific search fails, try general Medium feed
+            entries = read_articles("https://medium.com/feed/topic/wellness")
         
         articles = []
+        for entry in entries:
+            articles.append(ContentItem(
+                title=entry['title'],
+                source="Blog: Medium",
+                url=entry['link'],
+                date=entry['published'] or "Unknown",
+                type='blog',
+                snippet=entry['summary'][:200] + "..." if entry['summary'] else f"Medium article about {topic}"
+            ))
         
-        # Filter articles that mention our topic
-        for i, title in enumerate(titles):
-            if any(word.lower() in title.lower() for word in topic.split()) or \
-               any(word.lower() in descriptions[i].lower() for word in topic.split() if i < len(descriptions)):
-                
-                if i < len(links):
-                    snippet = descriptions[i][:200] + "..." if i < len(descriptions) else f"Medium article about {topic}"
-                    articles.append({
-                        'title': title,
-                        'source': "Blog: Medium",
-                        'url': links[i],
-                        'date': dates[i] if i < len(dates) else "Unknown",
-                        'type': 'blog',
-                        'snippet': snippet
-                    })
-        
-        print(f"   ✅ Found {len(articles)} Medium articles")
-        return articles[:3]  # Limit results
+        logger.debug("✅ Found %s Medium articles", len(articles))
+        return articles
         
+    except resilience.HostUnavailable:
+        raise
     except Exception as e:
-        print(f"   ❌ Medium search error: {e}")
+        logger.warning("❌ Medium search error: %s", e)
         return []
 
+GITHUB_SEARCH_URL = "https://api.github.com/search/repositories"
+GITHUB_RESULTS_PER_TERM = 5
+
+# Repositories asked for per topic in an OR-query (GitHub pages cap at 100)
+GITHUB_BATCH_WINDOW_PER_TERM = 15
+GITHUB_MAX_PER_PAGE = 100
+
+# GitHub caps search queries at 256 characters and five AND/OR/NOT operators
+GITHUB_MAX_QUERY_LENGTH = 256
+GITHUB_MAX_BATCH_TERMS = 6
+
+def _github_repos(query, per_page, page=1):
+    """Fetch the most recently updated repositories matching a search query"""
+    params = {
+        'q': query,
+        'sort': 'updated',
+        'order': 'desc',
+        'per_page': per_page
+    }
+    if page > 1:
+        params['page'] = page
+    github_token = config.get('GITHUB_TOKEN')
+    
+    url = GITHUB_SEARCH_URL + '?' + urllib.parse.urlencode(params)
+
+    headers = {'Accept': 'application/vnd.github.v3+json'}
+    if github_token:
+        headers['Authorization'] = f'token {github_token}'
+    
+    return http_client.get_json(url, headers=headers, timeout=10).get('items', [])
+
+def _github_repo(repo, topic):
+    return ContentItem(
+        title=repo['name'],
+        source=f"GitHub: {repo['owner']['login']}",
+        url=repo['html_url'],
+        date=repo['updated_at'],
+        type='code',
+        snippet=(repo.get('description') or f"GitHub repository related to {topic}")[:200] + "...",
+        stars=repo['stargazers_count']
+    )
+
+def _github_batch_query(topics):
+    """OR together the topics, quoting multi-word ones as phrases"""
+    return ' OR '.join(f'"{topic}"' if ' ' in topic.strip() else topic for topic in topics)
+
+def _github_text(repo):
+    return ' '.join([repo['name'], repo.get('description') or ''] + repo.get('topics', []))
+
 def search_github(topic):
     """Search GitHub repositories"""
-    print(f"💻 Searching GitHub for: {topic}")
+    logger.debug("💻 Searching GitHub for: %s", topic)
     
     try:
-        base_url = "https://api.github.com/search/repositories"
-        params = {
-            'q': topic,
-            'sort': 'updated',
-            'order': 'desc',
-            'per_page': 5
-        }
-        env_vars = load_env_file()
-        github_token = env_vars.get('GITHUB_TOKEN')        
-        
-        url = base_url + '?' + urllib.parse.urlencode(params)
-
-        req = urllib.request.Request(url)
-        req.add_header('User-Agent', 'SoundMindAgent/1.0')
-        req.add_header('Accept', 'application/vnd.github.v3+json')
-        
-        if github_token:
-            req.add_header('Authorization', f'token {github_token}')
-        
-        with urllib.request.urlopen(req, context=ssl_context, timeout=10) as response:
-            data = json.loads(response.read().decode())
-        
-        repos = []
-        for repo in data.get('items', []):
-            repos.append({
-                'title': repo['name'],
-                'source': f"GitHub: {repo['owner']['login']}",
-                'url': repo['html_url'],
-                'date': repo['updated_at'],
-                'type': 'code',
-                'snippet': repo.get('description', f"GitHub repository related to {topic}")[:200] + "...",
-                'stars': repo['stargazers_count']
-            })
-        
-        print(f"   ✅ Found {len(repos)} GitHub repositories")
+        repos = [_github_repo(repo, topic) for repo in _github_repos(topic, GITHUB_RESULTS_PER_TERM)]
+        logger.debug("✅ Found %s GitHub repositories", len(repos))
         return repos
         
+    except resilience.HostUnavailable:
+        raise
     except Exception as e:
-        print(f"   ❌ GitHub search error: {e}")
+        logger.warning("❌ GitHub search error: %s", e)
         return []
 
+def harvest_github(topic, since, page):
+    """One page of repositories, most recently updated first, pushed to after since"""
+    query = topic if since is None else f"{topic} pushed:>{_utc(since)}"
+    return [_github_repo(repo, topic) for repo in _github_repos(query, HARVEST_PAGE_SIZE, page + 1)]
+
+def search_github_batch(topics):
+    """Search GitHub for several topics with OR-queries, yielding (topic, repos) per batch
+
+    Uses one search-quota slot per batch instead of one per topic. Topics
+    the combined query found nothing for are yielded with None, for the
+    caller to search on their own.
+    """
+    for batch in split_batches(topics, _github_batch_query, GITHUB_MAX_QUERY_LENGTH, GITHUB_MAX_BATCH_TERMS):
+        if len(batch) == 1:
+            yield batch[0], search_github(batch[0])
+            continue
+        
+        logger.debug("💻 Searching GitHub for %s topics: %s", len(batch), batch)
+        try:
+            repos = _github_repos(_github_batch_query(batch),
+                                  min(GITHUB_MAX_PER_PAGE, GITHUB_BATCH_WINDOW_PER_TERM * len(batch)))
+        except resilience.HostUnavailable:
+            raise
+        except Exception as e:
+            logger.warning("❌ GitHub search error: %s", e)
+            for topic in batch:
+                yield topic, []
+            continue
+        
+        matched = attribute(repos, batch, _github_text, GITHUB_RESULTS_PER_TERM)
+        logger.debug("✅ Found %s GitHub repositories", len(repos))
+        for topic in batch:
+            yield topic, [_github_repo(repo, topic) for repo in matched[topic]] or None
+
 def search_google_scholar(topic):
     """Search Google Scholar (simplified scraping approach)"""
-    print(f"🎓 Searching Google Scholar for: {topic}")
+    logger.debug("🎓 Searching Google Scholar for: %s", topic)
     
     try:
         # Note: This is a simplified approach
@@ -534,116 +667,517 @@ def search_google_scholar(topic):
         query = urllib.parse.quote_plus(topic)
         url = f"https://scholar.google.com/scholar?q={query}&hl=en&num=5"
         
-        req = urllib.request.Request(url)
-        req.add_header('User-Agent', 'Mozilla/5.0 (compatible; SoundMindAgent/1.0)')
-        
-        with urllib.request.urlopen(req, context=ssl_context, timeout=15) as response:
-            content = response.read().decode()
+        headers = {'User-Agent': 'Mozilla/5.0 (compatible; SoundMindAgent/1.0)'}
+        content = http_client.get_text(url, headers=headers, timeout=15)
         
         # Simple extraction (very basic - real implementation would need proper parsing)
         papers = []
         
         # For now, return a placeholder indicating Google Scholar integration
-        papers.append({
-            'title': f"Google Scholar results for '{topic}'",
-            'source': "Academic: Google Scholar",
-            'url': url,
-            'date': datetime.now().isoformat(),
-            'type': 'academic',
-            'snippet': f"Click to search Google Scholar directly for academic papers about {topic}"
-        })
-        
-        print(f"   ✅ Generated Google Scholar search link")
+        papers.append(ContentItem(
+            title=f"Google Scholar results for '{topic}'",
+            source="Academic: Google Scholar",
+            url=url,
+            date=datetime.now().isoformat(),
+            type='academic',
+            snippet=f"Click to search Google Scholar directly for academic papers about {topic}"
+        ))
+        
+        logger.debug("✅ Generated Google Scholar search link")
         return papers
         
+    except resilience.HostUnavailable:
+        raise
     except Exception as e:
-        print(f"   ❌ Google Scholar search error: {e}")
+        logger.warning("❌ Google Scholar search error: %s", e)
         return []
 
 # ============================================================================
 # ENHANCED SEARCH ORCHESTRATOR
 # ============================================================================
 
-def search_all_sources(topic, reddit_token=None):
-    """Search all available data sources for a topic"""
-    print(f"\n🔍 COMPREHENSIVE SEARCH FOR: '{topic}'")
-    print("-" * 50)
-    
-    all_results = []
-    
-    # Original sources
+# Order sources are reported in (matches the original sequential search)
+SOURCE_ORDER = [
+    'news', 'reddit', 'pubmed', 'youtube', 'arxiv',
+    'podcasts', 'medium', 'github', 'scholar'
+]
+
+SOURCE_SEARCHES = {
+    'news': search_news,
+    'reddit': search_reddit,
+    'pubmed': search_pubmed,
+    'youtube': search_youtube,
+    'arxiv': search_arxiv,
+    'podcasts': search_podcasts,
+    'medium': search_medium,
+    'github': search_github,
+    'scholar': search_google_scholar
+}
+
+# Upstream hosts each source depends on, for circuit breaker checks
+SOURCE_HOSTS = {
+    'news': ['newsapi.org'],
+    'reddit': ['oauth.reddit.com'],
+    'pubmed': ['eutils.ncbi.nlm.nih.gov'],
+    'youtube': ['www.youtube.com'],
+    'arxiv': ['export.arxiv.org'],
+    'podcasts': ['itunes.apple.com'],
+    'medium': ['medium.com'],
+    'github': ['api.github.com'],
+    'scholar': ['scholar.google.com']
+}
+
+# Sources that can search many terms in one batched upstream call, each yielding
+# (term, results) as they come in - None for a term that needs its own search
+# (iTunes search has no OR operator, so podcasts still go one term at a time)
+SOURCE_BATCH_SEARCHES = {
+    'pubmed': lambda topics: search_pubmed_batch(topics).items(),
+    'arxiv': search_arxiv_batch,
+    'github': search_github_batch
+}
+
+# Seconds each source may take before its results are dropped from a search
+SOURCE_DEADLINES = {
+    'news': 10,
+    'reddit': 10,
+    'pubmed': 12,
+    'youtube': 12,
+    'arxiv': 15,
+    'podcasts': 10,
+    'medium': 12,
+    'github': 10,
+    'scholar': 15
+}
+DEFAULT_SOURCE_DEADLINE = 10
+
+# Upper bound for a whole fan-out search, however many terms it covers
+SEARCH_DEADLINE = 25
+
+# Shared worker pool so concurrent requests can't spawn unbounded threads
+MAX_SEARCH_WORKERS = 16
+_search_executor = ThreadPoolExecutor(
+    max_workers=MAX_SEARCH_WORKERS, thread_name_prefix='source-search'
+)
+
+# Identical concurrent (source, term) fetches share a single upstream call
+_inflight_fetches = SingleFlight()
+
+# One finished (or abandoned) source search for one term
+SourceResult = namedtuple('SourceResult', ['term', 'source', 'results', 'status', 'elapsed', 'cached'])
+
+def fetch_source(source_name, topic):
+    """Search a single source by name, going straight to the upstream"""
+    return SOURCE_SEARCHES[source_name](topic)
+
+def store_results(source_name, topic, results):
+    """Cache a fetch's results and keep its items in the content library
+
+    Storage errors are logged, never raised, so they can't keep a fetch's
+    waiters from getting its results.
+    """
     try:
-        news_results = search_news(topic)
-        all_results.extend(news_results)
+        search_cache.set(source_name, topic, results)
     except Exception as e:
-        print(f"❌ News search failed: {e}")
-    
+        logger.warning("⚠️ Cache write failed for %s '%s': %s", source_name, topic, e)
+    if results:
+        try:
+            library.add(results, topic, source_name)
+        except sqlite3.Error as e:
+            logger.warning("⚠️ Library write failed for %s '%s': %s", source_name, topic, e)
+
+def store_failure(source_name, topic, error):
+    """Cache a failed fetch as no results (unless the host refused it), never raising"""
+    if isinstance(error, resilience.HostUnavailable):
+        # Nothing was asked upstream, so there's no answer to cache
+        return
     try:
-        reddit_results = search_reddit(topic, reddit_token)
-        all_results.extend(reddit_results)
+        search_cache.set(source_name, topic, [])
     except Exception as e:
-        print(f"❌ Reddit search failed: {e}")
-    
+        logger.warning("⚠️ Cache write failed for %s '%s': %s", source_name, topic, e)
+
+def fetch_and_cache(source_name, topic):
+    """Fetch a source from upstream and store the outcome in the result cache"""
     try:
-        pubmed_results = search_pubmed(topic)
-        all_results.extend(pubmed_results)
+        with metrics.source_fetches_in_flight.track(source_name), metrics.source_fetch_duration.time(source_name), \
+                tracing.span(f"fetch {source_name}", 'source', term=topic):
+            results = fetch_source(source_name, topic)
     except Exception as e:
-        print(f"❌ PubMed search failed: {e}")
-    
-    # New sources
+        store_failure(source_name, topic, e)
+        raise
+    store_results(source_name, topic, results)
+    return results
+
+def submit_fetch(source_name, topic):
+    """Start the upstream fetch for (source, normalized term), or join the one already running"""
+    key = (source_name, normalize_term(topic))
+    return _inflight_fetches.submit(
+        key, _search_executor, tracing.bind(fetch_and_cache), source_name, topic
+    )
+
+def source_degraded(source_name):
+    """Whether any of a source's hosts has an open circuit breaker"""
+    return any(
+        resilience.get_breaker(host).state == 'open'
+        for host in SOURCE_HOSTS.get(source_name, [])
+    )
+
+def failure_status(error):
+    """SourceResult status for a failed fetch: degraded (breaker open), rate_limited or error"""
+    if isinstance(error, resilience.CircuitOpen):
+        return 'degraded'
+    if isinstance(error, resilience.RateLimited):
+        return 'rate_limited'
+    return 'error'
+
+def fetch_into(source_name, topic, future):
+    """fetch_and_cache() one topic, resolving a Future claimed for it earlier"""
     try:
-        youtube_results = search_youtube(topic)
-        all_results.extend(youtube_results)
+        future.set_result(fetch_and_cache(source_name, topic))
     except Exception as e:
-        print(f"❌ YouTube search failed: {e}")
-    
+        future.set_exception(e)
+
+def fetch_batch_and_cache(source_name, futures_by_topic):
+    """Run a source's batch search and resolve each topic's Future as its results arrive
+
+    Topics the batch couldn't answer are handed to their own single-term
+    jobs, so they never hold up the topics it did answer. Every claimed
+    Future is resolved whatever happens, or its key would stay in flight and
+    strand every later search for that topic.
+    """
+    unresolved = dict(futures_by_topic)
+    completed = False
+    error = None
     try:
-        arxiv_results = search_arxiv(topic)
-        all_results.extend(arxiv_results)
+        with metrics.source_fetches_in_flight.track(source_name), metrics.source_fetch_duration.time(source_name), \
+                tracing.span(f"fetch {source_name}", 'source', terms=list(futures_by_topic)):
+            for topic, results in SOURCE_BATCH_SEARCHES[source_name](list(futures_by_topic)):
+                if topic not in unresolved:
+                    continue
+                if results is None:
+                    _search_executor.submit(tracing.bind(fetch_into), source_name, topic, unresolved[topic])
+                else:
+                    store_results(source_name, topic, results)
+                    unresolved[topic].set_result(results)
+                del unresolved[topic]
+        completed = True
     except Exception as e:
-        print(f"❌ arXiv search failed: {e}")
+        error = e
+    finally:
+        for topic, future in unresolved.items():
+            if completed:
+                # Topics the batch search never mentioned found nothing
+                store_results(source_name, topic, [])
+                future.set_result([])
+            else:
+                failure = error or RuntimeError(f"{source_name} batch search was interrupted")
+                store_failure(source_name, topic, failure)
+                future.set_exception(failure)
+
+def submit_batch_fetch(source_name, topics):
+    """Start one batched upstream fetch for several topics, joining any already in flight
+
+    Returns {topic: Future}; each Future resolves to that topic's results.
+    """
+    keys = {}
+    for topic in topics:
+        keys.setdefault((source_name, normalize_term(topic)), topic)
     
-    try:
-        podcast_results = search_podcasts(topic)
-        all_results.extend(podcast_results)
-    except Exception as e:
-        print(f"❌ Podcast search failed: {e}")
+    joined, owned = _inflight_fetches.claim(list(keys))
+    if owned:
+        _search_executor.submit(
+            tracing.bind(fetch_batch_and_cache), source_name, {keys[key]: future for key, future in owned.items()}
+        )
     
-    try:
-        medium_results = search_medium(topic)
-        all_results.extend(medium_results)
-    except Exception as e:
-        print(f"❌ Medium search failed: {e}")
+    futures = {**joined, **owned}
+    return {topic: futures[(source_name, normalize_term(topic))] for topic in topics}
+
+def submit_fetches(source_name, topics):
+    """Start fetches for one source's uncached topics - batched if the source supports it"""
+    if source_name in SOURCE_BATCH_SEARCHES and len(topics) > 1:
+        return submit_batch_fetch(source_name, topics)
+    return {topic: submit_fetch(source_name, topic) for topic in topics}
+
+def record_source_result(source_result):
+    """Count a SourceResult answered to a caller in the source metrics (and the request's trace)"""
+    status = 'cached' if source_result.cached else source_result.status
+    metrics.source_searches.inc(source_result.source, status)
+    metrics.source_results.inc(source_result.source, amount=len(source_result.results))
+    trace = tracing.current()
+    if trace:
+        # How long the caller waited for this source x term, fetched here or joined
+        end = time.perf_counter()
+        trace.add(f"source {source_result.source}", 'wait', end - source_result.elapsed, end,
+                  {'term': source_result.term, 'status': status, 'results': len(source_result.results)})
+    return source_result
+
+def search_source(source_name, topic):
+    """Search a single source through the result cache, returning (results, cached)"""
+    results = search_cache.get(source_name, topic)
+    cached = results is not None
+    if not cached:
+        try:
+            results = submit_fetch(source_name, topic).result()
+        except Exception as e:
+            metrics.source_searches.inc(source_name, failure_status(e))
+            raise
+    record_source_result(SourceResult(topic, source_name, results, 'ok', 0.0, cached))
+    return results, cached
+
+def split_cached(terms, source_names):
+    """Answer cache hits (and degraded sources) inline and group the misses by source
+
+    Returns (SourceResults for hits/degraded, {source_name: [uncached terms]}).
+    """
+    hits = []
+    misses = {}
+    for term in dict.fromkeys(terms):
+        for source_name in source_names:
+            cached = search_cache.get(source_name, term)
+            if cached is not None:
+                hits.append(SourceResult(term, source_name, cached, 'ok', 0.0, True))
+            elif source_degraded(source_name):
+                hits.append(SourceResult(term, source_name, [], 'degraded', 0.0, False))
+            else:
+                misses.setdefault(source_name, []).append(term)
+    return hits, misses
+
+def iter_source_results(terms, sources=None, deadline=SEARCH_DEADLINE):
+    """Search every source for every term at once, yielding each SourceResult as it finishes
+
+    Sources that miss their own deadline (or the overall one) are yielded with
+    status 'timeout' and no results; their workers are left to finish in the
+    background (still filling the cache) rather than holding up the search.
+    Sources whose circuit breaker is open are skipped with status 'degraded';
+    fetches refused for lack of rate budget come back as 'rate_limited'.
+    """
+    source_names = [name for name in SOURCE_ORDER if not sources or name in sources]
+    start = time.monotonic()
+    search_deadline = start + deadline
     
-    try:
-        github_results = search_github(topic)
-        all_results.extend(github_results)
-    except Exception as e:
-        print(f"❌ GitHub search failed: {e}")
+    hits, misses = split_cached(terms, source_names)
     
-    try:
-        scholar_results = search_google_scholar(topic)
-        all_results.extend(scholar_results)
-    except Exception as e:
-        print(f"❌ Google Scholar search failed: {e}")
+    pending = {}
+    for source_name, missing_terms in misses.items():
+        source_deadline = min(
+            start + SOURCE_DEADLINES.get(source_name, DEFAULT_SOURCE_DEADLINE), search_deadline
+        )
+        # Terms that normalize alike share one future, so keep every waiter on it
+        for term, future in submit_fetches(source_name, missing_terms).items():
+            pending.setdefault(future, []).append((term, source_name, source_deadline))
+    
+    for hit in hits:
+        yield record_source_result(hit)
     
-    return all_results
+    while pending:
+        next_deadline = min(entry[2] for entries in pending.values() for entry in entries)
+        done, _ = wait(pending, timeout=max(0, next_deadline - time.monotonic()),
+                       return_when=FIRST_COMPLETED)
+        
+        for future in done:
+            entries = pending.pop(future)
+            try:
+                results = future.result()
+                status = 'ok'
+            except Exception as e:
+                results = []
+                status = failure_status(e)
+                logger.warning("❌ %s search failed for '%s': %s", entries[0][1], entries[0][0], e,
+                               extra={'source': entries[0][1], 'term': entries[0][0], 'status': status})
+            for term, source_name, _ in entries:
+                yield record_source_result(
+                    SourceResult(term, source_name, results, status, time.monotonic() - start, False)
+                )
+        
+        now = time.monotonic()
+        for future, entries in list(pending.items()):
+            if future.done():
+                continue
+            expired = [entry for entry in entries if entry[2] <= now]
+            if not expired:
+                continue
+            if len(expired) == len(entries):
+                del pending[future]
+            else:
+                pending[future] = [entry for entry in entries if entry[2] > now]
+            for term, source_name, _ in expired:
+                logger.warning("⏱️ %s missed its deadline for '%s'", source_name, term,
+                               extra={'source': source_name, 'term': term, 'status': 'timeout'})
+                yield record_source_result(SourceResult(term, source_name, [], 'timeout', now - start, False))
 
-def run_enhanced_content_search():
+def search_sources(terms, sources=None, deadline=SEARCH_DEADLINE):
+    """Search all (or the selected) sources for all terms concurrently
+
+    Returns SourceResults ordered by term and then by SOURCE_ORDER, so callers
+    see the same ordering the old sequential search produced.
+    """
+    term_index = {term: i for i, term in reversed(list(enumerate(terms)))}
+    source_index = {name: i for i, name in enumerate(SOURCE_ORDER)}
+    
+    source_results = list(iter_source_results(terms, sources, deadline))
+    source_results.sort(key=lambda r: (term_index[r.term], source_index[r.source]))
+    return source_results
+
+async def async_search_sources(terms, sources=None, deadline=SEARCH_DEADLINE):
+    """Async version of search_sources() for use from asyncio code and async Flask views
+
+    Source searches run on the same worker pool and keep-alive connections as
+    the threaded engine; each one is awaited with its own deadline.
+    """
+    source_names = [name for name in SOURCE_ORDER if not sources or name in sources]
+    start = time.monotonic()
+    
+    hits, misses = split_cached(terms, source_names)
+    answered = {(hit.term, hit.source): hit for hit in hits}
+    futures = {}
+    for source_name, missing_terms in misses.items():
+        for term, future in submit_fetches(source_name, missing_terms).items():
+            futures[(term, source_name)] = future
+    
+    async def run(term, source_name):
+        if (term, source_name) in answered:
+            return record_source_result(answered[(term, source_name)])
+        
+        source_deadline = min(SOURCE_DEADLINES.get(source_name, DEFAULT_SOURCE_DEADLINE), deadline)
+        # Shielded so a timeout here never cancels a fetch other requests have joined
+        future = asyncio.wrap_future(futures[(term, source_name)])
+        try:
+            results = await asyncio.wait_for(asyncio.shield(future), timeout=source_deadline)
+            status = 'ok'
+        except asyncio.TimeoutError:
+            logger.warning("⏱️ %s missed its deadline for '%s'", source_name, term,
+                           extra={'source': source_name, 'term': term, 'status': 'timeout'})
+            results = []
+            status = 'timeout'
+        except Exception as e:
+            results = []
+            status = failure_status(e)
+            logger.warning("❌ %s search failed for '%s': %s", source_name, term, e,
+                           extra={'source': source_name, 'term': term, 'status': status})
+        return record_source_result(
+            SourceResult(term, source_name, results, status, time.monotonic() - start, False)
+        )
+    
+    return await asyncio.gather(*(run(term, name) for term in terms for name in source_names))
+
+# Sources whose APIs can be asked for only newer items: fetch_page(topic, since, page)
+SOURCE_HARVESTS = {
+    'news': harvest_news,
+    'pubmed': harvest_pubmed,
+    'arxiv': harvest_arxiv,
+    'github': harvest_github
+}
+
+# Watermarks are rewound this far, so items that show up upstream after newer
+# ones (with an older date) aren't missed; arXiv announces papers days after
+# their submittedDate and NewsAPI indexes articles late
+HARVEST_LAGS = {
+    'news': 3 * 24 * 60 * 60,
+    'arxiv': 7 * 24 * 60 * 60,
+    'pubmed': 2 * 24 * 60 * 60
+}
+DEFAULT_HARVEST_LAG = 60 * 60
+
+def harvest_source(source_name, topic):
+    """Add what's new for (source, topic) since its last harvest to the library
+
+    Sources with a date filter are asked only for items after the watermark,
+    page by page, stopping at the first page that reaches items the library
+    already has. Other sources run their normal search and keep the unseen
+    items. The watermark is the newest item date seen (never ahead of the
+    clock), and is rewound by the source's lag window before use; a failed
+    harvest, or one that saw no dated items, leaves it where it was.
+    """
+    started = time.time()
+    watermark = library.get_watermark(source_name, topic)
+    fetch_page = SOURCE_HARVESTS.get(source_name)
+    
+    if fetch_page is None:
+        seen = fetch_source(source_name, topic)
+        new_items = library.unknown(seen)
+    else:
+        since = watermark - HARVEST_LAGS.get(source_name, DEFAULT_HARVEST_LAG) if watermark else None
+        seen = []
+        new_items = []
+        # A first harvest takes one page; later ones page back to the watermark
+        for page in range(MAX_HARVEST_PAGES if since else 1):
+            items = fetch_page(topic, since, page)
+            seen.extend(items)
+            fresh = library.unknown(items)
+            new_items.extend(fresh)
+            if len(fresh) < len(items) or len(items) < HARVEST_PAGE_SIZE:
+                break
+    
+    library.add(new_items, topic, source_name)
+    newest = max((item.timestamp for item in seen if item.timestamp is not None), default=None)
+    if newest is not None:
+        library.set_watermark(source_name, topic, max(min(newest, started), watermark or 0))
+    return new_items
+
+def harvest(topics, sources=None):
+    """Incrementally harvest every (or the selected) source for every topic, concurrently
+
+    Returns {(source_name, topic): new items}; failed harvests are reported
+    and left out (their watermarks stay put, so the next run retries).
+    """
+    source_names = [name for name in SOURCE_ORDER if not sources or name in sources]
+    futures = {
+        (source_name, topic): _search_executor.submit(harvest_source, source_name, topic)
+        for topic in dict.fromkeys(topics) for source_name in source_names
+    }
+    
+    harvested = {}
+    for (source_name, topic), future in futures.items():
+        try:
+            harvested[(source_name, topic)] = future.result()
+        except Exception as e:
+            logger.warning("❌ %s harvest failed for '%s': %s", source_name, topic, e,
+                           extra={'source': source_name, 'term': topic})
+    return harvested
+
+async def async_search_all_sources(topic):
+    """Async version of search_all_sources()"""
+    return dedupe(await async_search_sources([topic]))
+
+def search_all_sources(topic):
+    """Search all available data sources for a topic"""
+    logger.info("🔍 COMPREHENSIVE SEARCH FOR: '%s'", topic)
+    
+    return dedupe(search_sources([topic]))
+
+def run_incremental_harvest(topics):
+    """Harvest only new content into the library and summarize it per source"""
+    print(f"\n🌾 INCREMENTAL HARVEST FOR: {topics}")
+    print("-" * 50)
+    
+    new_content = []
+    for (source_name, topic), items in harvest(topics).items():
+        print(f"   {source_name} ({topic}): {len(items)} new")
+        new_content.extend(items)
+    
+    print(f"\n✅ Harvested {len(new_content)} new items")
+    return new_content
+
+# Topics the agent searches for when run directly
+DEFAULT_TOPICS = ['sound healing', 'binaural beats']
+
+def run_enhanced_content_search(incremental=False):
     """Run the enhanced Sound Mind content search with all sources"""
     print("🎵 SOUND MIND ENHANCED CONTENT AGENT")
     print("=" * 60)
     
     # Topics to search for
-    topics = ['sound healing', 'binaural beats']
+    topics = DEFAULT_TOPICS
+    
+    # Get the Reddit token up front (the client refreshes it as needed)
+    get_reddit_token()
     
-    # Get Reddit token once
-    reddit_token = get_reddit_token()
+    if incremental:
+        return run_incremental_harvest(topics)
     
     all_content = []
     
     for topic in topics:
-        topic_results = search_all_sources(topic, reddit_token)
+        topic_results = search_all_sources(topic)
         all_content.extend(topic_results)
     
     # Show comprehensive summary
@@ -654,7 +1188,7 @@ def run_enhanced_content_search():
     # Count by type
     type_counts = {}
     for item in all_content:
-        item_type = item['type']
+        item_type = item.type
         type_counts[item_type] = type_counts.get(item_type, 0) + 1
     
     print(f"\n📈 BREAKDOWN BY SOURCE TYPE:")
@@ -677,15 +1211,17 @@ def run_enhanced_content_search():
     print("-" * 40)
     
     for content_type in type_counts.keys():
-        items = [x for x in all_content if x['type'] == content_type]
+        items = [x for x in all_content if x.type == content_type]
         if items:
             print(f"\n{content_type.upper()}:")
             for item in items[:2]:  # Show top 2
-                print(f"  • {item['title'][:60]}...")
-                print(f"    {item['source']}")
+                print(f"  • {item.title[:60]}...")
+                print(f"    {item.source}")
     
     print(f"\n✅ Your enhanced Sound Mind system now searches {len(type_counts)} different content types!")
     return all_content
 
 if __name__ == "__main__":
-    content = run_enhanced_content_search()
\ No newline at end of file
+    configure_logging()
+    # --incremental fetches only what's new since the last harvest
+    content = run_enhanced_content_search(incremental='--incremental' in sys.argv)
\ No newline at end of file
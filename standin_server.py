@@ -0,0 +1,379 @@
+"""Local stand-in for every upstream the agent talks to
+
+Serves recorded cassette responses (see cassettes.py), falling back to
+synthetic ones shaped like each real API, with per-host latency, jitter,
+error rate and rate limiting. Point the agent at it with
+UPSTREAM_OVERRIDE=http://127.0.0.1:8765 in .env or the environment.
+
+    python standin_server.py [--port 8765] [--cassettes DIR] [--profiles FILE] [--seed N]
+
+Requests arrive as /<upstream host>/<path>. GET /_standin/stats reports
+request counts per host; POST /_standin/profiles merges new per-host
+settings at runtime, e.g. {"export.arxiv.org": {"error_rate": 0.5}}.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import urllib.parse
+import zlib
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from xml.sax.saxutils import escape
+
+from cassettes import CASSETTE_DIR, Cassette, request_key
+from query_batch import term_words
+
+DEFAULT_PORT = 8765
+
+# Settings for hosts without a profile of their own
+DEFAULT_PROFILE = {
+    'latency_ms': 80,       # Mean time to first byte
+    'jitter_ms': 40,        # Latency varies uniformly by +/- this much
+    'error_rate': 0.0,      # Fraction of requests answered with a 503
+    'rate_limit': None      # [requests, per_seconds]; beyond it a 429 is returned
+}
+
+# Rough real-world latencies and the published quotas from resilience.HOST_RATE_LIMITS
+HOST_PROFILES = {
+    'newsapi.org': {'latency_ms': 250, 'jitter_ms': 100},
+    'www.reddit.com': {'latency_ms': 200, 'jitter_ms': 80},
+    'oauth.reddit.com': {'latency_ms': 300, 'jitter_ms': 150, 'rate_limit': [100, 60]},
+    'eutils.ncbi.nlm.nih.gov': {'latency_ms': 400, 'jitter_ms': 200, 'rate_limit': [3, 1]},
+    'www.youtube.com': {'latency_ms': 150, 'jitter_ms': 50},
+    'export.arxiv.org': {'latency_ms': 800, 'jitter_ms': 400, 'rate_limit': [1, 3]},
+    'itunes.apple.com': {'latency_ms': 200, 'jitter_ms': 100, 'rate_limit': [20, 60]},
+    'medium.com': {'latency_ms': 350, 'jitter_ms': 150},
+    'api.github.com': {'latency_ms': 300, 'jitter_ms': 100, 'rate_limit': [10, 60]},
+    'scholar.google.com': {'latency_ms': 500, 'jitter_ms': 250, 'rate_limit': [6, 60]}
+}
+
+# Words synthetic titles are built from, around the requested terms
+FILLER_WORDS = [
+    'effects', 'of', 'sound', 'therapy', 'on', 'sleep', 'stress', 'and', 'focus',
+    'meditation', 'music', 'frequency', 'relaxation', 'study', 'review', 'guided'
+]
+
+def _rng(key):
+    """A generator seeded from the request, so the same request gets the same answer"""
+    return random.Random(zlib.crc32(key.encode()))
+
+def _query_terms(params, *names):
+    for name in names:
+        if params.get(name):
+            return ' '.join(term_words(params[name].replace('all:', ' '))) or 'sound healing'
+    return 'sound healing'
+
+def _title(rng, terms):
+    words = rng.sample(FILLER_WORDS, 4)
+    words.insert(rng.randrange(len(words)), terms)
+    return ' '.join(words).capitalize()
+
+def _when(rng, days=365):
+    return datetime.now(timezone.utc) - timedelta(seconds=rng.randrange(days * 86400))
+
+def _count(params, name, default):
+    try:
+        return max(0, min(100, int(params.get(name, default))))
+    except ValueError:
+        return default
+
+def _json(payload):
+    return 200, 'application/json', json.dumps(payload).encode()
+
+def _atom(entries):
+    body = ''.join(
+        f"<entry><id>{escape(entry['id'])}</id><title>{escape(entry['title'])}</title>"
+        f"<link rel=\"alternate\" href=\"{escape(entry['link'])}\"/>"
+        f"<published>{entry['published']}</published><summary>{escape(entry['summary'])}</summary></entry>"
+        for entry in entries
+    )
+    return 200, 'application/atom+xml', f'<feed xmlns="http://www.w3.org/2005/Atom">{body}</feed>'.encode()
+
+def synthetic_news(path, params, rng):
+    terms = _query_terms(params, 'q')
+    return _json({'status': 'ok', 'articles': [
+        {
+            'title': _title(rng, terms),
+            'source': {'name': rng.choice(['Wellness Daily', 'Science Now', 'The Listener'])},
+            'url': f"https://news.example.com/{rng.getrandbits(40):x}",
+            'publishedAt': _when(rng, 30).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'description': f"A look at {terms} and what listeners report."
+        }
+        for _ in range(_count(params, 'pageSize', 5))
+    ]})
+
+def synthetic_reddit_token(path, params, rng):
+    return _json({'access_token': 'standin-token', 'token_type': 'bearer', 'expires_in': 3600})
+
+def synthetic_reddit(path, params, rng):
+    terms = _query_terms(params, 'q')
+    subreddits = path.split('/')[2].split('+') if path.startswith('/r/') else ['Meditation']
+    children = []
+    for _ in range(_count(params, 'limit', 15)):
+        subreddit = rng.choice(subreddits)
+        children.append({'data': {
+            'title': _title(rng, terms),
+            'subreddit': subreddit,
+            'permalink': f"/r/{subreddit}/comments/{rng.getrandbits(30):x}/",
+            'created_utc': _when(rng, 90).timestamp(),
+            'score': rng.randrange(500),
+            'selftext': f"Has anyone tried {terms}? Sharing my experience."
+        }})
+    return _json({'data': {'children': children}})
+
+def synthetic_esearch(path, params, rng):
+    start = _count(params, 'retstart', 0)
+    ids = [str(30000000 + rng.randrange(9000000)) for _ in range(start + _count(params, 'retmax', 5))]
+    return _json({'esearchresult': {'idlist': ids[start:]}})
+
+def synthetic_esummary(path, params, rng):
+    result = {}
+    for pmid in params.get('id', '').split(','):
+        if pmid:
+            pmid_rng = _rng(pmid)
+            result[pmid] = {
+                'title': _title(pmid_rng, 'sound'),
+                'source': pmid_rng.choice(['J Music Ther', 'Front Psychol', 'Sleep Med']),
+                'pubdate': _when(pmid_rng, 3650).strftime('%Y %b %d')
+            }
+    return _json({'result': result})
+
+def synthetic_youtube(path, params, rng):
+    channel = params.get('channel_id', 'channel')
+    return _atom([
+        {
+            'id': f"yt:video:{rng.getrandbits(40):x}",
+            'title': _title(rng, rng.choice(['sound healing', 'binaural beats', 'meditation music'])),
+            'link': f"https://www.youtube.com/watch?v={rng.getrandbits(40):x}",
+            'published': _when(rng, 60).isoformat(),
+            'summary': f"New upload from {channel}"
+        }
+        for _ in range(15)
+    ])
+
+def synthetic_arxiv(path, params, rng):
+    terms = _query_terms(params, 'search_query')
+    words = terms.split()
+    entries = []
+    for _ in range(_count(params, 'max_results', 5)):
+        # Batched OR queries are attributed by words, so use the words of one clause
+        clause = ' '.join(rng.sample(words, min(len(words), 2)))
+        arxiv_id = f"{rng.randrange(1500, 2500)}.{rng.randrange(10000, 99999)}"
+        entries.append({
+            'id': f"http://arxiv.org/abs/{arxiv_id}v1",
+            'title': _title(rng, clause),
+            'link': f"http://arxiv.org/abs/{arxiv_id}v1",
+            'published': _when(rng).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'summary': f"We study {clause} in a controlled listening experiment."
+        })
+    return _atom(entries)
+
+def synthetic_itunes(path, params, rng):
+    terms = _query_terms(params, 'term')
+    return _json({'results': [
+        {
+            'trackName': _title(rng, terms),
+            'artistName': rng.choice(['Calm Collective', 'Deep Rest FM', 'Resonance']),
+            'trackViewUrl': f"https://podcasts.apple.com/podcast/id{rng.randrange(10 ** 9)}",
+            'releaseDate': _when(rng, 120).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'description': f"Episodes about {terms}."
+        }
+        for _ in range(_count(params, 'limit', 5))
+    ]})
+
+def synthetic_medium(path, params, rng):
+    terms = path.rstrip('/').rsplit('/', 1)[-1].replace('-', ' ')
+    items = ''.join(
+        f"<item><title>{escape(_title(rng, terms))}</title>"
+        f"<link>https://medium.com/@writer/{rng.getrandbits(40):x}</link>"
+        f"<guid>{rng.getrandbits(40):x}</guid>"
+        f"<pubDate>{_when(rng, 60).strftime('%a, %d %b %Y %H:%M:%S GMT')}</pubDate>"
+        f"<description>Notes on {escape(terms)}.</description></item>"
+        for _ in range(10)
+    )
+    return 200, 'application/rss+xml', f'<rss version="2.0"><channel>{items}</channel></rss>'.encode()
+
+def synthetic_github(path, params, rng):
+    query = params.get('q', '').split(' pushed:')[0]
+    clauses = [clause.strip('() ') for clause in query.split(' OR ')] or ['sound healing']
+    items = []
+    for _ in range(_count(params, 'per_page', 5)):
+        clause = ' '.join(term_words(rng.choice(clauses))) or 'sound'
+        name = clause.replace(' ', '-') + f"-{rng.randrange(1000)}"
+        owner = rng.choice(['audiolab', 'calmcode', 'freqtools'])
+        items.append({
+            'name': name,
+            'owner': {'login': owner},
+            'html_url': f"https://github.com/{owner}/{name}",
+            'updated_at': _when(rng, 30).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'pushed_at': _when(rng, 30).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'description': f"Tools for {clause}",
+            'stargazers_count': rng.randrange(2000),
+            'topics': clause.split()
+        })
+    return _json({'total_count': len(items), 'items': items})
+
+def synthetic_scholar(path, params, rng):
+    terms = escape(_query_terms(params, 'q'))
+    return 200, 'text/html', f"<html><body><h3>{terms}</h3></body></html>".encode()
+
+# (host, path prefix) -> generator(path, params, rng) returning (status, content type, body)
+SYNTHETIC_RESPONSES = [
+    ('newsapi.org', '/v2/everything', synthetic_news),
+    ('www.reddit.com', '/api/v1/access_token', synthetic_reddit_token),
+    ('oauth.reddit.com', '/r/', synthetic_reddit),
+    ('eutils.ncbi.nlm.nih.gov', '/entrez/eutils/esearch.fcgi', synthetic_esearch),
+    ('eutils.ncbi.nlm.nih.gov', '/entrez/eutils/esummary.fcgi', synthetic_esummary),
+    ('www.youtube.com', '/feeds/videos.xml', synthetic_youtube),
+    ('export.arxiv.org', '/api/query', synthetic_arxiv),
+    ('itunes.apple.com', '/search', synthetic_itunes),
+    ('medium.com', '/feed/', synthetic_medium),
+    ('api.github.com', '/search/repositories', synthetic_github),
+    ('scholar.google.com', '/scholar', synthetic_scholar)
+]
+
+def synthetic_response(host, path, params, key):
+    for synthetic_host, prefix, generate in SYNTHETIC_RESPONSES:
+        if host == synthetic_host and path.startswith(prefix):
+            return generate(path, params, _rng(key))
+    return None
+
+class StandIn:
+    """Per-host profiles, rate-limit windows and counters shared by the handler threads"""
+
+    def __init__(self, cassette, profiles=None, seed=None):
+        self.cassette = cassette
+        self.profiles = {host: dict(profile) for host, profile in HOST_PROFILES.items()}
+        self.update_profiles(profiles or {})
+        self.random = random.Random(seed)
+        self.stats = {}
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def update_profiles(self, profiles):
+        for host, profile in profiles.items():
+            self.profiles.setdefault(host, {}).update(profile)
+
+    def profile(self, host):
+        return dict(DEFAULT_PROFILE, **self.profiles.get(host, {}))
+
+    def _count(self, host, outcome):
+        counts = self.stats.setdefault(host, {'requests': 0, 'recorded': 0, 'synthetic': 0,
+                                              'missing': 0, 'errors': 0, 'rate_limited': 0})
+        counts[outcome] += 1
+
+    def admit(self, host):
+        """Decide a request's fate before it is served: (delay seconds, error status or None)"""
+        profile = self.profile(host)
+        now = time.monotonic()
+        with self._lock:
+            self._count(host, 'requests')
+            delay = max(0.0, profile['latency_ms'] + self.random.uniform(-1, 1) * profile['jitter_ms']) / 1000
+
+            if profile['rate_limit']:
+                requests, per_seconds = profile['rate_limit']
+                window = self._windows.setdefault(host, deque())
+                while window and window[0] <= now - per_seconds:
+                    window.popleft()
+                if len(window) >= requests:
+                    self._count(host, 'rate_limited')
+                    return delay, 429
+                window.append(now)
+
+            if self.random.random() < profile['error_rate']:
+                self._count(host, 'errors')
+                return delay, 503
+        return delay, None
+
+    def respond(self, method, host, target, body):
+        """(status, headers, body) for a request: recorded, else synthetic, else 404"""
+        key = request_key(method, host, target, body)
+        recorded = self.cassette.lookup(host, key)
+        if recorded is not None:
+            with self._lock:
+                self._count(host, 'recorded')
+            status, headers, data = recorded
+            return status, list(headers.items()), data
+
+        path, _, query = target.partition('?')
+        params = dict(urllib.parse.parse_qsl(query))
+        if body:
+            params.update(urllib.parse.parse_qsl(body.decode(errors='replace')))
+        synthetic = synthetic_response(host, path, params, key)
+        with self._lock:
+            self._count(host, 'synthetic' if synthetic else 'missing')
+        if synthetic is None:
+            return 404, [('Content-Type', 'text/plain')], f"No stand-in response for {key}".encode()
+        status, content_type, data = synthetic
+        return status, [('Content-Type', content_type)], data
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    standin = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, headers, body):
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _control(self, body):
+        if self.command == 'POST' and self.path == '/_standin/profiles':
+            try:
+                self.standin.update_profiles(json.loads(body or b'{}'))
+            except (ValueError, AttributeError) as e:
+                return self._send(400, [('Content-Type', 'text/plain')], str(e).encode())
+        payload = {'profiles': self.standin.profiles, 'stats': self.standin.stats}
+        self._send(200, [('Content-Type', 'application/json')], json.dumps(payload).encode())
+
+    def _handle(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else None
+        if self.path.startswith('/_standin/'):
+            return self._control(body)
+
+        host, _, rest = self.path.lstrip('/').partition('/')
+        delay, error = self.standin.admit(host)
+        time.sleep(delay)
+        if error == 429:
+            return self._send(429, [('Retry-After', '1'), ('Content-Type', 'text/plain')], b'Too Many Requests')
+        if error:
+            return self._send(error, [('Content-Type', 'text/plain')], b'Service Unavailable')
+        self._send(*self.standin.respond(self.command, host, '/' + rest, body))
+
+    do_GET = _handle
+    do_POST = _handle
+
+def make_server(port=DEFAULT_PORT, cassette_dir=CASSETTE_DIR, profiles=None, seed=None, host='127.0.0.1'):
+    """A stand-in server (not yet serving) bound to host:port; port 0 picks a free one"""
+    handler = type('Handler', (StandInHandler,), {'standin': StandIn(Cassette(cassette_dir), profiles, seed)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Local stand-in for the agent\'s upstream APIs')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--cassettes', default=CASSETTE_DIR, help='Directory of recorded responses')
+    parser.add_argument('--profiles', help='JSON file of per-host settings merged over the defaults')
+    parser.add_argument('--seed', type=int, help='Seed latency/error randomness for repeatable runs')
+    args = parser.parse_args()
+
+    profiles = None
+    if args.profiles:
+        with open(args.profiles) as f:
+            profiles = json.load(f)
+
+    server = make_server(args.port, args.cassettes, profiles, args.seed)
+    print(f"🎭 Stand-in upstreams on http://127.0.0.1:{server.server_port}")
+    print(f"   Cassettes: {args.cassettes}")
+    print(f"   Set UPSTREAM_OVERRIDE=http://127.0.0.1:{server.server_port} to use it")
+    server.serve_forever()
@@ -0,0 +1,165 @@
+import contextvars
+import functools
+import json
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+
+from config import config
+
+TRACE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'traces')
+
+# Span groups listed in a summary, slowest total first
+SUMMARY_TOP_SPANS = 15
+
+# Trace files kept in TRACE_DIR; older ones are deleted as new ones are written
+MAX_TRACE_FILES = 50
+
+# The trace of the request being profiled in this context, if any
+_current = contextvars.ContextVar('trace', default=None)
+
+class Trace:
+    """Timed spans recorded while one profiled request is handled
+
+    Spans come from the request's own thread and from the worker threads its
+    fetches run on (see bind()). Fetches joined from another request belong
+    to that request's trace; here they show up only as the time spent
+    waiting for them.
+    """
+
+    def __init__(self, name, dump=False):
+        self.name = name
+        self.dump = dump
+        self.trace_id = secrets.token_hex(6)
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.spans = []
+        self.finished = False
+        self._token = None
+        self._lock = threading.Lock()
+
+    def add(self, name, category, start, end, args=None):
+        """Record a span from perf_counter() start/end times (ignored once the trace is finished)"""
+        with self._lock:
+            if not self.finished:
+                self.spans.append((name, category, start - self.start, end - start,
+                                   threading.get_ident(), args or {}))
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def stage_times(self):
+        """Total milliseconds per top-level request stage (category 'stage')"""
+        stages = {}
+        for name, category, _, duration, _, _ in self.spans:
+            if category == 'stage':
+                stages[name] = stages.get(name, 0) + duration * 1000
+        return {name: round(ms, 2) for name, ms in stages.items()}
+
+    def summary(self):
+        """Compact breakdown: stage times plus the span groups that took longest in total"""
+        with self._lock:
+            spans = list(self.spans)
+        groups = {}
+        for name, category, _, duration, _, _ in spans:
+            group = groups.setdefault((category, name), [0, 0.0, 0.0])
+            group[0] += 1
+            group[1] += duration
+            group[2] = max(group[2], duration)
+        top = sorted(groups.items(), key=lambda entry: entry[1][1], reverse=True)[:SUMMARY_TOP_SPANS]
+        return {
+            'trace_id': self.trace_id,
+            'total_ms': round(self.elapsed() * 1000, 2),
+            'stages': self.stage_times(),
+            'spans': [
+                {'category': category, 'name': name, 'count': count,
+                 'total_ms': round(total * 1000, 2), 'max_ms': round(longest * 1000, 2)}
+                for (category, name), (count, total, longest) in top
+            ],
+            'span_count': len(spans)
+        }
+
+    def events(self):
+        """The spans as Chrome trace events (loadable in Perfetto, chrome://tracing, speedscope)"""
+        with self._lock:
+            spans = list(self.spans)
+        pid = os.getpid()
+        events = [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'args': {'name': self.name}}]
+        for name, category, offset, duration, thread_id, args in spans:
+            events.append({
+                'name': name, 'cat': category, 'ph': 'X', 'pid': pid, 'tid': thread_id,
+                'ts': round(offset * 1e6, 1), 'dur': round(duration * 1e6, 1), 'args': args
+            })
+        return {'traceEvents': events, 'displayTimeUnit': 'ms',
+                'metadata': {'trace_id': self.trace_id, 'request': self.name, 'started_at': self.started_at}}
+
+    def write(self, directory=None):
+        """Dump the full trace as JSON into TRACE_DIR (or directory) and return the file path"""
+        directory = directory or config.get('TRACE_DIR') or TRACE_DIR
+        os.makedirs(directory, exist_ok=True)
+        stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(self.started_at))
+        path = os.path.join(directory, f"trace-{stamp}-{self.trace_id}.json")
+        with open(path, 'w') as f:
+            json.dump(self.events(), f)
+        prune(directory)
+        return path
+
+def prune(directory, keep=None):
+    """Delete all but the newest keep (default MAX_TRACE_FILES) trace files in a directory"""
+    keep = MAX_TRACE_FILES if keep is None else keep
+    names = sorted(name for name in os.listdir(directory)
+                   if name.startswith('trace-') and name.endswith('.json'))
+    for name in names[:-keep] if keep else names:
+        try:
+            os.remove(os.path.join(directory, name))
+        except FileNotFoundError:
+            pass
+
+def start(name, dump=False):
+    """Begin tracing the current request; spans recorded in this context go to the new Trace"""
+    trace = Trace(name, dump)
+    trace._token = _current.set(trace)
+    return trace
+
+def finish(trace):
+    """Stop recording spans for a trace and detach it from the current context"""
+    with trace._lock:
+        trace.finished = True
+    if trace._token is not None:
+        try:
+            _current.reset(trace._token)
+        except ValueError:
+            # Finished from a different context (e.g. a streamed response's generator)
+            _current.set(None)
+        trace._token = None
+
+def current():
+    return _current.get()
+
+@contextmanager
+def span(name, category='stage', **args):
+    """Time the enclosed block as a span of the current trace (a no-op when not profiling)"""
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(name, category, start_time, time.perf_counter(), args)
+
+def bind(fn):
+    """Wrap fn to run in the current context, so spans from a worker thread reach this trace
+
+    Returns fn unchanged when nothing is being traced.
+    """
+    if _current.get() is None:
+        return fn
+    return functools.partial(contextvars.copy_context().run, fn)
+
+def server_timing(trace):
+    """Server-Timing header value for a trace's stages"""
+    return ', '.join(f"{name};dur={ms}" for name, ms in trace.stage_times().items())